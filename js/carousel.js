@@ -6,9 +6,24 @@ document.addEventListener("DOMContentLoaded", () => {
     const btnPrev = document.querySelector(".my-carousel-btn.prev");
     const btnNext = document.querySelector(".my-carousel-btn.next");
 
+    // En dist/ las diapositivas que no se ven llegan con data-src (scripts/lazy_carousel.py)
+    function myMountSlide(index) {
+        const slide = mySlides[index];
+        if (!slide) return;
+        slide.querySelectorAll("[data-src], [data-srcset]").forEach((el) => {
+            if (el.dataset.srcset) el.srcset = el.dataset.srcset;
+            if (el.dataset.src) el.src = el.dataset.src;
+            el.removeAttribute("data-srcset");
+            el.removeAttribute("data-src");
+        });
+    }
+
     function myShowSlide(index) {
         const offset = -index * 100;
         myTrack.style.transform = `translateX(${offset}%)`;
+        // La actual y la siguiente, para que el próximo cambio no muestre un hueco
+        myMountSlide(index);
+        myMountSlide((index + 1) % myTotalSlides);
     }
 
     btnNext.addEventListener("click", () => {
@@ -21,6 +36,13 @@ document.addEventListener("DOMContentLoaded", () => {
         myShowSlide(myCurrentIndex);
     });
 
+    // La siguiente recién cuando terminó la carga: la primera vista cuesta una sola imagen
+    if (document.readyState === "complete") {
+        myMountSlide(1 % myTotalSlides);
+    } else {
+        window.addEventListener("load", () => myMountSlide(1 % myTotalSlides));
+    }
+
     // autoplay
     setInterval(() => {
         myCurrentIndex = (myCurrentIndex + 1) % myTotalSlides;
@@ -0,0 +1,227 @@
+// Visor de planos por tiles: img[data-deepzoom] muestra la vista previa y, al
+// hacer zoom, pide solo los tiles visibles del nivel necesario.
+// La pirámide y su info.json los genera scripts/deepzoom.py (formato DeepZoom).
+(function () {
+  const MAX_ZOOM_PER_PIXEL = 2; // zoom máximo: 2 px de pantalla por px del original
+  const ZOOM_STEP = 1.6;
+
+  function levelSize(info, level) {
+    const scale = Math.pow(2, info.maxLevel - level);
+    return [Math.ceil(info.width / scale), Math.ceil(info.height / scale)];
+  }
+
+  function createViewer(img, info, baseUrl) {
+    const viewer = document.createElement("div");
+    viewer.className = ("deepzoom " + img.className).trim();
+    viewer.style.aspectRatio = info.width + " / " + info.height;
+    const stage = document.createElement("div");
+    stage.className = "deepzoom-stage";
+    img.className = "deepzoom-preview";
+    img.parentNode.insertBefore(viewer, img);
+    stage.appendChild(img);
+    viewer.appendChild(stage);
+
+    const controls = document.createElement("div");
+    controls.className = "deepzoom-controls";
+    [["+", "Acercar", () => zoomBy(ZOOM_STEP)], ["−", "Alejar", () => zoomBy(1 / ZOOM_STEP)], ["⟲", "Ver todo", reset]]
+      .forEach(([label, title, action]) => {
+        const button = document.createElement("button");
+        button.type = "button";
+        button.textContent = label;
+        button.title = title;
+        button.setAttribute("aria-label", title);
+        button.addEventListener("click", action);
+        controls.appendChild(button);
+      });
+    viewer.appendChild(controls);
+
+    const tiles = new Map(); // "nivel/col_fila" -> <img>
+    let scale = 1;
+    let x = 0;
+    let y = 0;
+    let frame = 0;
+
+    function maxScale() {
+      return Math.max(1, (info.width / viewer.clientWidth) * MAX_ZOOM_PER_PIXEL);
+    }
+
+    function clamp() {
+      const w = viewer.clientWidth;
+      const h = viewer.clientHeight;
+      scale = Math.min(Math.max(scale, 1), maxScale());
+      x = Math.min(0, Math.max(w - w * scale, x));
+      y = Math.min(0, Math.max(h - h * scale, y));
+    }
+
+    function neededLevel() {
+      // Sin zoom alcanza con 1x: la primera vista baja pocos tiles
+      const density = scale > 1 ? window.devicePixelRatio || 1 : 1;
+      const needed = viewer.clientWidth * scale * density;
+      for (let level = 0; level < info.maxLevel; level++) {
+        if (levelSize(info, level)[0] >= needed) return level;
+      }
+      return info.maxLevel;
+    }
+
+    function render() {
+      frame = 0;
+      clamp();
+      stage.style.transform = "translate(" + x + "px, " + y + "px) scale(" + scale + ")";
+      viewer.classList.toggle("is-zoomed", scale > 1);
+      const level = neededLevel();
+      const [lw, lh] = levelSize(info, level);
+      if (scale === 1 && lw <= info.preview.width) return; // alcanza con la vista previa
+
+      // Región visible en coordenadas del nivel
+      const w = viewer.clientWidth * scale;
+      const h = viewer.clientHeight * scale;
+      const t = info.tileSize;
+      const c0 = Math.max(0, Math.floor((-x / w) * lw / t));
+      const c1 = Math.min(Math.ceil(lw / t) - 1, Math.floor(((viewer.clientWidth - x) / w) * lw / t));
+      const r0 = Math.max(0, Math.floor((-y / h) * lh / t));
+      const r1 = Math.min(Math.ceil(lh / t) - 1, Math.floor(((viewer.clientHeight - y) / h) * lh / t));
+
+      for (let col = c0; col <= c1; col++) {
+        for (let row = r0; row <= r1; row++) {
+          const key = level + "/" + col + "_" + row;
+          if (tiles.has(key)) continue;
+          const left = col * t - (col ? info.overlap : 0);
+          const top = row * t - (row ? info.overlap : 0);
+          const right = Math.min(lw, (col + 1) * t + info.overlap);
+          const bottom = Math.min(lh, (row + 1) * t + info.overlap);
+          const tile = new Image();
+          tile.alt = "";
+          tile.decoding = "async";
+          tile.style.cssText =
+            "left:" + (left / lw) * 100 + "%;top:" + (top / lh) * 100 + "%;" +
+            "width:" + ((right - left) / lw) * 100 + "%;height:" + ((bottom - top) / lh) * 100 + "%;" +
+            "z-index:" + level;
+          tile.src = baseUrl + key + "." + info.format;
+          tiles.set(key, tile);
+          stage.appendChild(tile);
+        }
+      }
+      // Los niveles más detallados que el actual ya no hacen falta
+      tiles.forEach((tile, key) => {
+        if (parseInt(key, 10) > level) {
+          tile.remove();
+          tiles.delete(key);
+        }
+      });
+    }
+
+    function schedule() {
+      if (!frame) frame = requestAnimationFrame(render);
+    }
+
+    function zoomAt(factor, px, py) {
+      const next = Math.min(Math.max(scale * factor, 1), maxScale());
+      x = px - ((px - x) * next) / scale;
+      y = py - ((py - y) * next) / scale;
+      scale = next;
+      schedule();
+    }
+
+    function zoomBy(factor) {
+      zoomAt(factor, viewer.clientWidth / 2, viewer.clientHeight / 2);
+    }
+
+    function reset() {
+      scale = 1;
+      x = y = 0;
+      schedule();
+    }
+
+    function localPoint(event) {
+      const rect = viewer.getBoundingClientRect();
+      return [event.clientX - rect.left, event.clientY - rect.top];
+    }
+
+    viewer.addEventListener("wheel", (event) => {
+      // A zoom 1 la rueda sigue scrolleando la página; ctrl+rueda (o pinch del trackpad) hace zoom
+      if (scale === 1 && !event.ctrlKey) return;
+      event.preventDefault();
+      const [px, py] = localPoint(event);
+      zoomAt(Math.exp(-event.deltaY * 0.002), px, py);
+    }, { passive: false });
+
+    viewer.addEventListener("dblclick", (event) => {
+      const [px, py] = localPoint(event);
+      if (scale >= maxScale()) reset();
+      else zoomAt(ZOOM_STEP * ZOOM_STEP, px, py);
+    });
+
+    // Arrastre con un puntero, pinch con dos
+    const pointers = new Map();
+    let pinch = null;
+    viewer.addEventListener("pointerdown", (event) => {
+      if (event.target.closest(".deepzoom-controls")) return;
+      pointers.set(event.pointerId, localPoint(event));
+      viewer.setPointerCapture(event.pointerId);
+      if (pointers.size === 2) {
+        const [a, b] = [...pointers.values()];
+        pinch = Math.hypot(a[0] - b[0], a[1] - b[1]);
+      }
+    });
+    viewer.addEventListener("pointermove", (event) => {
+      if (!pointers.has(event.pointerId)) return;
+      const [px, py] = localPoint(event);
+      const [ox, oy] = pointers.get(event.pointerId);
+      pointers.set(event.pointerId, [px, py]);
+      if (pointers.size === 2 && pinch) {
+        const [a, b] = [...pointers.values()];
+        const distance = Math.hypot(a[0] - b[0], a[1] - b[1]);
+        zoomAt(distance / pinch, (a[0] + b[0]) / 2, (a[1] + b[1]) / 2);
+        pinch = distance;
+      } else if (pointers.size === 1 && scale > 1) {
+        viewer.classList.add("is-dragging");
+        x += px - ox;
+        y += py - oy;
+        schedule();
+      }
+    });
+    const release = (event) => {
+      pointers.delete(event.pointerId);
+      if (pointers.size < 2) pinch = null;
+      if (!pointers.size) viewer.classList.remove("is-dragging");
+    };
+    viewer.addEventListener("pointerup", release);
+    viewer.addEventListener("pointercancel", release);
+    window.addEventListener("resize", schedule);
+
+    // Los primeros tiles recién cuando el plano está por entrar en pantalla
+    const observer = new IntersectionObserver((entries) => {
+      if (entries.some((entry) => entry.isIntersecting)) {
+        observer.disconnect();
+        schedule();
+      }
+    }, { rootMargin: "200px" });
+    observer.observe(viewer);
+  }
+
+  function init() {
+    document.querySelectorAll("img[data-deepzoom]").forEach((img) => {
+      if (img.dataset.deepzoomReady) return;
+      img.dataset.deepzoomReady = "1";
+      const url = new URL(img.getAttribute("data-deepzoom"), document.baseURI);
+      fetch(url)
+        .then((response) => {
+          if (!response.ok) throw new Error("No se pudo cargar " + url);
+          return response.json();
+        })
+        .then((info) => createViewer(img, info, new URL(".", url).href))
+        .catch((error) => {
+          // Sin tiles, al menos el plano completo
+          console.error("Error cargando el visor de planos:", error);
+          img.src = img.getAttribute("data-full");
+        });
+    });
+  }
+
+  // Insertado desde un include (main.js) el script puede llegar después de DOMContentLoaded
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", init);
+  } else {
+    init();
+  }
+})();
@@ -1,4 +1,5 @@
 // Carga síncrona del head común para reducir duplicación
+// (solo en desarrollo: en dist/ el head ya viene resuelto por inject_head_partial.py --build)
 (function loadHeadPartial() {
   var include = document.querySelector('meta[data-head-include]');
   if (!include) return;
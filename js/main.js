@@ -46,7 +46,22 @@ function initComponents() {
   if (images.length > 0) {
     let index = 1; // Imagen activa inicial
 
+    // En dist/ solo las tres visibles llegan con src (scripts/lazy_carousel.py)
+    function mountImage(img) {
+      const picture = img.parentElement && img.parentElement.tagName === "PICTURE";
+      (picture ? [...img.parentElement.children] : [img]).forEach((el) => {
+        if (el.dataset.srcset) el.srcset = el.dataset.srcset;
+        if (el.dataset.src) el.src = el.dataset.src;
+        el.removeAttribute("data-srcset");
+        el.removeAttribute("data-src");
+      });
+    }
+
     function updateCarousel() {
+      // La activa y las de los costados
+      for (let offset = -1; offset <= 1; offset++) {
+        mountImage(images[(index + offset + images.length) % images.length]);
+      }
       images.forEach((img, i) => {
         img.classList.remove("active", "prev", "next");
 
@@ -63,6 +78,8 @@ function initComponents() {
     function nextImage() {
       index = (index + 1) % images.length;
       updateCarousel();
+      // La que entra en el próximo cambio se pide con tiempo
+      mountImage(images[(index + 2) % images.length]);
     }
 
     setInterval(nextImage, 3000); // Cambia la imagen cada 3 segundos
@@ -70,6 +87,7 @@ function initComponents() {
   }
 
   // Inclusión de fragmentos HTML comunes (navbar, footer, iconos sociales)
+  // En dist/ ya vienen resueltos en build y no queda ningún [data-include]
   const includeTargets = document.querySelectorAll("[data-include]");
   includeTargets.forEach((el) => {
     const url = el.getAttribute("data-include");
@@ -84,6 +102,14 @@ function initComponents() {
       })
       .then((html) => {
         el.innerHTML = html;
+        // Los <script> insertados con innerHTML no se ejecutan: se recrean
+        // (p. ej. el de partials/deepzoom-viewer.html)
+        el.querySelectorAll("script").forEach((old) => {
+          const script = document.createElement("script");
+          [...old.attributes].forEach((attr) => script.setAttribute(attr.name, attr.value));
+          script.text = old.text;
+          old.replaceWith(script);
+        });
       })
       .catch((error) => {
         console.error("Error cargando componente:", url, error);
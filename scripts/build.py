@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Build del sitio con grafo de dependencias y modo watch.
+
+Sin argumentos corre la cadena completa de dist/ (STAGES), cada etapa con su
+propio script, sobre un dist/ vacío: las etapas (fingerprint, precompress,
+manifests) suponen un árbol recién copiado. Antes se comprueba que el fuente
+tenga aplicado el pipeline HTML (html_pipeline.py --check); si no, el build
+se corta. --verify construye dos veces seguidas y compara el resultado, que
+tiene que ser idéntico. Con --watch mantiene dist/ en modo desarrollo
+(partials resueltos y assets copiados) y, ante cada cambio, reconstruye solo
+las páginas afectadas.
+
+El grafo se guarda en .cache/depgraph.json: cada nodo (página, partial u
+hoja CSS) guarda su tamaño/mtime y sus dependencias directas, así que solo se
+vuelven a analizar los archivos que cambiaron. Las páginas afectadas por un
+cambio son las que alcanzan al archivo recorriendo el grafo al revés
+(partials/nav.html -> todas las páginas; img/AG-13.webp -> las que la usan).
+
+Las referencias relativas de un partial se resuelven como si lo incluyera
+una página de la raíz.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from build_common import (
+    DIST_DIR,
+    EXCLUDED_DIRS,
+    PARTIALS_DIR,
+    ROOT,
+    file_digest,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+
+GRAPH = "depgraph.json"
+GRAPH_VERSION = 1
+POLL_INTERVAL = 0.3
+SCRIPTS_DIR = Path(__file__).resolve().parent
+# (nombre, script, argumentos): la cadena completa de dist/, en orden
+STAGES = [
+    # El pipeline HTML corre sobre el fuente: acá solo se comprueba que esté aplicado
+    ("pipeline", "html_pipeline.py", ["--check"]),
+    ("partials", "inject_head_partial.py", ["--build"]),
+    ("purge", "purge_css.py", []),
+    ("fonts", "subset_fonts.py", []),
+    ("critical", "critical_css.py", []),
+    ("carousel", "lazy_carousel.py", []),
+    ("prefetch", "prefetch_hints.py", []),
+    ("fingerprint", "fingerprint_assets.py", []),
+    ("minify", "minify_html.py", []),
+    # Después de minify: la revisión de los partials es el hash de su contenido final
+    ("sw", "generate_sw.py", []),
+    ("precompress", "precompress.py", []),
+]
+GRAPH_SUFFIXES = {".html", ".css"}
+
+
+def _rel(path: Path) -> str:
+    return path.relative_to(ROOT).as_posix()
+
+
+def arg_rel(arg: str) -> str:
+    """Ruta de la línea de comandos (relativa al cwd o a la raíz) como ruta del sitio."""
+    path = Path(os.path.abspath(arg))
+    return _rel(path) if path.exists() and path.is_relative_to(ROOT) else Path(arg).as_posix()
+
+
+def is_page(rel: str) -> bool:
+    return rel.endswith(".html") and not rel.startswith("partials/")
+
+
+def iter_sources():
+    """Archivos del sitio fuente (lo que se publica y se vigila)."""
+    for dirpath, dirs, files in os.walk(ROOT):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith("."))
+        for fn in sorted(files):
+            if not fn.startswith("."):
+                yield Path(dirpath) / fn
+
+
+def node_deps(path: Path) -> list[str]:
+    """Dependencias locales directas de una página, partial u hoja CSS."""
+    from inject_head_partial import HEAD_INCLUDE_RE, INCLUDE_RE, resolve_partial
+    from page_budget import EXTERNAL_RE, css_refs, is_fetchable, page_refs
+
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    if path.suffix == ".css":
+        refs = css_refs(text)
+    else:
+        refs = HEAD_INCLUDE_RE.findall(text) + [m.group("ref") for m in INCLUDE_RE.finditer(text)]
+        refs += page_refs(BeautifulSoup(text, "html.parser"))
+    # Un partial no tiene URL propia: se resuelve desde una página de la raíz
+    base = ROOT / "index.html" if path.is_relative_to(PARTIALS_DIR) else path
+    deps = set()
+    for ref in refs:
+        if not is_fetchable(ref) or EXTERNAL_RE.match(ref):
+            continue
+        target = resolve_partial(ref.split("?")[0].split("#")[0], base)
+        if target.is_file() and target != path:
+            deps.add(_rel(target))
+    return sorted(deps)
+
+
+def update_graph(graph: dict = None) -> tuple[dict, list[str]]:
+    """Reanaliza los nodos nuevos o modificados; devuelve (grafo, nodos reanalizados)."""
+    if graph is None:
+        graph = load_manifest(GRAPH)
+        if graph.get("version") != GRAPH_VERSION:
+            graph = {"version": GRAPH_VERSION, "nodes": {}}
+    nodes = graph["nodes"]
+    seen, changed = set(), []
+    for path in iter_sources():
+        if path.suffix.lower() not in GRAPH_SUFFIXES:
+            continue
+        rel = _rel(path)
+        seen.add(rel)
+        stat = stat_key(path)
+        if nodes.get(rel, {}).get("stat") != stat:
+            nodes[rel] = {"stat": stat, "deps": node_deps(path)}
+            changed.append(rel)
+    for rel in set(nodes) - seen:
+        del nodes[rel]
+        changed.append(rel)
+    return graph, changed
+
+
+def affected_pages(graph: dict, changed) -> set[str]:
+    """Páginas que dependen (directa o transitivamente) de alguno de `changed`."""
+    reverse = {}
+    for rel, node in graph["nodes"].items():
+        for dep in node["deps"]:
+            reverse.setdefault(dep, set()).add(rel)
+    pending, seen = list(changed), set(changed)
+    while pending:
+        for parent in reverse.get(pending.pop(), ()):
+            if parent not in seen:
+                seen.add(parent)
+                pending.append(parent)
+    return {rel for rel in seen if is_page(rel) and rel in graph["nodes"]}
+
+
+def run_stages(skip=()):
+    if "partials" not in skip and DIST_DIR.exists():
+        # La cadena completa arranca de cero; sin la etapa partials se trabaja sobre el dist/ existente
+        shutil.rmtree(DIST_DIR)
+    for name, script, args in STAGES:
+        if name in skip:
+            continue
+        print(f"\n▶ {name}: {script} {' '.join(args)}".rstrip())
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(SCRIPTS_DIR / script), *args], check=True, cwd=ROOT)
+        print(f"  ({time.perf_counter() - start:.2f}s)")
+
+
+def tree_digest(root: Path = DIST_DIR) -> dict:
+    """{ruta relativa: sha256} de todos los archivos de `root`."""
+    return {p.relative_to(root).as_posix(): file_digest(p) for p in sorted(root.rglob("*")) if p.is_file()}
+
+
+def verify(skip=()) -> bool:
+    """Dos builds seguidos tienen que dejar el mismo árbol."""
+    run_stages(skip)
+    first = tree_digest()
+    run_stages(skip)
+    second = tree_digest()
+    diff = sorted(rel for rel in set(first) | set(second) if first.get(rel) != second.get(rel))
+    if diff:
+        print(f"\n❌ El segundo build difiere en {len(diff)} archivos:")
+        for rel in diff[:20]:
+            state = "nuevo" if rel not in first else "falta" if rel not in second else "cambió"
+            print(f"  {rel} ({state})")
+        return False
+    print(f"\n✅ Dos builds seguidos dejan el mismo árbol ({len(first)} archivos)")
+    return True
+
+
+def snapshot() -> dict:
+    return {_rel(p): stat_key(p) for p in iter_sources()}
+
+
+def rebuild(pages, dest: Path = DIST_DIR) -> int:
+    """Build de desarrollo incremental: copia los assets cambiados y rearma las páginas."""
+    from inject_head_partial import build_page, sync_tree
+
+    copied = sync_tree(dest)
+    cache = {}
+    for rel in sorted(pages):
+        build_page(ROOT / rel, dest, cache)
+    return copied
+
+
+def watch(dest: Path = DIST_DIR):
+    from inject_head_partial import build_dist
+
+    graph, _ = update_graph()
+    save_manifest(GRAPH, graph)
+    build_dist(dest)
+    print(f"👀 Vigilando {ROOT} (Ctrl+C para salir)")
+    before = snapshot()
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            now = snapshot()
+            changed = sorted(rel for rel in set(before) | set(now) if before.get(rel) != now.get(rel))
+            before = now
+            if not changed:
+                continue
+            start = time.perf_counter()
+            graph, _ = update_graph(graph)
+            pages = affected_pages(graph, changed) | {rel for rel in changed if is_page(rel) and rel in now}
+            copied = rebuild(pages, dest)
+            save_manifest(GRAPH, graph)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  {', '.join(changed[:3])}{'…' if len(changed) > 3 else ''} → "
+                  f"{len(pages)} páginas, {copied} assets ({elapsed:.0f} ms)")
+    except KeyboardInterrupt:
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build de dist/ con grafo de dependencias y modo watch.")
+    parser.add_argument("--watch", action="store_true", help="rebuild incremental de desarrollo ante cada cambio")
+    parser.add_argument("--skip", default="", help=f"etapas a omitir ({', '.join(n for n, *_ in STAGES)})")
+    parser.add_argument("--verify", action="store_true", help="construir dos veces y comparar los árboles")
+    parser.add_argument("--affected", nargs="+", metavar="ARCHIVO", help="listar las páginas que dependen de ARCHIVO")
+    args = parser.parse_args()
+
+    if args.affected:
+        graph, _ = update_graph()
+        save_manifest(GRAPH, graph)
+        changed = [arg_rel(a) for a in args.affected]
+        for rel in sorted(affected_pages(graph, changed)):
+            print(rel)
+        return
+    if args.watch:
+        watch()
+        return
+
+    start = time.perf_counter()
+    graph, changed = update_graph()
+    save_manifest(GRAPH, graph)
+    print(f"🕸  Grafo de dependencias: {len(graph['nodes'])} nodos ({len(changed)} reanalizados)")
+    skip = {s for s in args.skip.split(",") if s}
+    if args.verify:
+        if not verify(skip):
+            sys.exit(1)
+    else:
+        run_stages(skip)
+    print(f"\n✨ Build completo en {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
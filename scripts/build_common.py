@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades compartidas por los scripts de build: rutas del proyecto,
+hash de contenido, escritura atómica y manifiestos JSON en .cache/.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+IMG_DIR = ROOT / "img"
+# Pirámides de deepzoom.py: los tiles los pide js/deepzoom.js, ningún HTML los nombra
+TILES_DIR = IMG_DIR / "tiles"
+# Copias sin recodificar de los WebP que optimiza image_quality.py (no se publican)
+MASTERS_DIR = ROOT / "img-masters"
+CACHE_DIR = ROOT / ".cache"
+PARTIALS_DIR = ROOT / "partials"
+DIST_DIR = ROOT / "dist"
+
+# Directorios que no forman parte del sitio fuente
+EXCLUDED_DIRS = {".cache", ".git", ".idea", ".venv", "venv", "dist", "img-masters", "node_modules", "scripts"}
+
+CHUNK_SIZE = 1 << 20
+
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def iter_html_files(include_partials: bool = True):
+    """Recorre las páginas HTML del sitio (y opcionalmente los partials)."""
+    for path in sorted(ROOT.rglob("*.html")):
+        rel = path.relative_to(ROOT)
+        if rel.parts[0] in EXCLUDED_DIRS:
+            continue
+        if not include_partials and rel.parts[0] == "partials":
+            continue
+        yield path
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 del contenido de un archivo, leído en bloques."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextmanager
+def atomic_output(path: Path):
+    """
+    Entrega una ruta temporal en el mismo directorio que `path`; si el bloque
+    termina sin errores la renombra sobre `path`, si no la descarta.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.stem}.", suffix=path.suffix, dir=path.parent)
+    os.close(fd)
+    tmp_path = Path(tmp)
+    try:
+        yield tmp_path
+        # mkstemp crea el archivo con 0600; el sitio publicado necesita 0644
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    with atomic_output(path) as tmp:
+        tmp.write_bytes(data)
+
+
+def atomic_write_text(path: Path, text: str):
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def load_manifest(name: str) -> dict:
+    """Lee .cache/<name>; devuelve {} si no existe o está corrupto."""
+    path = CACHE_DIR / name
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(name: str, data: dict):
+    atomic_write_text(CACHE_DIR / name, json.dumps(data, indent=2, sort_keys=True, ensure_ascii=False))
+
+
+def stat_key(path: Path) -> list:
+    """Tamaño y mtime, para evitar re-hashear archivos que no cambiaron."""
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 """Remove trailing whitespace and collapse multiple blank lines in text files."""
 import os
-import re
 
-def clean_file(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+from build_common import EXCLUDED_DIRS
+from html_pipeline import transform
+
+
+@transform("clean_whitespace", kind="post")
+def clean_text(text, ctx=None):
+    lines = text.splitlines(keepends=True)
     new_lines = []
     blank_count = 0
     for line in lines:
@@ -18,13 +21,22 @@ def clean_file(path):
         else:
             blank_count = 0
             new_lines.append(l)
-    if new_lines != lines:
+    return ''.join(new_lines)
+
+
+def clean_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    new_text = clean_text(text)
+    if new_text != text:
         with open(path, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
+            f.write(new_text)
         print('Cleaned', path)
 
 
-for dirpath, dirs, files in os.walk(os.path.join(os.path.dirname(__file__), '..')):
-    for fn in files:
-        if fn.lower().endswith(('.html','.css','.js')):
-            clean_file(os.path.join(dirpath, fn))
+if __name__ == '__main__':
+    for dirpath, dirs, files in os.walk(os.path.join(os.path.dirname(__file__), '..')):
+        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
+        for fn in files:
+            if fn.lower().endswith(('.html','.css','.js')):
+                clean_file(os.path.join(dirpath, fn))
@@ -1,162 +1,371 @@
 #!/usr/bin/env python3
 """
 Script para convertir todas las imágenes a WebP y actualizar referencias
+
+La conversión corre en un pool de procesos y guarda en .cache/webp-manifest.json
+el hash de cada imagen original: en la siguiente corrida solo se codifican las
+que cambiaron. Los WebP se escriben de forma atómica (archivo temporal + rename).
+La calidad de cada uno se elige por SSIM (ver image_quality.py): el WebP
+lleva la misma marca EXIF y queda en el mismo .cache/quality-manifest.json
+que image_quality.py, que así no lo vuelve a buscar. --delete-originals mueve
+los originales a img-masters/, de donde se recodifica después.
+
+Si Pillow tiene soporte AVIF, cada foto también se codifica como AVIF
+(img/<nombre>.avif) desde el mismo master que el WebP (el original en img/ o
+en img-masters/); desde el WebP solo si no queda ninguno. El manifiesto guarda las dos salidas, y la transformación picture_avif
+del pipeline envuelve los <img> en <picture> con la fuente AVIF primero y el
+WebP como fallback.
 """
 
+import argparse
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from PIL import Image
-import re
-import os
+
+from build_common import (
+    EXCLUDED_DIRS,
+    IMG_DIR,
+    MASTERS_DIR,
+    ROOT,
+    atomic_output,
+    atomic_write_bytes,
+    default_workers,
+    file_digest,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+from html_pipeline import transform
+from image_quality import MANIFEST as QUALITY_MANIFEST, TARGET_SSIM, master_for, optimized_exif, record, search_quality
+from rewrite_refs import Rewriter, rewrite_files
 
 # Configuración
-WORKSPACE = Path("c:/Users/facun/Desktop/denovo-web")
-IMG_DIR = WORKSPACE / "img"
+WORKSPACE = ROOT
 IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
 SKIP_FORMATS = {".webp", ".svg", ".ico", ".mp4"}  # No convertir estos
+MANIFEST = "webp-manifest.json"
+AVIF_QUALITY = 60
+
+
+def encode_webp(src: Path, dest: Path, method: int, target: float = None):
+    """
+    Codifica `src` como WebP en `dest` (se ejecuta en un proceso del pool).
+    Con `target` la calidad se busca por SSIM (image_quality.py); si no, 80/85 fijo.
+    Devuelve (bytes originales, bytes WebP, calidad, SSIM o None).
+    """
+    from PIL import Image
+
+    with Image.open(src) as img:
+        if target:
+            quality, score, data = search_quality(img, target, method, optimized_exif())
+            atomic_write_bytes(dest, data)
+            return src.stat().st_size, dest.stat().st_size, quality, score
+        with atomic_output(dest) as tmp:
+            if img.mode == "RGBA":
+                # Mantener transparencia en WebP, que lo soporta
+                quality = 85
+                img.save(tmp, "WEBP", quality=quality)
+            elif img.mode == "P":
+                # Imágenes indexadas
+                quality = 85
+                img.convert("RGB").save(tmp, "WEBP", quality=quality)
+            else:
+                quality = 80
+                img.save(tmp, "WEBP", quality=quality, method=method)
+    return src.stat().st_size, dest.stat().st_size, quality, None
+
+
+def avif_supported() -> bool:
+    from PIL import features
+
+    return bool(features.check("avif"))
+
+
+def encode_avif(src: Path, dest: Path, quality: int):
+    """Codifica `src` como AVIF en `dest` (se ejecuta en un proceso del pool)."""
+    from PIL import Image
+
+    with Image.open(src) as img, atomic_output(dest) as tmp:
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        img.save(tmp, "AVIF", quality=quality)
+    return src.stat().st_size, dest.stat().st_size
+
+
+def plan_conversions(manifest: dict, force: bool = False):
+    """
+    Recorre img/ y separa las imágenes en pendientes y al día.
+    Devuelve (pendientes, al_dia) como listas de (origen, destino, hash).
+    """
+    pending, fresh = [], []
+    for img_file in sorted(IMG_DIR.iterdir()):
+        if not img_file.is_file():
+            continue
+
+        ext = img_file.suffix.lower()
+        if ext in SKIP_FORMATS:
+            print(f"  ⊘ {img_file.name} (formato {ext}, no se convierte)")
+            continue
+        if ext not in IMAGE_EXTENSIONS:
+            continue
 
-print("="*60)
-print("INICIANDO CONVERSIÓN DE IMÁGENES A WebP")
-print("="*60)
-
-# Paso 1: Convertir todas las imágenes a WebP
-print("\nPaso 1: Convirtiendo imágenes a WebP...")
-converted_images = {}
-failed_images = []
-
-for img_file in sorted(IMG_DIR.iterdir()):
-    if not img_file.is_file():
-        continue
-    
-    ext = img_file.suffix.lower()
-    
-    # Si la extensión está en SKIP_FORMATS, saltar
-    if ext in SKIP_FORMATS:
-        print(f"  ⊘ {img_file.name} (formato {ext}, no se convierte)")
-        continue
-    
-    # Si la extensión es de imagen soportada
-    if ext in IMAGE_EXTENSIONS:
         webp_path = img_file.with_suffix(".webp")
-        
-        try:
-            # Abrir imagen original
-            with Image.open(img_file) as img:
-                # Convertir RGBA a RGB para mejor compresión si es posible
-                if img.mode == "RGBA":
-                    # Mantener transparencia en WebP, que lo soporta
-                    img.save(webp_path, "WEBP", quality=85)
-                elif img.mode == "P":
-                    # Imágenes indexadas
-                    img.convert("RGB").save(webp_path, "WEBP", quality=85)
-                else:
-                    img.save(webp_path, "WEBP", quality=80, method=6)
-            
-            # Guardar mapeo: nombre_original -> nombre_webp
-            converted_images[img_file.name] = webp_path.name
-            
-            # Mostrar tamaño original vs webp
-            original_size = img_file.stat().st_size
-            webp_size = webp_path.stat().st_size
+        entry = manifest.get(img_file.name, {})
+        key = stat_key(img_file)
+        # Si tamaño y mtime coinciden evitamos leer el archivo entero
+        digest = entry.get("sha256") if entry.get("stat") == key else file_digest(img_file)
+
+        if not force and entry.get("sha256") == digest and webp_path.exists():
+            fresh.append((img_file, webp_path, digest))
+        else:
+            pending.append((img_file, webp_path, digest))
+    return pending, fresh
+
+
+def plan_avif(manifest: dict, force: bool = False):
+    """
+    Como plan_conversions, para las salidas AVIF. La fuente es la misma que
+    usa image_quality.py para el WebP (master_for): el original en img/ o en
+    img-masters/; solo sin ninguno, el propio WebP.
+    """
+    pending, fresh = [], []
+    for img_file in sorted(IMG_DIR.iterdir()):
+        ext = img_file.suffix.lower()
+        if not img_file.is_file() or ext not in IMAGE_EXTENSIONS | {".webp"}:
+            continue
+        if ext == ".webp" and any(img_file.with_suffix(e).exists() for e in IMAGE_EXTENSIONS):
+            continue
+        src = (master_for(img_file) or img_file) if ext == ".webp" else img_file
+
+        avif_path = img_file.with_suffix(".avif")
+        entry = manifest.get(src.name, {})
+        key = stat_key(src)
+        digest = entry.get("sha256") if entry.get("stat") == key else file_digest(src)
+
+        if not force and entry.get("avif", {}).get("sha256") == digest and avif_path.exists():
+            fresh.append((src, avif_path, digest))
+        else:
+            pending.append((src, avif_path, digest))
+    return pending, fresh
+
+
+def convert_all(pending, manifest: dict, quality_manifest: dict, workers: int, method: int, target: float = None):
+    """Convierte las imágenes pendientes en paralelo y actualiza los manifiestos."""
+    converted, failed = {}, []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(encode_webp, src, dest, method, target): (src, dest, digest)
+            for src, dest, digest in pending
+        }
+        for future in as_completed(futures):
+            src, dest, digest = futures[future]
+            try:
+                original_size, webp_size, quality, score = future.result()
+            except Exception as e:
+                print(f"  ✗ Error al convertir {src.name}: {e}")
+                failed.append(src.name)
+                continue
+
+            converted[src.name] = dest.name
+            manifest[src.name] = {
+                **manifest.get(src.name, {}),
+                "sha256": digest,
+                "stat": stat_key(src),
+                "output": dest.name,
+            }
+            if score is not None:
+                record(quality_manifest, dest, target, quality, score)
             reduction = (1 - webp_size / original_size) * 100
-            
-            print(f"  ✓ {img_file.name} → {webp_path.name} ({reduction:.1f}% menor)")
-            
-        except Exception as e:
-            print(f"  ✗ Error al convertir {img_file.name}: {e}")
-            failed_images.append(img_file.name)
-
-print(f"\nImágenes convertidas: {len(converted_images)}")
-if failed_images:
-    print(f"Imágenes con error: {len(failed_images)}")
-    for img in failed_images:
-        print(f"  - {img}")
-
-# Paso 2: Actualizar referencias en archivos HTML y CSS
-print("\nPaso 2: Actualizando referencias en archivos...")
-
-def update_file_references(file_path, conversions):
-    """Actualiza todas las referencias de imágenes en un archivo"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        
-        # Actualizar referencias con rutas relativas
-        for old_name, new_name in conversions.items():
-            # Patterns para capturar diferentes formas de referencias
-            patterns = [
-                # src="./img/imagen.jpg" o src="/img/imagen.jpg"
-                (f"(['\"])(\\.?/?img/)({re.escape(old_name)})(['\"])", 
-                 f"\\1\\2{new_name}\\4"),
-                # style="background: url('./img/imagen.jpg')"
-                (f"(url\\(['\"]?)(\\.?/?img/)({re.escape(old_name)})(['\"]?\\))",
-                 f"\\1\\2{new_name}\\4"),
-                # background-image: url('../img/imagen.jpg')
-                (f"(url\\(['\"]?)(\\.\\./img/)({re.escape(old_name)})(['\"]?\\))",
-                 f"\\1\\2{new_name}\\4"),
-                # img/imagen.jpg sin precedente
-                (f"(img/)({re.escape(old_name)})",
-                 f"\\1{new_name}"),
-            ]
-            
-            for pattern, replacement in patterns:
-                content = re.sub(pattern, replacement, content)
-        
-        # Si hubo cambios, guardar el archivo
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True, True
-        return True, False
-        
-    except Exception as e:
-        print(f"  ✗ Error al procesar {file_path}: {e}")
-        return False, False
-
-# Encontrar y actualizar todos los HTML, CSS y PHP
-html_files = list(WORKSPACE.glob("**/*.html"))
-css_files = list(WORKSPACE.glob("**/*.css"))
-php_files = list(WORKSPACE.glob("**/*.php"))
-
-all_files = html_files + css_files + php_files
-updated_files = []
-
-for file_path in all_files:
-    # Saltar archivos en node_modules o .venv
-    if '.venv' in str(file_path) or 'node_modules' in str(file_path):
-        continue
-    
-    success, changed = update_file_references(file_path, converted_images)
-    if success and changed:
+            print(f"  ✓ {src.name} → {dest.name} q{quality} ({reduction:.1f}% menor)")
+    return converted, failed
+
+
+def convert_all_avif(pending, manifest: dict, workers: int, quality: int):
+    """Codifica los AVIF pendientes en paralelo; devuelve los nombres que fallaron."""
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(encode_avif, src, dest, quality): (src, dest, digest)
+            for src, dest, digest in pending
+        }
+        for future in as_completed(futures):
+            src, dest, digest = futures[future]
+            try:
+                source_size, avif_size = future.result()
+            except Exception as e:
+                print(f"  ✗ Error al codificar {src.name} como AVIF: {e}")
+                failed.append(src.name)
+                continue
+
+            entry = manifest.setdefault(src.name, {})
+            entry.update(sha256=digest, stat=stat_key(src))
+            entry["avif"] = {"sha256": digest, "output": dest.name}
+            reduction = (1 - avif_size / source_size) * 100
+            print(f"  ✓ {src.name} → {dest.name} ({reduction:.1f}% menor)")
+    return failed
+
+
+def avif_srcset(img, page: Path):
+    """srcset AVIF equivalente al del <img>, o None si falta alguna versión AVIF."""
+    from inject_head_partial import resolve_partial
+
+    candidates = [c.strip().split(None, 1) for c in img.get("srcset", "").split(",") if c.strip()]
+    if not candidates:
+        candidates = [[img["src"]]]
+    out = []
+    for url, *descriptor in candidates:
+        if not url.lower().endswith(tuple(IMAGE_EXTENSIONS | {".webp"})):
+            return None
+        path = resolve_partial(url, page)
+        if not path.with_suffix(".avif").is_file():
+            return None
+        out.append(" ".join([url.rsplit(".", 1)[0] + ".avif", *descriptor]))
+    return ", ".join(out)
+
+
+@transform("picture_avif", scope="pages")
+def picture_avif(soup, ctx):
+    """<img> -> <picture> con <source type="image/avif"> y el WebP como fallback."""
+    modified = False
+    for img in soup.find_all("img", src=True):
+        picture = img.parent if img.parent is not None and img.parent.name == "picture" else None
+        source = picture.find("source", type="image/avif") if picture else None
+        # Los planos con visor (deepzoom.py) muestran la vista previa, no el original en AVIF
+        srcset = None if img.has_attr("data-deepzoom") else avif_srcset(img, ctx.path)
+        if srcset is None:
+            if source is not None:
+                source.decompose()
+                if not picture.find("source"):
+                    picture.unwrap()
+                modified = True
+            continue
+
+        attrs = {"srcset": srcset, "type": "image/avif"}
+        if img.get("sizes"):
+            attrs["sizes"] = img["sizes"]
+        if source is None:
+            if picture is None:
+                picture = img.wrap(soup.new_tag("picture"))
+            picture.insert(0, soup.new_tag("source", attrs=attrs))
+            modified = True
+        elif source.attrs != attrs:
+            source.attrs = attrs
+            modified = True
+    return modified
+
+
+def update_all_references(conversions):
+    """Reescribe las referencias en HTML, CSS y PHP en una pasada por archivo (rewrite_refs.py)."""
+    files = [
+        path
+        for pattern in ("**/*.html", "**/*.css", "**/*.php")
+        for path in WORKSPACE.glob(pattern)
+        # Saltar archivos en node_modules, .venv o el build en dist/
+        if path.relative_to(WORKSPACE).parts[0] not in EXCLUDED_DIRS
+    ]
+    updated_files = []
+    for file_path in rewrite_files(Rewriter.for_dir(conversions, "img"), files):
         updated_files.append(file_path.name)
         print(f"  ✓ {file_path.name}")
+    return updated_files
+
+
+def delete_originals(conversions):
+    """Saca los originales de img/ hacia img-masters/: siguen siendo la fuente sin pérdida."""
+    deleted_count = 0
+    for old_name in conversions.keys():
+        old_path = IMG_DIR / old_name
+        if old_path.exists():
+            try:
+                MASTERS_DIR.mkdir(exist_ok=True)
+                shutil.move(old_path, MASTERS_DIR / old_name)
+                deleted_count += 1
+                print(f"  ✓ {old_name}")
+            except Exception as e:
+                print(f"  ✗ No se pudo eliminar {old_name}: {e}")
+    return deleted_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convierte img/ a WebP de forma incremental.")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--method", type=int, default=6, choices=range(7), help="esfuerzo del encoder WebP (0-6)")
+    parser.add_argument("--target-ssim", type=float, default=TARGET_SSIM,
+                        help="SSIM objetivo para elegir la calidad de cada imagen (0: calidad fija 80/85)")
+    parser.add_argument("--force", action="store_true", help="ignorar el manifiesto y recodificar todo")
+    parser.add_argument("--no-avif", action="store_true", help="no generar las versiones AVIF")
+    parser.add_argument("--avif-quality", type=int, default=AVIF_QUALITY, help="calidad del encoder AVIF (0-100)")
+    parser.add_argument("--delete-originals", action="store_true", help="mover los originales convertidos a img-masters/")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("INICIANDO CONVERSIÓN DE IMÁGENES A WebP")
+    print("="*60)
+
+    manifest = load_manifest(MANIFEST)
+    quality_manifest = load_manifest(QUALITY_MANIFEST)
+
+    # Paso 1: Convertir las imágenes nuevas o modificadas
+    print("\nPaso 1: Convirtiendo imágenes a WebP...")
+    pending, fresh = plan_conversions(manifest, force=args.force)
+    for src, dest, _ in fresh:
+        print(f"  = {src.name} (sin cambios)")
+
+    converted_images, failed_images = convert_all(
+        pending, manifest, quality_manifest, args.workers, args.method, args.target_ssim
+    )
+    save_manifest(MANIFEST, manifest)
+    save_manifest(QUALITY_MANIFEST, quality_manifest)
+
+    print(f"\nImágenes convertidas: {len(converted_images)} (sin cambios: {len(fresh)})")
+
+    # Paso 1b: AVIF, antes de que --delete-originals borre las fuentes
+    avif_count = 0
+    if not args.no_avif:
+        print("\nPaso 1b: Generando versiones AVIF...")
+        if avif_supported():
+            avif_pending, avif_fresh = plan_avif(manifest, force=args.force)
+            avif_failed = convert_all_avif(avif_pending, manifest, args.workers, args.avif_quality)
+            save_manifest(MANIFEST, manifest)
+            failed_images += avif_failed
+            avif_count = len(avif_pending) - len(avif_failed)
+            print(f"\nAVIF generados: {avif_count} (sin cambios: {len(avif_fresh)})")
+        else:
+            print("  ⚠ Pillow no tiene soporte AVIF; se mantiene solo WebP")
+
+    if failed_images:
+        print(f"Imágenes con error: {len(failed_images)}")
+        for img in failed_images:
+            print(f"  - {img}")
+
+    # Paso 2: Actualizar referencias en archivos HTML y CSS (también las de
+    # imágenes ya convertidas en corridas anteriores, por si se editó algo)
+    print("\nPaso 2: Actualizando referencias en archivos...")
+    all_conversions = {src.name: dest.name for src, dest, _ in fresh}
+    all_conversions.update(converted_images)
+    updated_files = update_all_references(all_conversions)
+    print(f"\nArchivos actualizados: {len(updated_files)}")
+
+    # Paso 3: Mover los originales a img-masters/ (opcional)
+    deleted_count = 0
+    if args.delete_originals:
+        print(f"\nPaso 3: Moviendo los originales a {MASTERS_DIR.name}/...")
+        deleted_count = delete_originals(all_conversions)
+        print(f"\nOriginales movidos: {deleted_count}")
+
+    # Resumen final
+    print("\n" + "="*60)
+    print("RESUMEN DE CONVERSIÓN")
+    print("="*60)
+    print(f"Imágenes convertidas: {len(converted_images)}")
+    print(f"Imágenes sin cambios: {len(fresh)}")
+    print(f"AVIF generados: {avif_count}")
+    print(f"Archivos actualizados: {len(updated_files)}")
+    print(f"Originales movidos a {MASTERS_DIR.name}/: {deleted_count}")
+    print(f"Conversiones fallidas: {len(failed_images)}")
+    print("="*60)
+    print("\n✓ ¡Conversión completada!")
+
 
-print(f"\nArchivos actualizados: {len(updated_files)}")
-
-# Paso 3: Eliminar imágenes originales (opcional)
-print("\nPaso 3: Eliminando imágenes originales...")
-deleted_count = 0
-
-for old_name in converted_images.keys():
-    old_path = IMG_DIR / old_name
-    if old_path.exists():
-        try:
-            old_path.unlink()
-            deleted_count += 1
-            print(f"  ✓ {old_name}")
-        except Exception as e:
-            print(f"  ✗ No se pudo eliminar {old_name}: {e}")
-
-print(f"\nImágenes eliminadas: {deleted_count}")
-
-# Resumen final
-print("\n" + "="*60)
-print("RESUMEN DE CONVERSIÓN")
-print("="*60)
-print(f"Imágenes convertidas: {len(converted_images)}")
-print(f"Archivos actualizados: {len(updated_files)}")
-print(f"Imágenes eliminadas: {deleted_count}")
-print(f"Conversiones fallidas: {len(failed_images)}")
-print("="*60)
-print("\n✓ ¡Conversión completada!")
+if __name__ == "__main__":
+    main()
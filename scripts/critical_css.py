@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inlinea el CSS crítico de cada página de dist/ y carga las hojas completas
+de forma asíncrona (rel=preload + onload), para que el primer pintado no
+espere a bootstrap.min.css y main.css.
+
+El CSS crítico son las reglas cuyo elemento estilado aparece por encima del
+pliegue: la navegación y los bloques del body hasta el primer <header> o
+<section> inclusive.
+"""
+import argparse
+import re
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from build_common import DIST_DIR, atomic_write_text
+from css_tools import AtRule, filter_rules, parse_css, serialize, usage_from_soup
+
+ATF_BLOCKS = {"header", "section"}
+ATF_FALLBACK_CHILDREN = 3
+LINK_RE = re.compile(r"[ \t]*<link\b[^>]*>", re.IGNORECASE)
+ATTR_RE = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+def content_root(soup):
+    """El <body>, o el contenedor que hace de body en las páginas sin él."""
+    if soup.body:
+        return soup.body
+    html = soup.html or soup
+    for child in html.find_all(recursive=False):
+        if child.name != "head":
+            return child
+    return html
+
+
+def above_the_fold(soup) -> list:
+    """Elementos que probablemente se ven sin hacer scroll."""
+    root = content_root(soup)
+    children = []
+    for child in root.find_all(recursive=False):
+        # enhance_html.py envuelve el contenido en <main>: se mira adentro
+        children.extend(child.find_all(recursive=False) if child.name == "main" else [child])
+    selected = []
+    for child in children:
+        selected.append(child)
+        if child.name in ATF_BLOCKS:
+            break
+    else:
+        selected = children[:ATF_FALLBACK_CHILDREN]
+    elements = []
+    for el in selected:
+        elements.append(el)
+        elements.extend(el.find_all(True))
+    return elements
+
+
+def screen_rules(rules) -> list:
+    """Descarta los bloques @media print, que no intervienen en el primer pintado."""
+    return [
+        r for r in rules
+        if not (isinstance(r, AtRule) and re.match(r"@media\s+print\b", r.prelude, re.IGNORECASE))
+    ]
+
+
+def link_attrs(tag: str) -> dict:
+    return {m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3) for m in ATTR_RE.finditer(tag)}
+
+
+def local_stylesheet(href: str, page: Path, root: Path) -> Path:
+    """Ruta en disco de una hoja local, o None si es externa."""
+    if not href or re.match(r"^(?:[a-z]+:)?//", href, re.IGNORECASE):
+        return None
+    href = href.split("?")[0].split("#")[0]
+    path = root / href.lstrip("/") if href.startswith("/") else (page.parent / href).resolve()
+    return path if path.suffix == ".css" and path.is_file() else None
+
+
+def defer_link(tag: str, attrs: dict) -> str:
+    indent = tag[: len(tag) - len(tag.lstrip())]
+    href = attrs["href"]
+    return (
+        f'{indent}<link as="style" href="{href}" onload="this.onload=null;this.rel=\'stylesheet\'" rel="preload"/>\n'
+        f'{indent}<noscript><link href="{href}" rel="stylesheet"/></noscript>'
+    )
+
+
+def process_page(page: Path, root: Path, sheet_cache: dict) -> bool:
+    text = page.read_text(encoding="utf-8")
+    if "data-critical" in text:
+        return False
+
+    links = []
+    for m in LINK_RE.finditer(text):
+        attrs = link_attrs(m.group(0))
+        if attrs.get("rel", "").lower() != "stylesheet" or attrs.get("media", "all") not in ("all", "screen"):
+            continue
+        sheet = local_stylesheet(attrs.get("href"), page, root)
+        if sheet:
+            links.append((m, attrs, sheet))
+    if not links:
+        return False
+
+    soup = BeautifulSoup(text, "html.parser")
+    page_usage = usage_from_soup(soup.find_all(True))
+    atf_usage = usage_from_soup(above_the_fold(soup))
+
+    critical = []
+    for _, _, sheet in links:
+        if sheet not in sheet_cache:
+            sheet_cache[sheet] = screen_rules(parse_css(sheet.read_text(encoding="utf-8", errors="ignore")))
+        critical.append(serialize(filter_rules(sheet_cache[sheet], page_usage, atf_usage, keep_opaque=False)))
+    css = "".join(critical)
+
+    # Reemplazar de atrás hacia adelante para no invalidar las posiciones
+    for m, attrs, _ in reversed(links):
+        text = text[:m.start()] + defer_link(m.group(0), attrs) + text[m.end():]
+    first = links[0][0]
+    indent = first.group(0)[: len(first.group(0)) - len(first.group(0).lstrip())]
+    text = text[:first.start()] + f"{indent}<style data-critical>{css}</style>\n" + text[first.start():]
+
+    atomic_write_text(page, text)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSS crítico inline y hojas asíncronas en dist/.")
+    parser.add_argument("--dist", type=Path, default=DIST_DIR, help="directorio de build")
+    args = parser.parse_args()
+
+    root = args.dist.resolve()
+    if not root.exists():
+        print("❌ No existe dist/. Corré antes: python scripts/inject_head_partial.py --build")
+        return
+
+    sheet_cache = {}
+    updated = 0
+    for page in sorted(root.rglob("*.html")):
+        if page.relative_to(root).parts[0] == "partials":
+            continue
+        if process_page(page, root, sheet_cache):
+            updated += 1
+    print(f"✨ CSS crítico inlineado en {updated} páginas.")
+
+
+if __name__ == "__main__":
+    main()
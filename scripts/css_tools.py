@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser y minificador de CSS mínimo, sin dependencias, para los scripts de
+build (CSS crítico, purga de selectores). No valida: solo separa reglas,
+bloques @media/@supports y declaraciones, y decide si un selector puede
+aplicar dado el conjunto de tags/clases/ids que usa el HTML.
+"""
+import re
+from typing import NamedTuple, Optional
+
+# At-rules cuyo bloque contiene otras reglas
+NESTED_AT_RULES = ("@media", "@supports", "@document", "@-moz-document", "@layer", "@container")
+
+COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+PSEUDO_RE = re.compile(r"::?[\w-]+(?:\((?:[^()]|\([^()]*\))*\))?")
+ATTR_RE = re.compile(r"\[\s*([\w-]+)[^\]]*\]")
+CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+ID_RE = re.compile(r"#(-?[_a-zA-Z][\w-]*)")
+TAG_RE = re.compile(r"^(-?[_a-zA-Z][\w-]*|\*)")
+COMBINATOR_RE = re.compile(r"\s*[>+~]\s*|\s+")
+# Selectores que siempre se conservan (elementos que existen en toda página)
+ALWAYS_TAGS = {"html", "body", "*", ":root"}
+
+
+class StyleRule(NamedTuple):
+    selectors: list
+    body: str
+
+
+class AtRule(NamedTuple):
+    prelude: str
+    # Reglas hijas (@media...) o None si el bloque es opaco (@font-face, @keyframes)
+    children: Optional[list]
+    body: Optional[str]
+
+
+class UsageIndex(NamedTuple):
+    tags: set
+    classes: set
+    ids: set
+    attrs: set
+
+
+def _scan_block(text: str, start: int) -> int:
+    """Índice del '}' que cierra el bloque abierto en `start - 1`, respetando strings."""
+    depth = 1
+    i = start
+    quote = None
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if c == "\\":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(text)
+
+
+def _find_prelude_end(text: str, start: int) -> int:
+    """Posición del primer '{' o ';' fuera de strings y paréntesis, o -1."""
+    depth = 0
+    quote = None
+    for i in range(start, len(text)):
+        c = text[i]
+        if quote:
+            if c == "\\":
+                continue
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif depth == 0 and c in "{;":
+            return i
+    return -1
+
+
+def split_top_level(text: str, sep: str = ",") -> list[str]:
+    """Separa por `sep` ignorando lo que está entre paréntesis, corchetes o comillas."""
+    parts, depth, quote, current = [], 0, None, []
+    for c in text:
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == sep and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(c)
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def parse_css(text: str) -> list:
+    """Convierte una hoja de estilos en una lista de StyleRule/AtRule."""
+    text = COMMENT_RE.sub("", text)
+    rules = []
+    i = 0
+    while i < len(text):
+        end = _find_prelude_end(text, i)
+        if end == -1:
+            break
+        prelude = text[i:end].strip()
+        if text[end] == ";":
+            # @import / @charset / @namespace
+            if prelude.startswith("@"):
+                rules.append(AtRule(prelude, None, None))
+            i = end + 1
+            continue
+        brace = end
+        close = _scan_block(text, brace + 1)
+        body = text[brace + 1:close]
+        if prelude.startswith("@"):
+            if prelude.lower().startswith(NESTED_AT_RULES):
+                rules.append(AtRule(prelude, parse_css(body), None))
+            else:
+                rules.append(AtRule(prelude, None, body))
+        elif prelude:
+            rules.append(StyleRule(split_top_level(prelude), body))
+        i = close + 1
+    return rules
+
+
+def _protect_strings(text: str):
+    strings = []
+
+    def keep(m):
+        strings.append(m.group(0))
+        return f"\0{len(strings) - 1}\0"
+
+    return re.sub(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'", keep, text), strings
+
+
+def _restore_strings(text: str, strings) -> str:
+    return re.sub(r"\0(\d+)\0", lambda m: strings[int(m.group(1))], text)
+
+
+def minify_declarations(body: str) -> str:
+    body, strings = _protect_strings(body)
+    body = re.sub(r"\s+", " ", body).strip()
+    body = re.sub(r"\s*([;:,{}])\s*", r"\1", body)
+    body = re.sub(r"\s*!\s*important", "!important", body)
+    # calc() necesita los espacios alrededor de + y -, que no tocamos
+    return _restore_strings(body.strip(";"), strings)
+
+
+def minify_selector(selector: str) -> str:
+    selector, strings = _protect_strings(selector)
+    selector = re.sub(r"\s+", " ", selector).strip()
+    selector = re.sub(r"\s*([>+~,])\s*", r"\1", selector)
+    return _restore_strings(selector, strings)
+
+
+def serialize(rules, minify: bool = True) -> str:
+    """Vuelve a escribir las reglas como CSS (minificado por defecto)."""
+    out = []
+    nl = "" if minify else "\n"
+    for rule in rules:
+        if isinstance(rule, StyleRule):
+            sel = ",".join(minify_selector(s) for s in rule.selectors) if minify else ", ".join(rule.selectors)
+            body = minify_declarations(rule.body) if minify else rule.body.strip()
+            out.append(f"{sel}{{{body}}}")
+        elif rule.children is not None:
+            inner = serialize(rule.children, minify)
+            if inner:
+                out.append(f"{minify_selector(rule.prelude) if minify else rule.prelude}{{{nl}{inner}{nl}}}")
+        elif rule.body is not None:
+            body = minify_declarations(rule.body) if minify else rule.body.strip()
+            if rule.prelude.lower().startswith(("@keyframes", "@-webkit-keyframes")) and minify:
+                body = minify_keyframes(rule.body)
+            out.append(f"{rule.prelude}{{{body}}}")
+        else:
+            out.append(f"{rule.prelude};")
+    return nl.join(out)
+
+
+def minify_keyframes(body: str) -> str:
+    return "".join(
+        f"{minify_selector(','.join(r.selectors))}{{{minify_declarations(r.body)}}}"
+        for r in parse_css(body) if isinstance(r, StyleRule)
+    )
+
+
+def compound_parts(selector: str) -> list[str]:
+    """'.nav > a.active:hover' -> ['.nav', 'a.active'] (sin pseudo-clases)."""
+    selector = PSEUDO_RE.sub("", selector)
+    return [p for p in COMBINATOR_RE.split(selector.strip()) if p]
+
+
+def compound_tokens(compound: str):
+    """Tags, clases, ids y atributos que exige un selector compuesto."""
+    tag = TAG_RE.match(compound)
+    attrs = set(ATTR_RE.findall(compound))
+    plain = ATTR_RE.sub("", compound)
+    return (
+        {tag.group(1).lower()} - {"*"} if tag else set(),
+        set(CLASS_RE.findall(plain)),
+        set(ID_RE.findall(plain)),
+        attrs,
+    )
+
+
+def compound_matches(compound: str, usage: UsageIndex) -> bool:
+    tags, classes, ids, attrs = compound_tokens(compound)
+    return tags <= usage.tags and classes <= usage.classes and ids <= usage.ids and attrs <= usage.attrs
+
+
+def selector_used(selector: str, usage: UsageIndex, key_usage: UsageIndex = None) -> bool:
+    """
+    True si cada parte del selector puede aplicar con lo que usa el HTML.
+    `key_usage` restringe la última parte (el elemento estilado), por ejemplo
+    a lo que está por encima del pliegue.
+    """
+    parts = compound_parts(selector)
+    if not parts:
+        # Solo pseudo-elementos/clases (::selection, :root)
+        return True
+    *ancestors, key = parts
+    if not all(compound_matches(p, usage) for p in ancestors):
+        return False
+    if key.lower() in ALWAYS_TAGS:
+        return True
+    return compound_matches(key, key_usage or usage)
+
+
+def filter_rules(rules, usage: UsageIndex, key_usage: UsageIndex = None, keep_opaque: bool = True) -> list:
+    """
+    Conserva solo los selectores usados. `keep_opaque` decide si se mantienen
+    @font-face, @keyframes e @import.
+    """
+    kept = []
+    for rule in rules:
+        if isinstance(rule, StyleRule):
+            selectors = [s for s in rule.selectors if selector_used(s, usage, key_usage)]
+            if selectors:
+                kept.append(StyleRule(selectors, rule.body))
+        elif rule.children is not None:
+            children = filter_rules(rule.children, usage, key_usage, keep_opaque)
+            if children:
+                kept.append(AtRule(rule.prelude, children, None))
+        elif keep_opaque:
+            kept.append(rule)
+    return kept
+
+
+def usage_from_soup(elements) -> UsageIndex:
+    """Arma un UsageIndex a partir de tags de BeautifulSoup."""
+    usage = UsageIndex(set(), set(), set(), set())
+    for el in elements:
+        if not getattr(el, "name", None):
+            continue
+        usage.tags.add(el.name.lower())
+        usage.classes.update(el.get("class", []))
+        if el.get("id"):
+            usage.ids.add(el["id"])
+        usage.attrs.update(el.attrs.keys())
+    return usage
+
+
+def merge_usage(*indexes) -> UsageIndex:
+    merged = UsageIndex(set(), set(), set(), set())
+    for idx in indexes:
+        for mine, theirs in zip(merged, idx):
+            mine.update(theirs)
+    return merged
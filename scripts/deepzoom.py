@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pirámides de tiles (formato DeepZoom) para planos y planimetrías: en lugar
+de bajar el plano entero, la página muestra una vista previa liviana y
+js/deepzoom.js pide solo los tiles visibles del nivel que hace falta al
+hacer zoom.
+
+Por cada plano de PLANS se genera img/tiles/<nombre>-<hash>/:
+- <nivel>/<col>_<fila>.webp: tiles de TILE_SIZE px con TILE_OVERLAP px de
+  solapamiento; el nivel máximo es la imagen original y cada nivel anterior
+  la mitad (redondeando hacia arriba), hasta 1×1.
+- info.json: dimensiones, tamaño de tile, solapamiento y nivel máximo.
+- preview.webp: el nivel más grande que no supera PREVIEW_WIDTH px.
+El directorio lleva el hash del plano, así que se puede cachear como
+inmutable (fingerprint_assets.py no lo renombra). Los niveles se generan en
+paralelo y .cache/deepzoom-manifest.json evita regenerar los que no cambiaron.
+
+La transformación deepzoom_viewer apunta el <img> del plano a la vista
+previa (el original queda en data-full) y agrega el include del visor.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_common import (
+    IMG_DIR,
+    PARTIALS_DIR,
+    ROOT,
+    TILES_DIR,
+    atomic_write_text,
+    default_workers,
+    file_digest,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+from html_pipeline import run_pipeline, transform
+
+PLANS = [
+    "PLANIMETRIA COMERCIAL INTROVA2.webp",
+    "planimetria-introva.webp",
+    "Planta alta limpia.webp",
+    "Planta baja REEMPLAZAR.webp",
+]
+TILE_SIZE = 256
+TILE_OVERLAP = 1
+# Líneas finas sobre fondo liso: con menos calidad se nota el ringing
+TILE_QUALITY = 85
+PREVIEW_WIDTH = 640
+MANIFEST = "deepzoom-manifest.json"
+VIEWER_PARTIAL = PARTIALS_DIR / "deepzoom-viewer.html"
+HASH_LEN = 8
+
+_cache = None
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", Path(name).stem.lower()).strip("-")
+
+
+def max_level(width: int, height: int) -> int:
+    return math.ceil(math.log2(max(width, height)))
+
+
+def level_size(width: int, height: int, level: int) -> tuple[int, int]:
+    scale = 2 ** (max_level(width, height) - level)
+    return math.ceil(width / scale), math.ceil(height / scale)
+
+
+def tile_box(col: int, row: int, size: tuple[int, int]) -> tuple[int, int, int, int]:
+    """Recorte del tile (col, fila) de un nivel, solapamiento incluido."""
+    left = col * TILE_SIZE - (TILE_OVERLAP if col else 0)
+    top = row * TILE_SIZE - (TILE_OVERLAP if row else 0)
+    right = min(size[0], (col + 1) * TILE_SIZE + TILE_OVERLAP)
+    bottom = min(size[1], (row + 1) * TILE_SIZE + TILE_OVERLAP)
+    return left, top, right, bottom
+
+
+def _level_image(img, level: int):
+    factor = 2 ** (max_level(*img.size) - level)
+    # reduce() redondea hacia arriba, igual que los niveles DeepZoom
+    return img if factor == 1 else img.reduce(factor)
+
+
+def make_level(src: Path, out_dir: Path, level: int) -> int:
+    """Corta los tiles de un nivel (se ejecuta en un proceso del pool)."""
+    from PIL import Image
+
+    with Image.open(src) as img:
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        scaled = _level_image(img, level)
+        level_dir = out_dir / str(level)
+        level_dir.mkdir(parents=True, exist_ok=True)
+        cols = math.ceil(scaled.width / TILE_SIZE)
+        rows = math.ceil(scaled.height / TILE_SIZE)
+        for col in range(cols):
+            for row in range(rows):
+                tile = scaled.crop(tile_box(col, row, scaled.size))
+                tile.save(level_dir / f"{col}_{row}.webp", "WEBP", quality=TILE_QUALITY, method=6)
+        if level == preview_level(*img.size):
+            scaled.save(out_dir / "preview.webp", "WEBP", quality=TILE_QUALITY, method=6)
+    return cols * rows
+
+
+def preview_level(width: int, height: int) -> int:
+    top = max_level(width, height)
+    return next(lv for lv in range(top, -1, -1) if level_size(width, height, lv)[0] <= PREVIEW_WIDTH)
+
+
+def tile_plan(src: Path, digest: str, workers: int) -> dict:
+    """Genera la pirámide completa de `src`; devuelve la entrada del manifiesto."""
+    from PIL import Image
+
+    with Image.open(src) as img:
+        width, height = img.size
+    out_dir = TILES_DIR / f"{slug(src.name)}-{digest[:HASH_LEN]}"
+    # Se arma en un directorio temporal y se renombra al final: nunca queda una pirámide a medias
+    tmp_dir = out_dir.with_name(f".{out_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    levels = range(max_level(width, height) + 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tiles = sum(pool.map(make_level, [src] * len(levels), [tmp_dir] * len(levels), levels))
+    preview = level_size(width, height, preview_level(width, height))
+    info = {
+        "width": width,
+        "height": height,
+        "tileSize": TILE_SIZE,
+        "overlap": TILE_OVERLAP,
+        "maxLevel": max_level(width, height),
+        "format": "webp",
+        "preview": {"src": "preview.webp", "width": preview[0], "height": preview[1]},
+    }
+    atomic_write_text(tmp_dir / "info.json", json.dumps(info, indent=2))
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return {
+        "sha256": digest,
+        "stat": stat_key(src),
+        "dir": out_dir.relative_to(ROOT).as_posix(),
+        "tiles": tiles,
+    }
+
+
+def intact(entry: dict) -> bool:
+    """Si la pirámide del manifiesto sigue completa en disco (info.json, vista previa y todos los tiles)."""
+    out_dir = ROOT / entry.get("dir", "-")
+    if not (out_dir / "info.json").is_file() or not (out_dir / "preview.webp").is_file():
+        return False
+    return sum(1 for _ in out_dir.glob("*/*.webp")) == entry.get("tiles")
+
+
+def generate(workers: int = None, force: bool = False) -> int:
+    """Genera las pirámides que faltan o cambiaron y borra las viejas; devuelve cuántas generó."""
+    global _cache
+    manifest = load_manifest(MANIFEST)
+    generated = 0
+    for name in PLANS:
+        src = IMG_DIR / name
+        if not src.is_file():
+            manifest.pop(name, None)
+            continue
+        entry = manifest.get(name, {})
+        digest = entry.get("sha256") if entry.get("stat") == stat_key(src) else file_digest(src)
+        # Si faltan tiles (borrados a mano, por ejemplo) se regenera la pirámide entera
+        fresh = entry.get("sha256") == digest and intact(entry)
+        if fresh and not force:
+            entry["stat"] = stat_key(src)
+            continue
+        manifest[name] = tile_plan(src, digest, workers or default_workers())
+        generated += 1
+        print(f"  ✓ {name} → {manifest[name]['dir']} ({manifest[name]['tiles']} tiles)")
+
+    # Pirámides de versiones anteriores o de planos que ya no están en PLANS
+    current = {Path(e["dir"]).name for e in manifest.values()}
+    if TILES_DIR.is_dir():
+        for old in TILES_DIR.iterdir():
+            if old.is_dir() and old.name not in current:
+                shutil.rmtree(old)
+    save_manifest(MANIFEST, manifest)
+    _cache = manifest
+    return generated
+
+
+def _manifest() -> dict:
+    global _cache
+    if _cache is None:
+        _cache = load_manifest(MANIFEST)
+    return _cache
+
+
+def _url(target: Path, page: Path) -> str:
+    rel = Path(os.path.relpath(target, page.parent)).as_posix()
+    return rel if rel.startswith("../") else f"./{rel}"
+
+
+@transform("deepzoom_viewer", scope="pages", prepare=generate)
+def deepzoom_viewer(soup, ctx):
+    from inject_head_partial import resolve_partial
+
+    modified = False
+    viewers = 0
+    for img in soup.find_all("img"):
+        original = img.get("data-full") or img.get("src")
+        if not original:
+            continue
+        path = resolve_partial(original, ctx.path)
+        if not path.is_relative_to(IMG_DIR) or path.parent != IMG_DIR:
+            continue
+        entry = _manifest().get(path.name)
+        if entry is None or not (ROOT / entry["dir"] / "info.json").is_file():
+            if img.has_attr("data-deepzoom"):
+                # Plano que dejó de tener tiles: vuelve a la imagen original
+                img["src"] = img["data-full"]
+                del img["data-full"], img["data-deepzoom"]
+                modified = True
+            continue
+        tiles = ROOT / entry["dir"]
+        attrs = {
+            "src": _url(tiles / "preview.webp", ctx.path),
+            "data-full": original,
+            "data-deepzoom": _url(tiles / "info.json", ctx.path),
+        }
+        for key in ("srcset", "sizes"):
+            # La vista previa reemplaza a las variantes responsive del original
+            if img.has_attr(key):
+                del img[key]
+                modified = True
+        if any(img.get(k) != v for k, v in attrs.items()):
+            img.attrs.update(attrs)
+            modified = True
+        viewers += 1
+
+    include = _url(VIEWER_PARTIAL, ctx.path)
+    existing = soup.find(attrs={"data-include": re.compile(r"deepzoom-viewer\.html$")})
+    if viewers and existing is None:
+        first = soup.find("img", attrs={"data-deepzoom": True})
+        first.insert_after(soup.new_tag("div", attrs={"data-include": include}))
+        modified = True
+    elif not viewers and existing is not None:
+        existing.decompose()
+        modified = True
+    return modified
+
+
+TRANSFORMS = ["deepzoom_viewer"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pirámides de tiles DeepZoom para los planos.")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--force", action="store_true", help="regenerar todas las pirámides")
+    parser.add_argument("--skip-rewrite", action="store_true", help="solo generar los tiles, sin tocar el HTML")
+    args = parser.parse_args()
+
+    print("🗺  Generando tiles de planos...")
+    count = generate(args.workers, args.force)
+    print(f"   {count} pirámides generadas")
+    if not args.skip_rewrite:
+        # El prepare del pipeline vuelve a llamar a generate(): con el manifest al día no hace nada
+        run_pipeline(TRANSFORMS, workers=args.workers)
+
+
+if __name__ == "__main__":
+    import deepzoom
+
+    deepzoom.main()
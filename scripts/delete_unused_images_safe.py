@@ -4,69 +4,17 @@
 Script para borrar SOLO las imágenes que realmente no se usan.
 Usa el reporte generado por find_unused_images_safe.py
 """
-import re
-import urllib.parse
-from pathlib import Path
-
-ROOT = Path(__file__).resolve().parent.parent
-IMG_DIR = ROOT / "img"
-
-def normalize_filename(filename):
-    """Normaliza el nombre del archivo para comparación."""
-    try:
-        filename = urllib.parse.unquote(filename)
-    except:
-        pass
-    filename = filename.lower().strip()
-    filename = re.sub(r'\s+', ' ', filename)
-    return filename
-
-def collect_image_references():
-    """Recopila todas las referencias a imágenes."""
-    references = set()
-    
-    patterns = [
-        r'(?:src|href|data-src|data-bg|background-image)\s*=\s*["\']?(?:\.\/)?img\/([^"\')\s?#]+)',
-        r'url\(["\']?(?:\.\/)?img\/([^"\')\s?#]+)',
-        r'background[^:]*:\s*url\(["\']?(?:\.\/)?img\/([^"\')\s?#]+)',
-        r'(?:\.\/)?img\/([^\s<>"\')\[\]{}]+\.(?:jpg|jpeg|png|gif|webp|svg|ico|mp4))',
-    ]
-    
-    for file_path in ROOT.rglob("*"):
-        if file_path.is_file() and file_path.suffix.lower() in {".html", ".css", ".js"}:
-            try:
-                content = file_path.read_text(encoding='utf-8', errors='ignore')
-                for pattern in patterns:
-                    for match in re.finditer(pattern, content, re.IGNORECASE):
-                        img_ref = match.group(1)
-                        if img_ref:
-                            img_ref = img_ref.split('?')[0].split('#')[0].strip()
-                            normalized = normalize_filename(img_ref)
-                            if normalized:
-                                references.add(normalized)
-            except Exception:
-                pass
-    
-    return references
+from ref_index import IMG_DIR, find_unused
 
 def main():
     print("🔍 Verificando imágenes no usadas...")
     
-    references = collect_image_references()
-    unused_images = []
-    
     if not IMG_DIR.exists():
         print("❌ La carpeta img no existe.")
         return
-    
-    for img_path in IMG_DIR.rglob("*"):
-        if img_path.is_file() and img_path.suffix.lower() in {".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".mp4"}:
-            rel_path = img_path.relative_to(IMG_DIR).as_posix()
-            normalized = normalize_filename(rel_path)
-            
-            if normalized not in references:
-                unused_images.append(img_path)
-    
+
+    unused_images = find_unused()
+
     if not unused_images:
         print("✅ Todas las imágenes están en uso. No hay nada que borrar.")
         return
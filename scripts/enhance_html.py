@@ -1,48 +1,45 @@
 """Automatiza mejoras SEO/Accessibility/Performance en HTML
 - Añade meta description si está vacío
-- Cambia main.css por main.min.css
 - Agrega defer a scripts no críticos
 - Añade alt y dimensiones a <img>
-- Añade loading=lazy a imágenes no del header
+  (loading/fetchpriority los decide lcp_priority.py según el pliegue)
 - Normaliza <video> tags para evitar CLS
 - Envuelve contenido principal con <main>
+
+Cada mejora es una transformación del pipeline (html_pipeline.py).
 """
 import re
 from pathlib import Path
-from bs4 import BeautifulSoup
-from PIL import Image
-
-WORKSPACE = Path(r"c:/Users/facun/Desktop/denovo-web")
-html_files = list(WORKSPACE.glob("**/*.html"))
-
-for file_path in html_files:
-    # skip partials
-    if 'partials' in str(file_path):
-        continue
-    with open(file_path, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f, 'html.parser')
-    modified = False
 
-    # meta description
+from build_common import ROOT
+from image_dims import image_size, warm_cache
+from html_pipeline import run_pipeline, transform
+
+WORKSPACE = ROOT
+DEFAULT_DESCRIPTION = 'Empresa constructora y desarrolladora con enfoque sostenible.'
+
+
+@transform("meta_description", scope="pages")
+def meta_description(soup, ctx):
     desc = soup.find('meta', attrs={'name': 'description'})
     if desc:
         if not desc.get('content') or desc['content'].strip()=='':
-            desc['content'] = 'Empresa constructora y desarrolladora con enfoque sostenible.'
-            modified = True
-    else:
-        new_meta = soup.new_tag('meta', charset=None)
-        new_meta.attrs['name'] = 'description'
-        new_meta.attrs['content'] = 'Empresa constructora y desarrolladora con enfoque sostenible.'
-        soup.head.append(new_meta)
-        modified = True
-
-    # replace CSS link
-    for link in soup.find_all('link', href=True):
-        if 'main.css' in link['href'] and not 'min.css' in link['href']:
-            link['href'] = link['href'].replace('main.css', 'main.min.css')
-            modified = True
+            desc['content'] = DEFAULT_DESCRIPTION
+            return True
+        return False
+    if soup.head is None:
+        return False
+    new_meta = soup.new_tag('meta', charset=None)
+    new_meta.attrs['name'] = 'description'
+    new_meta.attrs['content'] = DEFAULT_DESCRIPTION
+    soup.head.append(new_meta)
+    return True
+
 
+@transform("defer_scripts", scope="pages")
+def defer_scripts(soup, ctx):
     # add defer to scripts except gtag and head-loader
+    modified = False
     for script in soup.find_all('script', src=True):
         src = script['src']
         if 'gtag' in src or 'google-analytics' in src:
@@ -50,32 +47,40 @@ for file_path in html_files:
         if not script.has_attr('defer'):
             script['defer'] = True
             modified = True
+    return modified
+
 
+@transform("wrap_main", scope="pages")
+def wrap_main(soup, ctx):
     # ensure <main> surrounds primary sections (simple heuristic)
     body = soup.body
-    if body and not soup.find('main'):
-        # create main tag and move most children except nav/footer includes
-        new_main = soup.new_tag('main')
-        to_move = []
-        for child in list(body.children):
-            # skip whitespace and comments
-            if child.name is None:
-                continue
-            # skip nav/footer includes
-            if child.get('data-include') and ('nav.html' in child['data-include'] or 'footer.html' in child['data-include']):
-                continue
-            to_move.append(child)
-        for item in to_move:
-            new_main.append(item.extract())
-        # insert before footer include if exists, else at end
-        footer_div = body.find(lambda tag: tag.get('data-include') and 'footer.html' in tag['data-include'])
-        if footer_div:
-            footer_div.insert_before(new_main)
-        else:
-            body.append(new_main)
-        modified = True
-
-    # process img tags
+    if not body or soup.find('main'):
+        return False
+    # create main tag and move most children except nav/footer includes
+    new_main = soup.new_tag('main')
+    to_move = []
+    for child in list(body.children):
+        # skip whitespace and comments
+        if child.name is None:
+            continue
+        # skip nav/footer includes
+        if child.get('data-include') and ('nav.html' in child['data-include'] or 'footer.html' in child['data-include']):
+            continue
+        to_move.append(child)
+    for item in to_move:
+        new_main.append(item.extract())
+    # insert before footer include if exists, else at end
+    footer_div = body.find(lambda tag: tag.get('data-include') and 'footer.html' in tag['data-include'])
+    if footer_div:
+        footer_div.insert_before(new_main)
+    else:
+        body.append(new_main)
+    return True
+
+
+@transform("img_alt_dims", scope="pages", prepare=warm_cache)
+def img_alt_dims(soup, ctx):
+    modified = False
     for img in soup.find_all('img'):
         if not img.has_attr('alt'):
             # derive alt from filename or leave empty
@@ -83,26 +88,23 @@ for file_path in html_files:
             fname = re.sub(r"\.[^.]+$", "", fname)
             img['alt'] = fname.replace('-', ' ').replace('_', ' ')
             modified = True
-        # add loading lazy for non-decorative images
-        if not img.has_attr('loading'):
-            img['loading'] = 'lazy'
-            modified = True
         # add width/height if possible
         src = img.get('src','')
         if src and not img.has_attr('width') and not img.has_attr('height'):
             # resolve path
             path = WORKSPACE / src.lstrip('./').lstrip('/')
-            if path.exists():
-                try:
-                    with Image.open(path) as im:
-                        w,h = im.size
-                        img['width'] = str(w)
-                        img['height'] = str(h)
-                        modified = True
-                except Exception:
-                    pass
-
-    # process video tags
+            size = image_size(path)
+            if size:
+                w,h = size
+                img['width'] = str(w)
+                img['height'] = str(h)
+                modified = True
+    return modified
+
+
+@transform("video_normalize", scope="pages")
+def video_normalize(soup, ctx):
+    modified = False
     for video in soup.find_all('video'):
         # remove width/height attributes with percents
         if video.has_attr('width'):
@@ -119,9 +121,11 @@ for file_path in html_files:
         if not video.has_attr('playsinline'):
             video['playsinline'] = ''
             modified = True
+    return modified
+
+
+TRANSFORMS = ["meta_description", "defer_scripts", "wrap_main", "img_alt_dims", "video_normalize"]
+
 
-    # write back if changed
-    if modified:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
-        print("Modified", file_path)
+if __name__ == '__main__':
+    run_pipeline(TRANSFORMS)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Encuentra imágenes casi duplicadas en img/ (re-exportaciones de la misma
+foto: copias "-min", versiones recortadas o recomprimidas).
+Solo lista, NO borra ni reescribe nada.
+
+Cada imagen se resume con dos hashes perceptuales de 64 bits:
+- dHash: gradiente horizontal de la imagen reducida a 9×8 en grises.
+- pHash: signo de los coeficientes de baja frecuencia de la DCT 32×32.
+Se calculan en paralelo y se cachean en .cache/phash-manifest.json. Las
+distancias de Hamming entre todos los pares salen de una sola operación
+vectorizada de NumPy; dos imágenes son casi duplicadas si ambas distancias
+quedan por debajo del umbral. Los pares se agrupan por componentes conexas.
+
+Para cada grupo se propone conservar la más referenciada (y, a igualdad, la
+de más resolución) y se informa el impacto de unificar: MB liberados y
+referencias a reescribir según el índice de ref_index.py.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from build_common import (
+    IMG_DIR,
+    ROOT,
+    default_workers,
+    file_digest,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+from ref_index import collect_references, referrers
+
+MANIFEST = "phash-manifest.json"
+HASH_VERSION = 1
+# AVIF y las variantes de img/responsive se derivan de estas
+HASH_EXTENSIONS = {".webp", ".jpg", ".jpeg", ".png", ".gif"}
+# Con 10 ya aparecen retratos distintos del equipo sobre el mismo fondo
+DHASH_THRESHOLD = 8
+PHASH_THRESHOLD = 8
+PHASH_SIZE = 32
+HASH_BITS = 8
+
+
+def _dct_matrix(n: int):
+    """Matriz de la DCT-II ortonormal de n puntos."""
+    import numpy as np
+
+    k = np.arange(n)[:, None]
+    m = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+
+def _bits_to_int(bits) -> int:
+    return int("".join("1" if b else "0" for b in bits.ravel()), 2)
+
+
+def perceptual_hashes(path: Path) -> tuple[int, int, int]:
+    """(dHash, pHash, píxeles) de una imagen (se ejecuta en un proceso del pool)."""
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as img:
+        pixels = img.width * img.height
+        img.draft("L", (PHASH_SIZE * 4, PHASH_SIZE * 4))
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        gray = img.convert("L")
+        small = np.asarray(gray.resize((HASH_BITS + 1, HASH_BITS), Image.LANCZOS), dtype=np.float64)
+        block = np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS), dtype=np.float64)
+
+    dhash = _bits_to_int(small[:, 1:] > small[:, :-1])
+    dct = _dct_matrix(PHASH_SIZE)
+    low = (dct @ block @ dct.T)[:HASH_BITS, :HASH_BITS]
+    # El coeficiente DC (brillo medio) no aporta a la forma
+    phash = _bits_to_int(low > np.median(low.ravel()[1:]))
+    return dhash, phash, pixels
+
+
+def hash_all(workers: int, force: bool = False) -> dict:
+    """{nombre: entrada del manifiesto} para todas las imágenes de img/."""
+    manifest = load_manifest(MANIFEST)
+    if manifest.get("version") != HASH_VERSION:
+        manifest = {"version": HASH_VERSION, "images": {}}
+    entries = manifest["images"]
+    paths = sorted(p for p in IMG_DIR.iterdir() if p.is_file() and p.suffix.lower() in HASH_EXTENSIONS)
+
+    pending = []
+    for path in paths:
+        entry = entries.get(path.name, {})
+        digest = entry.get("sha256") if entry.get("stat") == stat_key(path) else file_digest(path)
+        if force or entry.get("sha256") != digest:
+            pending.append((path, digest))
+        elif entry.get("stat") != stat_key(path):
+            entry["stat"] = stat_key(path)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(perceptual_hashes, path): (path, digest) for path, digest in pending}
+        for future in as_completed(futures):
+            path, digest = futures[future]
+            try:
+                dhash, phash, pixels = future.result()
+            except Exception as e:
+                print(f"  ✗ {path.name}: {e}")
+                continue
+            entries[path.name] = {
+                "sha256": digest,
+                "stat": stat_key(path),
+                "dhash": f"{dhash:016x}",
+                "phash": f"{phash:016x}",
+                "pixels": pixels,
+            }
+
+    current = {p.name for p in paths}
+    manifest["images"] = {name: e for name, e in entries.items() if name in current}
+    save_manifest(MANIFEST, manifest)
+    print(f"  {len(pending)} hasheadas, {len(paths) - len(pending)} desde la caché")
+    return manifest["images"]
+
+
+def hamming_matrix(hashes):
+    """Distancias de Hamming entre todos los pares de una lista de hashes de 64 bits."""
+    import numpy as np
+
+    h = np.array(hashes, dtype=np.uint64)
+    return np.bitwise_count(h[:, None] ^ h[None, :])
+
+
+def find_groups(entries: dict, dhash_max: int, phash_max: int) -> list[list[tuple]]:
+    """Grupos de casi duplicados: [[(nombre, dist_dhash, dist_phash) respecto del primero], ...]."""
+    import numpy as np
+
+    names = sorted(entries)
+    if len(names) < 2:
+        return []
+    dist_d = hamming_matrix([int(entries[n]["dhash"], 16) for n in names])
+    dist_p = hamming_matrix([int(entries[n]["phash"], 16) for n in names])
+    close = (dist_d <= dhash_max) & (dist_p <= phash_max)
+    np.fill_diagonal(close, False)
+
+    # Componentes conexas (union-find sobre los pares cercanos)
+    parent = list(range(len(names)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(close))):
+        parent[root(i)] = root(j)
+
+    members = {}
+    for i in range(len(names)):
+        members.setdefault(root(i), []).append(i)
+    groups = []
+    for idx in members.values():
+        if len(idx) < 2:
+            continue
+        first = idx[0]
+        groups.append([(names[i], int(dist_d[first, i]), int(dist_p[first, i])) for i in idx])
+    return groups
+
+
+def plan_merge(group, entries: dict, references: dict) -> dict:
+    """Qué imagen conservar y cuánto cuesta unificar el resto en ella."""
+    def rank(item):
+        name = item[0]
+        return (len(referrers(references, name)), entries[name]["pixels"], -len(name))
+
+    keep = max(group, key=rank)[0]
+    drop = [name for name, *_ in group if name != keep]
+    files = sorted({f for name in drop for f in referrers(references, name)})
+    refs = sum(len(referrers(references, name)) for name in drop)
+    freed = sum((IMG_DIR / name).stat().st_size for name in drop)
+    return {"keep": keep, "drop": drop, "files": files, "refs": refs, "freed": freed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista imágenes casi duplicadas de img/ (no borra nada).")
+    parser.add_argument("--dhash", type=int, default=DHASH_THRESHOLD, help="distancia máxima de dHash (0-64)")
+    parser.add_argument("--phash", type=int, default=PHASH_THRESHOLD, help="distancia máxima de pHash (0-64)")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--force", action="store_true", help="recalcular todos los hashes")
+    args = parser.parse_args()
+
+    print(f"🔍 Calculando hashes perceptuales de {IMG_DIR.relative_to(ROOT)}/...")
+    entries = hash_all(args.workers, args.force)
+    print("📚 Indexando referencias...")
+    references = collect_references()
+
+    groups = find_groups(entries, args.dhash, args.phash)
+    plans = [(group, plan_merge(group, entries, references)) for group in groups]
+    plans.sort(key=lambda gp: gp[1]["freed"], reverse=True)
+
+    total_freed = total_refs = 0
+    touched = set()
+    lines = []
+    for group, plan in plans:
+        distances = {name: (d, p) for name, d, p in group}
+        lines.append(f"\n  ✓ {plan['keep']} ({len(referrers(references, plan['keep']))} refs)")
+        for name in plan["drop"]:
+            d, p = distances[name]
+            size = (IMG_DIR / name).stat().st_size / 1024
+            lines.append(f"    ✗ {name}: dHash {d}, pHash {p}, {size:.0f} KB, "
+                         f"{len(referrers(references, name))} refs")
+        total_freed += plan["freed"]
+        total_refs += plan["refs"]
+        touched.update(plan["files"])
+
+    print(f"\n🧬 Grupos de casi duplicados ({len(plans)}):")
+    print("\n".join(lines) if lines else "  ¡No hay duplicados!")
+    summary = (f"\n📊 Unificando cada grupo en la imagen marcada con ✓ se liberan "
+               f"{total_freed / 1024 / 1024:.1f} MB y hay que reescribir {total_refs} "
+               f"referencias en {len(touched)} archivos.")
+    print(summary)
+
+    report_file = ROOT / "duplicate_images_report.txt"
+    with open(report_file, "w", encoding="utf-8") as f:
+        f.write("REPORTE DE IMÁGENES CASI DUPLICADAS\n")
+        f.write("=" * 50 + "\n")
+        f.write(f"Umbrales: dHash <= {args.dhash}, pHash <= {args.phash}\n")
+        f.write("\n".join(lines) + "\n")
+        f.write(summary.replace("📊 ", "") + "\n")
+        if touched:
+            f.write("\nARCHIVOS A REESCRIBIR:\n")
+            f.write("-" * 50 + "\n")
+            f.write("\n".join(sorted(touched)) + "\n")
+    print(f"\n📄 Reporte guardado en: {report_file.relative_to(ROOT)}")
+    print("⚠️  No se borró nada: revisá los grupos antes de unificar.")
+
+
+if __name__ == "__main__":
+    main()
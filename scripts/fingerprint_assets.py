@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fingerprinting de assets en dist/: renombra css/, js/, img/ y font/ a
+nombre.<hash>.ext, reescribe las referencias en HTML, partials, CSS y JS, y
+genera:
+- dist/asset-manifest.json: {ruta original: ruta con hash}
+- dist/_headers: Cache-Control immutable solo para los nombres con hash (uno
+  por uno, más los tiles, versionados por directorio) y revalidación para el
+  HTML (formato que entienden Netlify/Cloudflare).
+
+Primero se procesan img/ y font/, que no referencian a nadie; después css/ y
+js/, porque su hash tiene que incluir las referencias ya reescritas.
+"""
+import argparse
+import json
+import re
+import urllib.parse
+from pathlib import Path
+
+from build_common import DIST_DIR, ROOT, TILES_DIR, atomic_write_text, file_digest
+from rewrite_refs import Rewriter, rewrite_files
+
+LEAF_DIRS = ("img", "font")
+CODE_DIRS = ("css", "js")
+TEXT_EXTENSIONS = {".html", ".css", ".js", ".php"}
+HASH_LEN = 8
+HASHED_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LEN}}}$")
+# Un segmento .<hash>. en cualquier parte del nombre (main.07ef5d49.css.gz)
+HASH_SEGMENT_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LEN}}}(?:\.|$)")
+COMPRESSED_SUFFIXES = {".gz", ".br"}
+# Ya versionados por directorio, y js/deepzoom.js arma los nombres de los tiles
+UNHASHED_DIRS = (TILES_DIR.relative_to(ROOT).as_posix(),)
+# url('archivo.woff2') relativo a la propia hoja (font/stylesheet.css)
+SAME_DIR_URL_LEAD = r"url\(\s*['\"]?"
+SAME_DIR_URL_TAIL = r"(?=['\"]?\s*\))"
+
+IMMUTABLE = "  Cache-Control: public, max-age=31536000, immutable\n"
+# El HTML y todo lo que no lleva hash (sw.js, etc.) se revalida
+REVALIDATE_HEADERS = """/*.html
+  Cache-Control: public, max-age=0, must-revalidate
+/
+  Cache-Control: public, max-age=0, must-revalidate
+"""
+
+
+def hashed_path(path: Path) -> Path:
+    digest = file_digest(path)[:HASH_LEN]
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}")
+
+
+def needs_hash(path: Path, root: Path) -> bool:
+    """
+    Si hay que renombrarlo: copiado del fuente o generado por otra etapa
+    (css/fonts.css, font/subset/), pero no comprimido ni con hash ya puesto.
+    """
+    rel = path.relative_to(root)
+    if path.name.startswith(".") or path.suffix.lower() in COMPRESSED_SUFFIXES or HASH_SEGMENT_RE.search(path.name):
+        return False
+    return not rel.as_posix().startswith(tuple(d + "/" for d in UNHASHED_DIRS))
+
+
+def remove_old_versions(target: Path) -> int:
+    """Borra las versiones con hash anteriores del asset (y sus .gz/.br); devuelve cuántas."""
+    stem = HASHED_RE.sub("", target.stem)
+    pattern = re.compile(rf"{re.escape(stem)}\.[0-9a-f]{{{HASH_LEN}}}{re.escape(target.suffix)}(?:\..+)?")
+    removed = 0
+    for old in target.parent.iterdir():
+        if old != target and old.is_file() and pattern.fullmatch(old.name):
+            old.unlink()
+            removed += 1
+    return removed
+
+
+def fingerprint_dir(root: Path, dir_name: str) -> dict:
+    """Renombra los archivos de root/dir_name; devuelve {viejo: nuevo} relativo al directorio."""
+    base = root / dir_name
+    mapping = {}
+    if not base.is_dir():
+        return mapping
+    for path in sorted(p for p in base.rglob("*") if p.is_file()):
+        if not needs_hash(path, root):
+            continue
+        target = hashed_path(path)
+        path.rename(target)
+        remove_old_versions(target)
+        old = path.relative_to(base).as_posix()
+        new = target.relative_to(base).as_posix()
+        mapping[old] = new
+        quoted_old, quoted_new = urllib.parse.quote(old), urllib.parse.quote(new)
+        if quoted_old != old:
+            # Referencias con %20 y compañía
+            mapping[quoted_old] = quoted_new
+    return mapping
+
+
+def text_files(root: Path):
+    return [p for p in root.rglob("*") if p.suffix.lower() in TEXT_EXTENSIONS and p.is_file()]
+
+
+def rewrite_same_dir_urls(root: Path, dir_name: str, mapping: dict):
+    """Las hojas dentro de dir_name pueden referenciar a sus vecinos sin prefijo."""
+    siblings = {old: new for old, new in mapping.items() if "/" not in old}
+    rewriter = Rewriter(siblings, lead=SAME_DIR_URL_LEAD, tail=SAME_DIR_URL_TAIL)
+    rewrite_files(rewriter, (root / dir_name).rglob("*.css"))
+
+
+def fingerprint(root: Path = DIST_DIR) -> dict:
+    manifest = {}
+    for group in (LEAF_DIRS, CODE_DIRS):
+        for dir_name in group:
+            mapping = fingerprint_dir(root, dir_name)
+            if not mapping:
+                continue
+            rewrite_files(Rewriter.for_dir(mapping, dir_name), text_files(root))
+            rewrite_same_dir_urls(root, dir_name, mapping)
+            manifest.update({f"{dir_name}/{old}": f"{dir_name}/{new}" for old, new in mapping.items()})
+            print(f"  ✓ {dir_name}/: {len(mapping)} archivos con hash")
+    return manifest
+
+
+def headers(manifest: dict) -> str:
+    """_headers: immutable para cada asset con hash, nunca para un nombre fijo."""
+    hashed = sorted({urllib.parse.unquote(v) for v in manifest.values()})
+    rules = [f"/{urllib.parse.quote(v)}\n{IMMUTABLE}" for v in hashed]
+    rules += [f"/{d}/*\n{IMMUTABLE}" for d in UNHASHED_DIRS]
+    return "".join(rules) + REVALIDATE_HEADERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renombra los assets de dist/ con hash de contenido.")
+    parser.add_argument("--dist", type=Path, default=DIST_DIR, help="directorio de build")
+    args = parser.parse_args()
+
+    root = args.dist.resolve()
+    if not root.exists():
+        print("❌ No existe dist/. Corré antes: python scripts/inject_head_partial.py --build")
+        return
+
+    print("🔖 Fingerprinting de assets...")
+    manifest = fingerprint(root)
+    previous = root / "asset-manifest.json"
+    if previous.exists():
+        # Corridas sobre un dist/ ya procesado: se conserva lo anterior que siga existiendo
+        old = json.loads(previous.read_text(encoding="utf-8"))
+        alive = {
+            k: v for k, v in old.items()
+            if not HASH_SEGMENT_RE.search(Path(k).name) and (root / urllib.parse.unquote(v)).is_file()
+        }
+        manifest = {**alive, **manifest}
+    atomic_write_text(previous, json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False))
+    atomic_write_text(root / "_headers", headers(manifest))
+    print(f"\n✨ {len(manifest)} assets en asset-manifest.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,27 +6,32 @@ y mueve algunos estilos inline repetidos a clases CSS.
 """
 from pathlib import Path
 
+from html_pipeline import transform
+
 ROOT = Path(__file__).resolve().parents[1]
 
 
-def fix_body_tags():
-    for html in ROOT.glob("*.html"):
-        text = html.read_text(encoding="utf-8")
-        orig = text
+@transform("fix_body_tags", kind="text", scope="root")
+def fix_body_text(text, ctx=None):
+    # Reemplazar <id="page-top"> según corresponda
+    if '<id="page-top">' in text:
+        if "<body" not in text:
+            text = text.replace('<id="page-top">', '<body id="page-top">', 1)
+        else:
+            text = text.replace('<id="page-top">', "", 1)
 
-        # Reemplazar <id="page-top"> según corresponda
-        if '<id="page-top">' in text:
-            if "<body" not in text:
-                text = text.replace('<id="page-top">', '<body id="page-top">', 1)
-            else:
-                text = text.replace('<id="page-top">', "", 1)
+    # Asegurar cierre </body> antes de </html>
+    if "</html>" in text and "</body>" not in text:
+        text = text.replace("</html>", "</body>\n</html>")
+    return text
 
-        # Asegurar cierre </body> antes de </html>
-        if "</html>" in text and "</body>" not in text:
-            text = text.replace("</html>", "</body>\n</html>")
 
-        if text != orig:
-            html.write_text(text, encoding="utf-8")
+def fix_body_tags():
+    for html in ROOT.glob("*.html"):
+        text = html.read_text(encoding="utf-8")
+        new_text = fix_body_text(text)
+        if new_text != text:
+            html.write_text(new_text, encoding="utf-8")
             print(f"✅ body corregido en {html.name}")
 
 
@@ -49,34 +54,37 @@ def update_css():
         print("✅ Nuevas clases CSS agregadas a main.css")
 
 
-def replace_inline_styles():
-    for html in ROOT.glob("*.html"):
-        text = html.read_text(encoding="utf-8")
-        orig = text
+@transform("replace_inline_styles", kind="text", scope="root")
+def replace_inline_styles_text(text, ctx=None):
+    # index: headings con padding-top: 40px
+    text = text.replace(
+        'class="headings headed leblanc" style="padding-top: 40px"',
+        'class="headings headed leblanc section-pad-hero"',
+    )
 
-        # index: headings con padding-top: 40px
-        text = text.replace(
-            'class="headings headed leblanc" style="padding-top: 40px"',
-            'class="headings headed leblanc section-pad-hero"',
-        )
+    # index: sección ¿Qué hacemos?
+    text = text.replace(
+        'class="headings" style="padding-top: 10px; padding-bottom: 20px;background-color: #e8e8e8"',
+        'class="headings section-pad-10-20-grey"',
+    )
 
-        # index: sección ¿Qué hacemos?
-        text = text.replace(
-            'class="headings" style="padding-top: 10px; padding-bottom: 20px;background-color: #e8e8e8"',
-            'class="headings section-pad-10-20-grey"',
-        )
+    # constructora y otras: section padding 2%
+    text = text.replace('<section style="padding: 2%">', '<section class="section-pad-2">')
 
-        # constructora y otras: section padding 2%
-        text = text.replace('<section style="padding: 2%">', '<section class="section-pad-2">')
+    # wrap-texto2 padding-top 20%
+    text = text.replace(
+        'class="wrap-texto2" style="padding-top: 20%"',
+        'class="wrap-texto2 wrap-texto-pad-20"',
+    )
+    return text
 
-        # wrap-texto2 padding-top 20%
-        text = text.replace(
-            'class="wrap-texto2" style="padding-top: 20%"',
-            'class="wrap-texto2 wrap-texto-pad-20"',
-        )
 
-        if text != orig:
-            html.write_text(text, encoding="utf-8")
+def replace_inline_styles():
+    for html in ROOT.glob("*.html"):
+        text = html.read_text(encoding="utf-8")
+        new_text = replace_inline_styles_text(text)
+        if new_text != text:
+            html.write_text(new_text, encoding="utf-8")
             print(f"✅ Estilos inline refactorizados en {html.name}")
 
 
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Genera dist/sw.js, el service worker del sitio, a partir del build ya
+fingerprinteado (dist/asset-manifest.json).
+
+- Precache del "shell": las hojas CSS, los JS, las fuentes woff2 y los
+  partials que usa alguna página. La lista va embebida en el propio sw.js
+  con la revisión de cada archivo: el hash del nombre, o el del contenido
+  para los partials, que no llevan hash. La versión del cache es el hash de
+  esa lista, así que un deploy que cambia algún asset instala un service
+  worker nuevo y borra el cache anterior.
+- img/: cache en tiempo de ejecución (cache-first, los nombres tienen hash)
+  con límite LRU de IMG_MAX_ENTRIES entradas e IMG_MAX_MB.
+- HTML: primero la red y, sin conexión, la última copia (LRU de
+  PAGES_MAX_ENTRIES), para no servir una página que apunte a assets de un
+  deploy anterior.
+
+El registro lo inyecta este mismo script, como <script> inline al final de
+cada página de dist/: el sitio servido desde el fuente (sin build) no tiene
+sw.js y no debe pedirlo.
+"""
+import argparse
+import hashlib
+import json
+import urllib.parse
+from pathlib import Path
+
+from build_common import DIST_DIR, PARTIALS_DIR, ROOT, atomic_write_text, file_digest
+from fingerprint_assets import HASH_LEN, HASHED_RE
+
+SW_NAME = "sw.js"
+CACHE_PREFIX = "denovo"
+# .woff queda fuera: solo lo pide un navegador sin woff2
+SHELL_EXTENSIONS = {".css", ".js", ".woff2"}
+IMG_MAX_ENTRIES = 80
+IMG_MAX_MB = 60
+PAGES_MAX_ENTRIES = 30
+SW_HEADERS = """/sw.js
+  Cache-Control: no-cache
+"""
+REGISTER_MARKER = "data-sw-register"
+REGISTER_SCRIPT = (
+    f"<script {REGISTER_MARKER}>"
+    'if("serviceWorker"in navigator)addEventListener("load",function(){'
+    f'navigator.serviceWorker.register("/{SW_NAME}").catch(function(e){{'
+    'console.error("No se pudo registrar el service worker:",e)})})'
+    "</script>"
+)
+
+SW_TEMPLATE = """// Generado por scripts/generate_sw.py: no editar a mano
+const VERSION = "__VERSION__";
+const PRECACHE = __PRECACHE__;
+const SHELL_CACHE = "__PREFIX__-shell-" + VERSION;
+const IMG_CACHE = "__PREFIX__-img";
+const PAGES_CACHE = "__PREFIX__-pages";
+const IMG_LIMITS = { entries: __IMG_MAX_ENTRIES__, bytes: __IMG_MAX_BYTES__ };
+const PAGES_LIMITS = { entries: __PAGES_MAX_ENTRIES__, bytes: Infinity };
+const SIZE_HEADER = "x-sw-size";
+const precached = new Set(PRECACHE.map((entry) => entry.url));
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then((cache) => cache.addAll(PRECACHE.map((entry) => entry.url)))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  // Los shells de versiones anteriores; las imágenes y páginas se conservan
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(
+        keys.filter((key) => key.startsWith("__PREFIX__-shell-") && key !== SHELL_CACHE)
+          .map((key) => caches.delete(key))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+// Orden de inserción = orden de uso: cada acierto se vuelve a guardar al final
+async function touch(cache, request, response) {
+  await cache.delete(request);
+  await cache.put(request, response);
+}
+
+async function store(cacheName, limits, request, response) {
+  const body = await response.blob();
+  const headers = new Headers(response.headers);
+  headers.set(SIZE_HEADER, String(body.size));
+  const cache = await caches.open(cacheName);
+  await cache.put(request, new Response(body, { status: response.status, statusText: response.statusText, headers }));
+  await trim(cache, limits);
+}
+
+async function trim(cache, limits) {
+  const keys = await cache.keys();
+  const sizes = await Promise.all(
+    keys.map((key) => cache.match(key).then((hit) => Number(hit && hit.headers.get(SIZE_HEADER)) || 0))
+  );
+  let total = sizes.reduce((a, b) => a + b, 0);
+  let count = keys.length;
+  for (let i = 0; i < keys.length && (count > limits.entries || total > limits.bytes); i++) {
+    await cache.delete(keys[i]);
+    total -= sizes[i];
+    count--;
+  }
+}
+
+async function cacheFirst(request, cacheName, limits) {
+  const cache = await caches.open(cacheName);
+  const hit = await cache.match(request);
+  if (hit) {
+    touch(cache, request, hit.clone());
+    return hit;
+  }
+  const response = await fetch(request);
+  if (response.status === 200) store(cacheName, limits, request, response.clone());
+  return response;
+}
+
+async function networkFirst(request) {
+  try {
+    const response = await fetch(request);
+    if (response.status === 200) store(PAGES_CACHE, PAGES_LIMITS, request, response.clone());
+    return response;
+  } catch (error) {
+    const hit = await caches.match(request, { cacheName: PAGES_CACHE });
+    if (hit) return hit;
+    throw error;
+  }
+}
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== "GET" || url.origin !== self.location.origin) return;
+
+  if (precached.has(url.pathname)) {
+    event.respondWith(
+      caches.match(url.pathname, { cacheName: SHELL_CACHE }).then((hit) => hit || fetch(request))
+    );
+  } else if (url.pathname.startsWith("/img/") && !request.headers.has("range")) {
+    event.respondWith(cacheFirst(request, IMG_CACHE, IMG_LIMITS));
+  } else if (request.mode === "navigate") {
+    event.respondWith(networkFirst(request));
+  }
+});
+"""
+
+
+def _revision(path: Path) -> str:
+    m = HASHED_RE.search(path.stem)
+    return m.group(0)[1:] if m else file_digest(path)[:HASH_LEN]
+
+
+def _ref(path: Path) -> str:
+    # Con el directorio: font/x.woff2 y font/subset/x.woff2 comparten nombre
+    return f"{path.parent.name}/{path.name}"
+
+
+def shell_files(root: Path) -> list[Path]:
+    """Assets del shell que usa el build: CSS, JS y woff2 referenciados, más los partials."""
+    manifest = json.loads((root / "asset-manifest.json").read_text(encoding="utf-8"))
+    # El manifest acumula corridas anteriores: solo cuenta lo que las páginas piden,
+    # directamente o desde sus hojas (las fuentes)
+    candidates = [
+        root / hashed
+        for original, hashed in sorted(manifest.items())
+        if Path(original).suffix in SHELL_EXTENSIONS and not HASHED_RE.search(Path(original).stem)
+    ]
+    texts = [p.read_text(encoding="utf-8", errors="ignore") for p in root.rglob("*.html")]
+    files = []
+    for suffixes in ({".css", ".js"}, {".woff2"}):
+        found = [
+            path for path in candidates
+            if path.suffix in suffixes and path.is_file() and any(_ref(path) in text for text in texts)
+        ]
+        files += found
+        texts += [p.read_text(encoding="utf-8", errors="ignore") for p in found if p.suffix == ".css"]
+    partials = root / PARTIALS_DIR.relative_to(ROOT)
+    files += sorted(partials.glob("*.html")) if partials.is_dir() else []
+    return files
+
+
+def precache_entries(root: Path) -> list[dict]:
+    return [
+        {"url": "/" + urllib.parse.quote(p.relative_to(root).as_posix()), "revision": _revision(p)}
+        for p in shell_files(root)
+    ]
+
+
+def render(entries: list[dict]) -> tuple[str, str]:
+    """(versión, código del service worker)."""
+    version = hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()[:HASH_LEN]
+    replacements = {
+        "__VERSION__": version,
+        "__PRECACHE__": json.dumps(entries, indent=2),
+        "__PREFIX__": CACHE_PREFIX,
+        "__IMG_MAX_ENTRIES__": str(IMG_MAX_ENTRIES),
+        "__IMG_MAX_BYTES__": str(IMG_MAX_MB * 1024 * 1024),
+        "__PAGES_MAX_ENTRIES__": str(PAGES_MAX_ENTRIES),
+    }
+    script = SW_TEMPLATE
+    for key, value in replacements.items():
+        script = script.replace(key, value)
+    return version, script
+
+
+def inject_registration(root: Path) -> int:
+    """Agrega REGISTER_SCRIPT al final de las páginas de dist/; devuelve en cuántas."""
+    count = 0
+    for page in sorted(root.rglob("*.html")):
+        if page.relative_to(root).parts[0] == "partials":
+            continue
+        text = page.read_text(encoding="utf-8")
+        if REGISTER_MARKER in text:
+            continue
+        # Varias páginas no cierran <body> (abren <id="page-top">): entonces antes de </html>
+        lower = text.lower()
+        end = next((i for i in (lower.rfind("</body>"), lower.rfind("</html>")) if i >= 0), len(text))
+        atomic_write_text(page, text[:end] + REGISTER_SCRIPT + text[end:])
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el service worker con el precache del build.")
+    parser.add_argument("--dist", type=Path, default=DIST_DIR, help="directorio de build")
+    args = parser.parse_args()
+
+    root = args.dist.resolve()
+    if not (root / "asset-manifest.json").exists():
+        print("❌ Falta dist/asset-manifest.json. Corré antes: python scripts/fingerprint_assets.py")
+        return
+
+    entries = precache_entries(root)
+    version, script = render(entries)
+    atomic_write_text(root / SW_NAME, script)
+    headers = root / "_headers"
+    text = headers.read_text(encoding="utf-8") if headers.exists() else ""
+    if SW_HEADERS not in text:
+        # El service worker se revalida siempre: es el que sabe qué versión está vigente
+        atomic_write_text(headers, text + SW_HEADERS)
+    size = sum((root / urllib.parse.unquote(e["url"]).lstrip("/")).stat().st_size for e in entries)
+    pages = inject_registration(root)
+    print(f"⚙️  {SW_NAME}: {len(entries)} archivos en el precache ({size / 1024:.0f} KB), versión {version}; "
+          f"registrado en {pages} páginas")
+
+
+if __name__ == "__main__":
+    main()
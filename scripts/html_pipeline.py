@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline de transformaciones HTML: cada página se lee, se parsea una sola
+vez, pasa por todas las transformaciones registradas en orden y se escribe
+una sola vez. Las páginas se procesan en paralelo.
+
+Tipos de transformación:
+- "text": antes de parsear, f(texto, ctx) -> texto
+- "soup": sobre el árbol de BeautifulSoup, f(soup, ctx) -> bool (modificó)
+- "post": sobre el HTML serializado, f(texto, ctx) -> texto
+
+Los scripts (enhance_html.py, update_html_for_cls_and_links.py, ...) registran
+sus transformaciones con @transform y pueden seguir corriéndose por separado.
+
+El pipeline reescribe el fuente; con --check no escribe nada y termina con
+código 1 si alguna página todavía cambiaría (build.py lo corre antes de armar
+dist/, para no publicar páginas sin fetchpriority, preloads, etc.).
+"""
+import argparse
+import importlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from build_common import ROOT, atomic_write_text, default_workers, iter_html_files
+
+# Módulos que registran transformaciones; su orden define el orden del pipeline
+TRANSFORM_MODULES = [
+    "fix_body_and_styles",
+    "inject_head_partial",
+    "enhance_html",
+    "transcode_videos",
+    "deepzoom",
+    "convert_to_webp",
+    "lcp_priority",
+    "placeholders",
+    "update_html_for_cls_and_links",
+    "clean_whitespace",
+]
+KINDS = ("text", "soup", "post")
+# Dónde aplica cada transformación
+SCOPES = ("all", "pages", "root")
+PARSERS = ("html.parser", "lxml", "html5lib")
+
+
+class Transform(NamedTuple):
+    name: str
+    kind: str
+    func: Callable
+    scope: str
+    # Se llama una vez en el proceso principal antes de repartir las páginas
+    prepare: Optional[Callable] = None
+
+
+class PageContext(NamedTuple):
+    path: Path
+    rel: str
+    is_partial: bool
+
+
+_REGISTRY: dict[str, Transform] = {}
+
+
+def transform(name: str, kind: str = "soup", scope: str = "all", prepare: Callable = None):
+    """Registra una transformación en el pipeline."""
+    assert kind in KINDS and scope in SCOPES
+
+    def register(func):
+        _REGISTRY[name] = Transform(name, kind, func, scope, prepare)
+        return func
+
+    return register
+
+
+def load_transforms() -> list[Transform]:
+    for module in TRANSFORM_MODULES:
+        importlib.import_module(module)
+    return list(_REGISTRY.values())
+
+
+def applies(t: Transform, ctx: PageContext) -> bool:
+    if t.scope == "pages":
+        return not ctx.is_partial
+    if t.scope == "root":
+        return "/" not in ctx.rel
+    return True
+
+
+def process_page(
+    path: Path, names: list[str], parser: str = "html.parser", prettify: bool = False, write: bool = True
+) -> bool:
+    """Aplica las transformaciones `names` a una página. Devuelve True si la reescribió (o cambiaría)."""
+    from bs4 import BeautifulSoup
+
+    load_transforms()
+    rel = path.relative_to(ROOT).as_posix()
+    ctx = PageContext(path, rel, rel.startswith("partials/"))
+    selected = [t for t in (_REGISTRY[n] for n in names) if applies(t, ctx)]
+
+    original = path.read_text(encoding="utf-8")
+    text = original
+    for t in selected:
+        if t.kind == "text":
+            text = t.func(text, ctx)
+
+    soup_transforms = [t for t in selected if t.kind == "soup"]
+    if soup_transforms or prettify:
+        # lxml/html5lib envuelven los fragmentos en <html><body>: los partials siempre con html.parser
+        soup = BeautifulSoup(text, "html.parser" if ctx.is_partial else parser)
+        modified = False
+        for t in soup_transforms:
+            modified = bool(t.func(soup, ctx)) or modified
+        if modified or prettify:
+            text = soup.prettify() if prettify else str(soup)
+
+    for t in selected:
+        if t.kind == "post":
+            text = t.func(text, ctx)
+
+    if text == original:
+        return False
+    if write:
+        atomic_write_text(path, text)
+    return True
+
+
+def run_pipeline(
+    names=None, files=None, parser: str = "html.parser", workers: int = None, prettify: bool = False,
+    check: bool = False,
+):
+    """
+    Corre el pipeline (todas las transformaciones si `names` es None) sobre las
+    páginas. Con `check` no escribe ni genera nada: devuelve las que cambiarían.
+    """
+    registry = load_transforms()
+    names = [t.name for t in registry] if names is None else list(names)
+    unknown = set(names) - set(_REGISTRY)
+    if unknown:
+        raise SystemExit(f"Transformaciones desconocidas: {', '.join(sorted(unknown))}")
+    files = list(iter_html_files()) if files is None else list(files)
+    for prepare in dict.fromkeys(_REGISTRY[n].prepare for n in names if _REGISTRY[n].prepare and not check):
+        prepare()
+
+    updated = []
+    with ProcessPoolExecutor(max_workers=workers or default_workers()) as pool:
+        n = len(files)
+        results = pool.map(process_page, files, [names] * n, [parser] * n, [prettify] * n, [not check] * n)
+        for path, changed in zip(files, results):
+            if changed:
+                updated.append(path)
+                if not check:
+                    print("Modified", path)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica todas las transformaciones HTML en una sola pasada.")
+    parser.add_argument("--only", help="lista separada por comas de transformaciones a aplicar")
+    parser.add_argument("--parser", default="html.parser", choices=PARSERS, help="backend de BeautifulSoup")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--prettify", action="store_true", help="serializar con soup.prettify()")
+    parser.add_argument("--list", action="store_true", help="listar las transformaciones registradas")
+    parser.add_argument("--check", action="store_true", help="no escribir: fallar si alguna página cambiaría")
+    args = parser.parse_args()
+
+    if args.list:
+        for t in load_transforms():
+            print(f"{t.name:<28}{t.kind:<6}{t.scope}")
+        return
+
+    names = args.only.split(",") if args.only else None
+    updated = run_pipeline(names, parser=args.parser, workers=args.workers, prettify=args.prettify, check=args.check)
+    if args.check:
+        if updated:
+            print(f"❌ {len(updated)} archivos sin el pipeline aplicado:")
+            for path in updated:
+                print(f"  {path.relative_to(ROOT)}")
+            print("Corré antes: python scripts/html_pipeline.py")
+            sys.exit(1)
+        print("✅ Pipeline HTML al día.")
+        return
+    print(f"\n✨ {len(updated)} archivos actualizados.")
+
+
+if __name__ == "__main__":
+    # Se delega en el módulo importado para compartir el registro con los scripts
+    import html_pipeline
+
+    html_pipeline.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de dimensiones de imágenes (.cache/image-dims.json),
+compartida por las transformaciones que agregan width/height a <img>.
+
+Cada entrada se indexa por ruta relativa y se invalida por tamaño + mtime.
+PIL solo lee la cabecera del archivo para conocer el tamaño, sin decodificar
+los píxeles. `warm_cache()` completa en paralelo todo img/ antes de que el
+pipeline reparta las páginas entre procesos.
+"""
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from build_common import IMG_DIR, ROOT, default_workers, load_manifest, save_manifest, stat_key
+
+CACHE_NAME = "image-dims.json"
+RASTER_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".bmp", ".tiff"}
+
+_cache: Optional[dict] = None
+
+
+def read_size(path: Path) -> Optional[list]:
+    """[ancho, alto] leyendo solo la cabecera, o None si no es una imagen legible."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return list(img.size)
+    except Exception:
+        return None
+
+
+def _key(path: Path) -> str:
+    return Path(os.path.abspath(path)).relative_to(ROOT).as_posix()
+
+
+def _loaded() -> dict:
+    global _cache
+    if _cache is None:
+        _cache = load_manifest(CACHE_NAME)
+    return _cache
+
+
+def image_size(path: Path) -> Optional[tuple]:
+    """(ancho, alto) de `path`, desde la caché si el archivo no cambió."""
+    path = Path(path)
+    try:
+        stat = stat_key(path)
+        key = _key(path)
+    except (OSError, ValueError):
+        return None
+    cache = _loaded()
+    entry = cache.get(key)
+    if entry is None or entry["stat"] != stat:
+        entry = {"stat": stat, "size": read_size(path)}
+        cache[key] = entry
+    return tuple(entry["size"]) if entry["size"] else None
+
+
+def warm_cache(paths=None, workers: int = None) -> int:
+    """
+    Lee en paralelo las dimensiones que faltan o cambiaron (por defecto, todo
+    img/) y guarda la caché. Devuelve cuántas entradas se actualizaron.
+    """
+    if paths is None:
+        paths = [p for p in IMG_DIR.rglob("*") if p.suffix.lower() in RASTER_EXTENSIONS and p.is_file()]
+    cache = _loaded()
+    live = {}
+    stale = []
+    for path in paths:
+        key, stat = _key(path), stat_key(path)
+        live[key] = stat
+        entry = cache.get(key)
+        if entry is None or entry["stat"] != stat:
+            stale.append(path)
+
+    # Lectura de cabeceras: dominada por E/S, alcanza con hilos
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+        for path, size in zip(stale, pool.map(read_size, stale)):
+            key = _key(path)
+            cache[key] = {"stat": live[key], "size": size}
+
+    removed = [key for key in cache if key.startswith("img/") and not (ROOT / key).exists()]
+    for key in removed:
+        del cache[key]
+    if stale or removed:
+        save_manifest(CACHE_NAME, cache)
+    return len(stale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Completa la caché de dimensiones de imágenes.")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="hilos en paralelo")
+    args = parser.parse_args()
+    updated = warm_cache(workers=args.workers)
+    print(f"📐 {updated} imágenes medidas, {len(_loaded())} en caché ({CACHE_NAME})")
+
+
+if __name__ == "__main__":
+    main()
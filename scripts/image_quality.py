@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calidad de codificación por imagen según un objetivo perceptual, en lugar de
+quality=80 fijo para todo.
+
+Para cada imagen se busca (búsqueda binaria entre MIN_QUALITY y MAX_QUALITY)
+la calidad WebP más baja cuya versión decodificada alcanza TARGET_SSIM contra
+la original. Las fotos de obra con mucho detalle toleran calidades bajas; los
+planos (líneas finas sobre fondo liso) necesitan calidades altas.
+
+El SSIM se calcula sobre la luminancia con NumPy, con ventanas uniformes de
+SSIM_WINDOW px resueltas con imágenes integrales. Las fotos llegan a 48 MP,
+así que se procesa por franjas de SSIM_STRIP filas: el resultado es el mismo
+y la memoria queda acotada.
+
+Sin argumentos recodifica los WebP de img/ siempre desde un master, nunca
+desde un WebP ya recodificado (cada pasada sumaría pérdida): el original
+(.jpg/.png con el mismo nombre) en img/ o en img-masters/, o la copia que se
+guarda en img-masters/ antes de reescribir un WebP por primera vez. Los archivos
+escritos llevan una marca EXIF (OPTIMIZED_TAG); uno marcado sin master no se
+vuelve a tocar. Así se puede cambiar --target, incluso hacia arriba para
+recuperar un plano demasiado comprimido.
+
+Sin master previo se reescribe solo si se ahorra al menos MIN_SAVING; desde
+un master, siempre que el resultado cambie. La calidad elegida queda en
+.cache/quality-manifest.json junto con el hash del archivo resultante, así que
+las corridas siguientes no vuelven a buscar. convert_to_webp.py usa la misma
+búsqueda, marca y manifiesto para las conversiones nuevas.
+"""
+import argparse
+import io
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from build_common import (
+    IMG_DIR,
+    MASTERS_DIR,
+    atomic_write_bytes,
+    default_workers,
+    file_digest,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+
+MANIFEST = "quality-manifest.json"
+TARGET_SSIM = 0.985
+MIN_QUALITY = 40
+MAX_QUALITY = 95
+SSIM_WINDOW = 8
+SSIM_STRIP = 512
+# Reescribir solo si se ahorra al menos esta fracción del archivo
+MIN_SAVING = 0.05
+# Originales que convert_to_webp.py deja junto al WebP (salvo --delete-originals)
+ORIGINAL_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+# EXIF Software (0x0131) de los WebP que escribe este script
+SOFTWARE_TAG = 0x0131
+OPTIMIZED_TAG = "image_quality.py"
+# Constantes de estabilidad del SSIM para píxeles de 8 bits
+C1 = (0.01 * 255) ** 2
+C2 = (0.03 * 255) ** 2
+
+
+def _luma(img):
+    """Luminancia uint8; con alfa, premultiplicada (lo invisible no cuenta)."""
+    import numpy as np
+
+    luma = np.asarray(img.convert("L"), dtype=np.uint8)
+    if img.mode != "RGBA":
+        return luma
+    alpha = np.asarray(img.getchannel("A"), dtype=np.uint16)
+    return ((luma * alpha + 127) // 255).astype(np.uint8)
+
+
+def _box_mean(x, k: int):
+    """Media de cada ventana k×k (modo 'valid') con una imagen integral."""
+    import numpy as np
+
+    c = np.pad(x, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (c[k:, k:] - c[:-k, k:] - c[k:, :-k] + c[:-k, :-k]) / (k * k)
+
+
+def ssim_map(a, b, window: int):
+    """SSIM de cada ventana window×window entre dos arrays float del mismo tamaño."""
+    mu_a, mu_b = _box_mean(a, window), _box_mean(b, window)
+    var_a = _box_mean(a * a, window) - mu_a * mu_a
+    var_b = _box_mean(b * b, window) - mu_b * mu_b
+    cov = _box_mean(a * b, window) - mu_a * mu_b
+    num = (2 * mu_a * mu_b + C1) * (2 * cov + C2)
+    den = (mu_a * mu_a + mu_b * mu_b + C1) * (var_a + var_b + C2)
+    return num / den
+
+
+def ssim(a, b, window: int = SSIM_WINDOW, strip: int = SSIM_STRIP) -> float:
+    """SSIM medio entre dos arrays de luminancia (uint8) del mismo tamaño."""
+    import numpy as np
+
+    window = min(window, *a.shape)
+    total, count = 0.0, 0
+    # Cada franja suma `window - 1` filas extra para cubrir sus ventanas completas
+    for top in range(0, a.shape[0] - window + 1, strip):
+        rows = slice(top, top + strip + window - 1)
+        m = ssim_map(a[rows].astype(np.float64), b[rows].astype(np.float64), window)
+        total += float(m.sum())
+        count += m.size
+    return total / count
+
+
+def encode(img, quality: int, method: int = 6, exif: bytes = b"") -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, "WEBP", quality=quality, method=method, exif=exif)
+    return buf.getvalue()
+
+
+def search_quality(img, target: float = TARGET_SSIM, method: int = 6, exif: bytes = b""):
+    """
+    (calidad, ssim, bytes) con la calidad más baja que alcanza `target`.
+    Si ni MAX_QUALITY llega, devuelve MAX_QUALITY.
+    """
+    from PIL import Image
+
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    reference = _luma(img)
+    lo, hi = MIN_QUALITY, MAX_QUALITY
+    best = None
+    while lo <= hi:
+        quality = (lo + hi) // 2
+        data = encode(img, quality, method, exif)
+        with Image.open(io.BytesIO(data)) as decoded:
+            score = ssim(reference, _luma(decoded))
+        if score >= target:
+            best = (quality, score, data)
+            hi = quality - 1
+        else:
+            lo = quality + 1
+    if best is None:
+        data = encode(img, MAX_QUALITY, method, exif)
+        with Image.open(io.BytesIO(data)) as decoded:
+            best = (MAX_QUALITY, ssim(reference, _luma(decoded)), data)
+    return best
+
+
+def master_for(path: Path):
+    """
+    Imagen sin recodificar de la que sale `path`, o None: el original junto a
+    él o en img-masters/ (donde lo deja convert_to_webp.py --delete-originals),
+    o la copia del WebP guardada antes de su primera recodificación.
+    """
+    for folder in (path.parent, MASTERS_DIR):
+        for ext in ORIGINAL_EXTENSIONS:
+            for candidate in (folder / (path.stem + ext), folder / (path.stem + ext.upper())):
+                if candidate.is_file():
+                    return candidate
+    kept = MASTERS_DIR / path.name
+    return kept if kept.is_file() else None
+
+
+def optimized_exif() -> bytes:
+    """EXIF con la marca OPTIMIZED_TAG para los WebP de calidad buscada."""
+    from PIL import Image
+
+    exif = Image.Exif()
+    exif[SOFTWARE_TAG] = OPTIMIZED_TAG
+    return exif.tobytes()
+
+
+def record(manifest: dict, path: Path, target: float, quality: int, score: float):
+    """Anota en el manifiesto la búsqueda que produjo `path` (también desde convert_to_webp.py)."""
+    manifest[path.name] = {
+        "sha256": file_digest(path),
+        "stat": stat_key(path),
+        "target": target,
+        "quality": quality,
+        "ssim": round(score, 5),
+    }
+
+
+def is_optimized(path: Path) -> bool:
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return str(img.getexif().get(SOFTWARE_TAG, "")).startswith(OPTIMIZED_TAG)
+
+
+def optimize(path: Path, target: float, method: int, write: bool = True):
+    """
+    Busca la calidad de `path` desde su master y lo reescribe si conviene (se
+    ejecuta en el pool). Devuelve (calidad, ssim, bytes antes, bytes después,
+    estado), con estado "written", "kept" o "no-master"; este último sin buscar.
+    """
+    from PIL import Image
+
+    current = path.stat().st_size
+    master = master_for(path)
+    if master is None and is_optimized(path):
+        # Recodificar el propio resultado solo sumaría pérdida
+        return None, None, current, current, "no-master"
+    with Image.open(master or path) as img:
+        img.load()
+        quality, score, data = search_quality(img, target, method, optimized_exif())
+    if master is None:
+        worth = len(data) <= current * (1 - MIN_SAVING)
+    else:
+        worth = data != path.read_bytes()
+    if not (write and worth):
+        return quality, score, current, len(data), "kept"
+    if master is None:
+        # Primera recodificación: el WebP actual pasa a ser el master
+        MASTERS_DIR.mkdir(exist_ok=True)
+        shutil.copy2(path, MASTERS_DIR / path.name)
+    atomic_write_bytes(path, data)
+    return quality, score, current, len(data), "written"
+
+
+def plan(manifest: dict, target: float, force: bool = False):
+    """WebP de img/ que todavía no se buscaron con este objetivo (o cambiaron desde entonces)."""
+    pending = []
+    for path in sorted(IMG_DIR.glob("*.webp")):
+        entry = manifest.get(path.name, {})
+        digest = entry.get("sha256") if entry.get("stat") == stat_key(path) else file_digest(path)
+        if force or entry.get("sha256") != digest or entry.get("target") != target:
+            pending.append(path)
+        elif entry.get("stat") != stat_key(path):
+            entry["stat"] = stat_key(path)
+    return pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recodifica los WebP de img/ con la calidad justa para un SSIM objetivo.")
+    parser.add_argument("--target", type=float, default=TARGET_SSIM, help="SSIM mínimo contra el master")
+    parser.add_argument("--method", type=int, default=6, choices=range(7), help="esfuerzo del encoder WebP (0-6)")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--force", action="store_true", help="volver a buscar aunque el manifiesto esté al día")
+    parser.add_argument("--dry-run", action="store_true", help="solo informar, sin reescribir imágenes")
+    args = parser.parse_args()
+
+    manifest = load_manifest(MANIFEST)
+    pending = plan(manifest, args.target, args.force)
+    print(f"🎯 SSIM objetivo {args.target}: {len(pending)} imágenes por buscar")
+
+    saved = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(optimize, path, args.target, args.method, not args.dry_run): path
+            for path in pending
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                quality, score, before, after, status = future.result()
+            except Exception as e:
+                print(f"  ✗ {path.name}: {e}")
+                continue
+            if status == "no-master":
+                print(f"  ⚠ {path.name}: ya optimizado y sin master en {MASTERS_DIR.name}/, no se recodifica")
+                continue
+            mark = "✓" if status == "written" else ("~" if after < before else "=")
+            print(f"  {mark} {path.name}: q{quality} (SSIM {score:.4f}) {before / 1024:.0f} → {after / 1024:.0f} KB")
+            if status == "written" or (args.dry_run and after < before):
+                saved += before - after
+            if not args.dry_run:
+                record(manifest, path, args.target, quality, score)
+    if not args.dry_run:
+        save_manifest(MANIFEST, manifest)
+    verb = "ahorrables (--dry-run)" if args.dry_run else "ahorrados"
+    print(f"\n✨ {saved / 1024 / 1024:.1f} MB {verb}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,21 @@
 """
 Inyecta el head común en todas las páginas HTML y elimina líneas duplicadas
 de estilos/ fuentes que ahora viven en partials/head-common.html.
+
+Con --build genera dist/: copia el sitio y resuelve en tiempo de build los
+data-head-include (que head-loader.js pedía con un XHR síncrono) y los
+data-include (que main.js pedía con fetch), así las páginas salen completas.
 """
+import argparse
+import os
 import re
+import shutil
+import urllib.parse
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
+from build_common import DIST_DIR, EXCLUDED_DIRS, ROOT, atomic_write_text, iter_html_files
+from html_pipeline import transform
+
 SNIPPET = '  <meta data-head-include="partials/head-common.html">\n  <script src="js/head-loader.js"></script>\n'
 
 # Patrones que representan recursos ahora movidos al parcial
@@ -20,10 +30,8 @@ REMOVE_PATTERNS = [
 ]
 
 
-def inject_and_clean(filepath: Path) -> bool:
-    content = filepath.read_text(encoding="utf-8")
-    original = content
-
+@transform("inject_head", kind="text", scope="root")
+def inject_and_clean_text(content: str, ctx=None) -> str:
     # Insertar snippet si no está presente
     if 'data-head-include="partials/head-common.html"' not in content:
         content = content.replace("<head>", "<head>\n" + SNIPPET, 1)
@@ -33,7 +41,12 @@ def inject_and_clean(filepath: Path) -> bool:
         content = re.sub(pattern, "", content, flags=re.IGNORECASE)
 
     # Normalizar saltos excesivos
-    content = re.sub(r"\n{3,}", "\n\n", content)
+    return re.sub(r"\n{3,}", "\n\n", content)
+
+
+def inject_and_clean(filepath: Path) -> bool:
+    original = filepath.read_text(encoding="utf-8")
+    content = inject_and_clean_text(original)
 
     if content != original:
         filepath.write_text(content, encoding="utf-8")
@@ -41,7 +54,123 @@ def inject_and_clean(filepath: Path) -> bool:
     return False
 
 
+# --- Build: partials resueltos en dist/ ---------------------------------
+
+HEAD_INCLUDE_RE = re.compile(r'<meta\s+data-head-include=["\']([^"\']+)["\']\s*/?>', re.IGNORECASE)
+HEAD_LOADER_RE = re.compile(r'[ \t]*<script[^>]*src=["\'][^"\']*head-loader\.js["\'][^>]*>\s*</script>\s*', re.IGNORECASE)
+# <div data-include="partials/nav.html"></div> (vacío, como lo deja el HTML fuente)
+INCLUDE_RE = re.compile(
+    r'<(?P<tag>\w+)(?P<before>[^>]*?)\s+data-include=["\'](?P<ref>[^"\']+)["\'](?P<after>[^>]*)>\s*</(?P=tag)>',
+    re.IGNORECASE,
+)
+CHARSET_RE = re.compile(r'[ \t]*<meta\s+charset=["\']?[\w-]+["\']?\s*/?>\s*', re.IGNORECASE)
+HEAD_OPEN_RE = re.compile(r"<head[^>]*>", re.IGNORECASE)
+# Archivos de la raíz que no se publican
+SKIP_SUFFIXES = {".md", ".jsonl", ".py", ".txt"}
+MAX_INCLUDE_DEPTH = 5
+
+
+def resolve_partial(ref: str, page: Path, root: Path = ROOT) -> Path:
+    """Resuelve la URL del include como lo haría el navegador desde `page`."""
+    base = "http://site/" + page.relative_to(root).as_posix()
+    url_path = urllib.parse.urlsplit(urllib.parse.urljoin(base, ref)).path
+    return root / urllib.parse.unquote(url_path).lstrip("/")
+
+
+def read_partial(path: Path, cache: dict) -> str:
+    if path not in cache:
+        cache[path] = path.read_text(encoding="utf-8").strip()
+    return cache[path]
+
+
+def inline_partials(content: str, page: Path, cache: dict, depth: int = 0) -> str:
+    """Reemplaza data-head-include y data-include por el contenido del partial."""
+    if depth > MAX_INCLUDE_DEPTH:
+        raise RecursionError(f"Includes anidados demasiado profundos en {page}")
+
+    def head_include(m):
+        return read_partial(resolve_partial(m.group(1), page), cache)
+
+    def include(m):
+        partial = resolve_partial(m.group("ref"), page)
+        inner = inline_partials(read_partial(partial, cache), page, cache, depth + 1)
+        return f'<{m.group("tag")}{m.group("before")}{m.group("after")}>\n{inner}\n</{m.group("tag")}>'
+
+    content = HEAD_INCLUDE_RE.sub(head_include, content)
+    content = HEAD_LOADER_RE.sub("", content)
+    return hoist_charset(INCLUDE_RE.sub(include, content))
+
+
+def hoist_charset(content: str) -> str:
+    """El <meta charset> tiene que quedar dentro de los primeros 1024 bytes."""
+    charset = CHARSET_RE.search(content)
+    head = HEAD_OPEN_RE.search(content)
+    if not charset or not head or charset.start() < head.end():
+        return content
+    tag = charset.group(0).strip()
+    content = content[:charset.start()] + content[charset.end():]
+    return content[:head.end()] + "\n  " + tag + content[head.end():]
+
+
+def is_published(rel: Path) -> bool:
+    if rel.parts[0] in EXCLUDED_DIRS or rel.name.startswith("."):
+        return False
+    return not (len(rel.parts) == 1 and rel.suffix.lower() in SKIP_SUFFIXES)
+
+
+def sync_tree(dest: Path = DIST_DIR) -> int:
+    """Copia el sitio a `dest`, saltando archivos que no cambiaron."""
+    copied = 0
+    for dirpath, dirs, files in os.walk(ROOT):
+        base = Path(dirpath)
+        dirs[:] = [d for d in dirs if is_published((base / d).relative_to(ROOT))]
+        for fn in files:
+            src = base / fn
+            rel = src.relative_to(ROOT)
+            # Las páginas las escribe build_page con los partials resueltos
+            if not is_published(rel) or (rel.suffix == ".html" and rel.parts[0] != "partials"):
+                continue
+            target = dest / rel
+            st = src.stat()
+            if target.exists():
+                tst = target.stat()
+                if tst.st_size == st.st_size and tst.st_mtime_ns == st.st_mtime_ns:
+                    continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, target)
+            copied += 1
+    return copied
+
+
+def build_page(page: Path, dest: Path = DIST_DIR, cache: dict = None) -> Path:
+    """Escribe en `dest` la versión de `page` con los partials resueltos."""
+    cache = {} if cache is None else cache
+    target = dest / page.relative_to(ROOT)
+    atomic_write_text(target, inline_partials(page.read_text(encoding="utf-8"), page, cache))
+    return target
+
+
+def build_dist(dest: Path = DIST_DIR) -> int:
+    copied = sync_tree(dest)
+    print(f"📦 {copied} archivos copiados a {dest.relative_to(ROOT)}/")
+    cache = {}
+    built = 0
+    for page in iter_html_files(include_partials=False):
+        build_page(page, dest, cache)
+        built += 1
+    return built
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Head común y partials de las páginas.")
+    parser.add_argument("--build", action="store_true", help="generar dist/ con los partials resueltos")
+    args = parser.parse_args()
+
+    if args.build:
+        built = build_dist()
+        print(f"\n✨ Build completado. {built} páginas con partials resueltos.")
+        return
+
     updated = 0
     for html_file in ROOT.glob("*.html"):
         # Evitar partials y archivos no HTML de páginas
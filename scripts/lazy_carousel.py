@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diapositivas de carrusel diferidas en dist/: solo las que se ven al cargar
+la página llevan src; el resto pasa a data-src/data-srcset (también los
+<source> de un <picture>) y las montan carousel.js y main.js cuando el
+carrusel está por mostrarlas (la actual y la siguiente).
+
+Así una galería de diez fotos pesa una sola imagen en la primera carga. El
+placeholder LQIP (placeholders.py) sigue siendo el fondo del <img> mientras
+no se monta. La imagen LCP (fetchpriority="high") nunca se difiere.
+
+Corre sobre dist/ antes de fingerprint_assets.py: el fuente conserva los src
+reales, que el resto de las transformaciones necesitan.
+"""
+import argparse
+import re
+from itertools import accumulate
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from build_common import DIST_DIR, atomic_write_text
+
+# (carrusel, sus imágenes, cuántas se ven al cargar la página)
+CAROUSELS = [
+    # carousel.js arranca en la primera diapositiva
+    (".my-carousel", ".my-carousel-slide img", 1),
+    # main.js arranca con la segunda activa y la primera y la tercera a los costados
+    (".carousel", "img", 3),
+]
+TAG_RE = re.compile(r"<(?:\"[^\"]*\"|'[^']*'|[^'\">])+>")
+# src= y srcset= como atributos (no dentro de otro valor, como data-src=)
+DEFERRED_ATTR_RE = re.compile(r"(?<=\s)(src|srcset)(?=\s*=)", re.IGNORECASE)
+
+
+def deferred_tags(soup) -> list:
+    """<img> (y los <source> de su <picture>) de las diapositivas que no se ven al cargar."""
+    tags = []
+    for selector, images, eager in CAROUSELS:
+        for carousel in soup.select(selector):
+            for img in carousel.select(images)[eager:]:
+                if img.get("fetchpriority") == "high" or not img.get("src"):
+                    continue
+                picture = img.parent if img.parent is not None and img.parent.name == "picture" else None
+                tags += picture.find_all("source") if picture else []
+                tags.append(img)
+    return tags
+
+
+def process_page(page: Path) -> int:
+    """Difiere las diapositivas que no se ven al cargar; devuelve cuántas."""
+    text = page.read_text(encoding="utf-8")
+    if not any(name.strip(".") in text for name, _, _ in CAROUSELS):
+        return 0
+    tags = deferred_tags(BeautifulSoup(text, "html.parser"))
+    if not tags:
+        return 0
+
+    # Se editan solo esos tags sobre el texto original, sin reserializar la página
+    line_starts = [0, *accumulate(len(line) + 1 for line in text.split("\n"))]
+    offsets = sorted({line_starts[t.sourceline - 1] + t.sourcepos for t in tags}, reverse=True)
+    for start in offsets:
+        m = TAG_RE.match(text, start)
+        text = text[:start] + DEFERRED_ATTR_RE.sub(r"data-\1", m.group(0)) + text[m.end():]
+    atomic_write_text(page, text)
+    return sum(t.name == "img" for t in tags)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Difiere las diapositivas de carrusel que no se ven al cargar.")
+    parser.add_argument("--dist", type=Path, default=DIST_DIR, help="directorio de build")
+    args = parser.parse_args()
+
+    root = args.dist.resolve()
+    if not root.exists():
+        print("❌ No existe dist/. Corré antes: python scripts/inject_head_partial.py --build")
+        return
+
+    pages = deferred = 0
+    for page in sorted(root.rglob("*.html")):
+        if page.relative_to(root).parts[0] == "partials":
+            continue
+        count = process_page(page)
+        if count:
+            pages += 1
+            deferred += count
+    print(f"🎠 {deferred} diapositivas diferidas en {pages} páginas.")
+
+
+if __name__ == "__main__":
+    main()
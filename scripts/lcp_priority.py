@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prioridad de carga según el LCP probable de cada página, en lugar de
+loading="lazy" para todas las imágenes.
+
+- Candidato a LCP: el primero, en orden del documento y por encima del
+  pliegue, entre el póster del video del header, una <img> grande, un fondo
+  inline (style="background: url(...)") o la primera diapositiva de un
+  carrusel. Se marca con fetchpriority="high" y se precarga con
+  <link rel="preload" as="image" data-lcp> en el <head> (la fuente AVIF
+  si el <img> está dentro de un <picture>). Un fondo con variantes de
+  responsive_images.py lleva un preload por variante, con el mismo media
+  que su regla CSS: cada pantalla baja solo la que va a usar.
+- Las primeras imágenes por encima del pliegue se cargan sin lazy.
+- El resto lleva loading="lazy"; todas salvo el LCP, decoding="async".
+
+"Por encima del pliegue" es lo mismo que usa critical_css.py: el contenido
+hasta el primer <header> o <section> inclusive.
+"""
+import re
+import urllib.parse
+from pathlib import Path
+
+from critical_css import above_the_fold
+from html_pipeline import run_pipeline, transform
+from responsive_images import bg_class, bg_media, existing_variants, split_img_ref
+
+# Más chicas que esto (logos, íconos) no compiten por el LCP
+MIN_LCP_WIDTH = 300
+# Dentro del primer bloque solo las primeras imágenes se cargan de entrada
+ATF_EAGER_LIMIT = 4
+BG_URL_RE = re.compile(r"background(?:-image)?\s*:[^;]*url\(\s*['\"]?([^'\")]+)['\"]?\s*\)", re.IGNORECASE)
+CAROUSEL_SLIDE_CLASSES = {"my-carousel-slide", "carousel-item"}
+
+
+def _width(img) -> int:
+    try:
+        return int(img.get("width", 0))
+    except ValueError:
+        return 0
+
+
+def _in_nav(el) -> bool:
+    return any(p.name == "nav" or "nav" in (p.get("class") or []) for p in el.parents)
+
+
+def lcp_candidate(elements):
+    """(elemento, url) del LCP probable entre los elementos por encima del pliegue."""
+    for el in elements:
+        if el.name == "video":
+            if el.get("poster"):
+                return el, el["poster"]
+            if el.has_attr("autoplay"):
+                # El primer cuadro del video es el LCP: no hay imagen que adelantar
+                return el, None
+        elif el.name == "img" and el.get("src") and not _in_nav(el):
+            in_carousel = any(CAROUSEL_SLIDE_CLASSES & set(p.get("class") or []) for p in el.parents)
+            if in_carousel or _width(el) >= MIN_LCP_WIDTH or not el.has_attr("width"):
+                return el, el["src"]
+        elif el.get("style"):
+            m = BG_URL_RE.search(el["style"])
+            if m and not _in_nav(el):
+                return el, m.group(1)
+    return None, None
+
+
+def preload_links(soup, el, url) -> list:
+    attrs = {"as": "image", "data-lcp": "", "fetchpriority": "high", "href": url, "rel": "preload"}
+    ref = split_img_ref(url) if el.name != "img" else None
+    widths = existing_variants(ref[1]) if ref else []
+    if widths and bg_class(ref[1]) in (el.get("class") or []):
+        # Fondo responsive: el original solo en las pantallas donde la regla CSS lo elige
+        prefix, name = ref
+        stem = urllib.parse.quote(Path(name).stem)
+        links = []
+        for width, media in bg_media(widths):
+            href = url if width is None else f"{prefix}responsive/{stem}-w{width}.webp"
+            links.append(soup.new_tag("link", attrs={**attrs, "href": href, "media": media}))
+        return links
+    avif = el.parent.find("source", type="image/avif") if el.name == "img" and el.parent.name == "picture" else None
+    if avif is not None:
+        # Precargar lo mismo que va a elegir el <picture>; sin AVIF se ignora
+        attrs["type"] = "image/avif"
+        attrs["href"] = avif["srcset"].split(",")[0].split()[0]
+        if "," in avif["srcset"]:
+            attrs["imagesrcset"] = avif["srcset"]
+            attrs["imagesizes"] = el.get("sizes", "100vw")
+    elif el.name == "img" and el.get("srcset"):
+        attrs["imagesrcset"] = el["srcset"]
+        attrs["imagesizes"] = el.get("sizes", "100vw")
+    return [soup.new_tag("link", attrs=attrs)]
+
+
+def _set(el, key: str, value) -> bool:
+    """Pone (o con None quita) un atributo; True si cambió."""
+    if value is None:
+        return el.attrs.pop(key, None) is not None
+    if el.get(key) == value:
+        return False
+    el[key] = value
+    return True
+
+
+@transform("lcp_priority", scope="pages")
+def lcp_priority(soup, ctx):
+    changed = False
+    atf = above_the_fold(soup)
+    lcp, url = lcp_candidate(atf)
+
+    old = soup.find_all("link", attrs={"data-lcp": True})
+    new = preload_links(soup, lcp, url) if lcp is not None and url and soup.head is not None else []
+    if list(map(str, old)) != list(map(str, new)):
+        for link in old:
+            link.decompose()
+        # Antes de las hojas de estilo, para que la descarga arranque cuanto antes
+        anchor = soup.head.find("meta", charset=True) if new else None
+        for link in new:
+            if anchor is None:
+                soup.head.insert(0, link)
+            else:
+                anchor.insert_after(link)
+            anchor = link
+        changed = True
+    if lcp is not None and lcp.name == "img":
+        changed |= _set(lcp, "fetchpriority", "high")
+
+    atf_imgs = [el for el in atf if el.name == "img"]
+    eager = set(map(id, atf_imgs[:ATF_EAGER_LIMIT]))
+    for img in soup.find_all("img"):
+        if img is lcp:
+            changed |= _set(img, "loading", None)
+            changed |= _set(img, "decoding", None)
+            continue
+        if img.get("fetchpriority") == "high":
+            # Un LCP anterior que ya no lo es
+            changed |= _set(img, "fetchpriority", None)
+        changed |= _set(img, "loading", None if id(img) in eager else "lazy")
+        changed |= _set(img, "decoding", "async")
+    return changed
+
+
+TRANSFORMS = ["lcp_priority"]
+
+
+if __name__ == "__main__":
+    run_pipeline(TRANSFORMS)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Minifica el HTML del build (dist/) y deshace el inflado de soup.prettify():
+- Colapsa los espacios en blanco y los elimina alrededor de tags de bloque
+- Quita comentarios (salvo los condicionales <!--[if ...]>)
+- Acorta atributos booleanos: defer="True" -> defer, async="" -> async
+- Cierra los elementos vacíos sin "/>" y recorta el texto de <title>
+
+El contenido de <pre>, <textarea>, <script> y <style> se conserva byte a
+byte; solo se normaliza su tag de apertura (y se vacía el cuerpo en blanco
+de un <script src>).
+"""
+import argparse
+import re
+from pathlib import Path
+
+from build_common import DIST_DIR, atomic_write_text
+
+PRESERVE_RE = re.compile(
+    r"(?P<open><(?P<tag>pre|textarea|script|style)\b(?:\"[^\"]*\"|'[^']*'|[^'\">])*>)(?P<body>.*?)(?P<close></(?P=tag)\s*>)",
+    re.IGNORECASE | re.DOTALL,
+)
+COMMENT_RE = re.compile(r"<!--(?!\[if|<!\[endif).*?-->", re.DOTALL)
+TAG_RE = re.compile(r"<(?:\"[^\"]*\"|'[^']*'|[^'\">])+>")
+TAG_NAME_RE = re.compile(r"^<(/?)([a-zA-Z][\w:-]*)(?=[\s/>])")
+ATTR_RE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+# Un tag entero (se deja como está) o un tramo de espacios del texto entre tags
+TAG_OR_SPACE_RE = re.compile(rf"({TAG_RE.pattern})|\s+")
+TITLE_RE = re.compile(r"(<title\b[^>]*>)\s*(.*?)\s*(</title>)", re.IGNORECASE | re.DOTALL)
+
+BOOLEAN_ATTRS = {
+    "allowfullscreen", "async", "autofocus", "autoplay", "checked", "controls", "default", "defer",
+    "disabled", "formnovalidate", "ismap", "itemscope", "loop", "multiple", "muted", "nomodule",
+    "novalidate", "open", "playsinline", "readonly", "required", "reversed", "selected",
+}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# Alrededor de estos tags el espacio en blanco no se renderiza
+BLOCK_TAGS = (
+    "!doctype|html|head|body|title|meta|link|script|style|noscript|base|main|header|footer|nav|section|"
+    "article|aside|div|p|h[1-6]|ul|ol|li|dl|dt|dd|table|thead|tbody|tfoot|tr|th|td|caption|colgroup|col|"
+    "form|fieldset|legend|figure|figcaption|blockquote|hr|br|pre|video|audio|source|track|picture|iframe|"
+    "template|address|details|summary|option|optgroup|select"
+)
+BLOCK_RE = re.compile(
+    rf"\s*(</?(?:{BLOCK_TAGS})\b(?:\"[^\"]*\"|'[^']*'|[^'\">])*>)\s*",
+    re.IGNORECASE,
+)
+# Bloques preservados alrededor de los cuales se puede quitar el espacio
+BLOCK_PRESERVED = {"pre", "script", "style"}
+
+
+def minify_tag(tag: str) -> str:
+    m = TAG_NAME_RE.match(tag)
+    if not m:
+        # <!DOCTYPE>, o tags raros como <id="page-top">: solo colapsar espacios
+        return re.sub(r"\s+", " ", tag)
+    closing, name = m.group(1), m.group(2)
+    if closing:
+        return f"</{name}>"
+    inner = tag[m.end():-1].rstrip()
+    slash = inner.endswith("/")
+    if slash:
+        inner = inner[:-1]
+    parts = [name]
+    for attr in ATTR_RE.finditer(inner):
+        key, value = attr.group(1), attr.group(2)
+        if value is None or key.lower() in BOOLEAN_ATTRS:
+            # Cualquier valor (incluso "False") activa un booleano
+            parts.append(key)
+        else:
+            parts.append(f"{key}={value}")
+    # En SVG el "/>" importa; en los elementos vacíos de HTML sobra
+    self_closing = "/" if slash and name.lower() not in VOID_TAGS else ""
+    return "<" + " ".join(parts) + self_closing + ">"
+
+
+def minify_markup(text: str) -> str:
+    """Minifica un tramo de HTML sin bloques preservados."""
+    text = COMMENT_RE.sub("", text)
+    text = TAG_RE.sub(lambda m: minify_tag(m.group(0)), text)
+    # Solo el texto entre tags: los valores de atributos (title, alt, content) quedan intactos
+    text = TAG_OR_SPACE_RE.sub(lambda m: m.group(1) or " ", text)
+    return BLOCK_RE.sub(r"\1", text)
+
+
+def minify_html(html: str) -> str:
+    out = []
+    pos = 0
+    for m in PRESERVE_RE.finditer(html):
+        segment = minify_markup(html[pos:m.start()])
+        tag = m.group("tag").lower()
+        if tag in BLOCK_PRESERVED:
+            segment = segment.rstrip()
+        if out and out[-1][1] in BLOCK_PRESERVED:
+            segment = segment.lstrip()
+        out.append((segment, None))
+
+        opening = minify_tag(m.group("open"))
+        body = m.group("body")
+        if tag == "script" and "src=" in opening and not body.strip():
+            body = ""
+        out.append((opening + body + f"</{m.group('tag')}>", tag))
+        pos = m.end()
+    tail = minify_markup(html[pos:])
+    if out and out[-1][1] in BLOCK_PRESERVED:
+        tail = tail.lstrip()
+    out.append((tail, None))
+    html = "".join(s for s, _ in out).strip()
+    return TITLE_RE.sub(r"\1\2\3", html)
+
+
+def minify_file(path: Path) -> tuple[int, int]:
+    original = path.read_text(encoding="utf-8")
+    minified = minify_html(original)
+    if minified != original:
+        atomic_write_text(path, minified)
+    return len(original.encode("utf-8")), len(minified.encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minifica el HTML del build.")
+    parser.add_argument("--root", type=Path, default=DIST_DIR, help="directorio a minificar (por defecto dist/)")
+    args = parser.parse_args()
+
+    root = args.root.resolve()
+    if not root.exists():
+        print(f"❌ No existe {root}. Corré antes: python scripts/inject_head_partial.py --build")
+        return
+
+    before = after = 0
+    pages = sorted(root.rglob("*.html"))
+    for page in pages:
+        b, a = minify_file(page)
+        before += b
+        after += a
+    saved = (1 - after / before) * 100 if before else 0
+    print(f"✨ {len(pages)} páginas minificadas: {before / 1024:.0f} KB → {after / 1024:.0f} KB ({saved:.1f}% menos)")
+
+
+if __name__ == "__main__":
+    main()
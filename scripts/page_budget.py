@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Presupuesto de peso y de requests por página.
+
+Para cada página resuelve el grafo completo de recursos: partials de
+data-include y data-head-include, <link>, <script>, <img>, <video>/<source>
+y póster, url() de estilos inline y de las hojas locales (con sus @import).
+Informa bytes transferidos (el propio HTML incluido) y cantidad de requests,
+y termina con código 1 si alguna página supera el presupuesto, para cortar
+el deploy en CI.
+
+Los bytes de recursos de texto se estiman comprimidos con gzip (lo que
+manda el servidor); los binarios, con su tamaño en disco. Los recursos
+externos cuentan como request pero no suman bytes. Las url() de las hojas
+se cuentan todas aunque su selector no aplique en la página: es una cota
+superior.
+
+Presupuesto por defecto con --max-kb/--max-requests; con --config se puede
+pasar un JSON {"default": {"kb": ..., "requests": ...}, "pages": {"index.html": {...}}}.
+"""
+import argparse
+import gzip
+import json
+import re
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+from bs4 import BeautifulSoup
+
+from build_common import DIST_DIR, ROOT, iter_html_files
+from inject_head_partial import HEAD_INCLUDE_RE, INCLUDE_RE, inline_partials, resolve_partial
+
+DEFAULT_MAX_KB = 3000
+DEFAULT_MAX_REQUESTS = 60
+TEXT_EXTENSIONS = {".html", ".css", ".js", ".svg", ".json", ".xml", ".txt", ".map"}
+EXTERNAL_RE = re.compile(r"^(?:[a-z][a-z0-9+.-]*:)?//", re.IGNORECASE)
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)|@import\s+(['"])([^'"]+)\3""", re.IGNORECASE)
+# rel de <link> que disparan una descarga
+FETCHING_RELS = {"stylesheet", "preload", "icon", "shortcut", "apple-touch-icon", "modulepreload", "manifest"}
+
+
+class Resource(NamedTuple):
+    url: str
+    path: Path  # None si es externo
+    size: int   # bytes transferidos estimados (0 si falta o es externo)
+    missing: bool
+
+
+class PageReport(NamedTuple):
+    rel: str
+    resources: list
+    document: int  # bytes transferidos del propio HTML
+
+    @property
+    def requests(self) -> int:
+        # El propio documento también es un request
+        return len(self.resources) + 1
+
+    @property
+    def transfer(self) -> int:
+        return self.document + sum(r.size for r in self.resources)
+
+    @property
+    def external(self) -> int:
+        return sum(1 for r in self.resources if r.path is None)
+
+    @property
+    def missing(self) -> list:
+        return [r for r in self.resources if r.missing]
+
+
+def transfer_size(path: Path, cache: dict) -> int:
+    if path not in cache:
+        if path.suffix.lower() in TEXT_EXTENSIONS:
+            cache[path] = len(gzip.compress(path.read_bytes(), compresslevel=6))
+        else:
+            cache[path] = path.stat().st_size
+    return cache[path]
+
+
+def is_fetchable(ref: str) -> bool:
+    return bool(ref) and not ref.startswith(("data:", "#", "mailto:", "tel:", "javascript:", "about:"))
+
+
+def css_refs(text: str) -> list[str]:
+    return [m.group(2) or m.group(4) for m in CSS_URL_RE.finditer(text)]
+
+
+def video_refs(video) -> list[str]:
+    """Lo que descarga un <video> al cargar la página (nada si preload=none sin autoplay)."""
+    refs = [video["poster"]] if video.get("poster") else []
+    if video.get("preload") == "none" and not video.has_attr("autoplay"):
+        return refs
+    if video.get("src"):
+        return refs + [video["src"]]
+    # El navegador toma la primera <source> compatible; en escritorio, la primera sin media query
+    sources = [s for s in video.find_all("source") if s.get("src")]
+    chosen = next((s for s in sources if not s.get("media")), sources[0] if sources else None)
+    return refs + ([chosen["src"]] if chosen else [])
+
+
+def page_refs(soup) -> list[str]:
+    refs = []
+    for link in soup.find_all("link", href=True):
+        if FETCHING_RELS & {r.lower() for r in link.get("rel", [])}:
+            refs.append(link["href"])
+    refs += [s["src"] for s in soup.find_all("script", src=True)]
+    refs += [img["src"] for img in soup.find_all("img", src=True)]
+    refs += [s["src"] for s in soup.find_all(["iframe", "embed"], src=True)]
+    for video in soup.find_all("video"):
+        refs += video_refs(video)
+    for tag in soup.find_all(style=True):
+        refs += css_refs(tag["style"])
+    for style in soup.find_all("style"):
+        refs += css_refs(style.get_text())
+    return refs
+
+
+def partial_includes(text: str, page: Path) -> list[tuple[str, Path]]:
+    """Partials que el fuente pide en tiempo de ejecución (head-loader.js y main.js), anidados incluidos."""
+    found, queue = [], [text]
+    while queue:
+        chunk = queue.pop()
+        for ref in HEAD_INCLUDE_RE.findall(chunk) + [m.group("ref") for m in INCLUDE_RE.finditer(chunk)]:
+            path = resolve_partial(ref, page)
+            if path.is_file() and all(path != p for _, p in found):
+                found.append((ref, path))
+                queue.append(path.read_text(encoding="utf-8"))
+    return found
+
+
+def analyze_page(page: Path, root: Path, partial_cache: dict, size_cache: dict) -> PageReport:
+    text = page.read_text(encoding="utf-8")
+    resources = {}
+    if root == ROOT:
+        # En el fuente los partials se piden aparte: cuentan como requests
+        for ref, path in partial_includes(text, page):
+            resources[path.as_posix()] = Resource(ref, path, transfer_size(path, size_cache), False)
+        text = inline_partials(text, page, partial_cache)
+    soup = BeautifulSoup(text, "html.parser")
+    # <noscript> repite los <link> de critical_css.py
+    for noscript in soup.find_all("noscript"):
+        noscript.decompose()
+
+    pending = [(ref, page) for ref in page_refs(soup)]
+    while pending:
+        ref, base = pending.pop()
+        if not is_fetchable(ref):
+            continue
+        if EXTERNAL_RE.match(ref):
+            resources.setdefault(ref, Resource(ref, None, 0, False))
+            continue
+        path = resolve_partial(ref, base, root)
+        key = path.as_posix()
+        if key in resources:
+            continue
+        if not path.is_file():
+            resources[key] = Resource(ref, path, 0, True)
+            continue
+        resources[key] = Resource(ref, path, transfer_size(path, size_cache), False)
+        if path.suffix.lower() == ".css":
+            css = path.read_text(encoding="utf-8", errors="ignore")
+            pending.extend((r, path) for r in css_refs(css))
+    # El HTML tal como lo sirve el servidor (en el fuente, sin los partials, que ya cuentan aparte)
+    return PageReport(page.relative_to(root).as_posix(), list(resources.values()), transfer_size(page, size_cache))
+
+
+def iter_pages(root: Path):
+    if root == ROOT:
+        yield from iter_html_files(include_partials=False)
+        return
+    for page in sorted(root.rglob("*.html")):
+        if page.relative_to(root).parts[0] != "partials":
+            yield page
+
+
+def load_budgets(config: Path, max_kb: int, max_requests: int):
+    default = {"kb": max_kb, "requests": max_requests}
+    pages = {}
+    if config:
+        data = json.loads(config.read_text(encoding="utf-8"))
+        default.update(data.get("default", {}))
+        pages = data.get("pages", {})
+    return lambda rel: {**default, **pages.get(rel, {})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peso y requests por página, con presupuesto para CI.")
+    parser.add_argument("--dist", action="store_true", help="analizar dist/ en lugar del fuente")
+    parser.add_argument("--max-kb", type=int, default=DEFAULT_MAX_KB, help="KB transferidos por página")
+    parser.add_argument("--max-requests", type=int, default=DEFAULT_MAX_REQUESTS, help="requests por página")
+    parser.add_argument("--config", type=Path, help="JSON con presupuestos por página")
+    parser.add_argument("--top", type=int, default=0, help="listar los N recursos más pesados de cada página")
+    args = parser.parse_args()
+
+    root = DIST_DIR if args.dist else ROOT
+    if not root.exists():
+        print("❌ No existe dist/. Corré antes: python scripts/inject_head_partial.py --build")
+        sys.exit(2)
+    budget_for = load_budgets(args.config, args.max_kb, args.max_requests)
+
+    partial_cache, size_cache = {}, {}
+    reports = [analyze_page(page, root, partial_cache, size_cache) for page in iter_pages(root)]
+    reports.sort(key=lambda r: r.transfer, reverse=True)
+
+    over = []
+    print(f"{'Página':<45}{'KB':>9}{'Req':>6}{'Ext':>5}{'Faltan':>8}")
+    for report in reports:
+        budget = budget_for(report.rel)
+        kb = report.transfer / 1024
+        failed = kb > budget["kb"] or report.requests > budget["requests"]
+        mark = "  ✗" if failed else ""
+        print(f"{report.rel:<45}{kb:>9.0f}{report.requests:>6}{report.external:>5}{len(report.missing):>8}{mark}")
+        for res in sorted(report.resources, key=lambda r: r.size, reverse=True)[:args.top]:
+            print(f"    {res.size / 1024:>8.0f} KB  {res.url}")
+        if failed:
+            over.append((report, budget))
+
+    if over:
+        print(f"\n❌ {len(over)} páginas superan el presupuesto:")
+        for report, budget in over:
+            print(f"  {report.rel}: {report.transfer / 1024:.0f}/{budget['kb']} KB, "
+                  f"{report.requests}/{budget['requests']} requests")
+        sys.exit(1)
+    print(f"\n✅ {len(reports)} páginas dentro del presupuesto.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Placeholders LQIP (vista previa mínima) para las imágenes de carruseles y
+galerías, embebidos como data URI: se ve una versión borrosa mientras baja el
+WebP completo, sin requests extra.
+
+Cada imagen se reduce a PLACEHOLDER_WIDTH px y se codifica como WebP de baja
+calidad (~200-400 bytes); el navegador la escala con suavizado y queda
+desenfocada. Se generan en paralelo y se cachean en
+.cache/lqip-manifest.json por hash de contenido.
+
+Dónde se inyecta:
+- <img> de carrusel: background-image con el data URI en su style.
+- Fondos inline de galería (style="background: url(...)"): se define
+  --lqip y se agrega una segunda capa, background-image: url(foto), var(--lqip).
+  Las reglas de responsive_images.py repiten var(--lqip) en cada variante.
+"""
+import argparse
+import base64
+import io
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from build_common import (
+    ROOT,
+    default_workers,
+    file_digest,
+    iter_html_files,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+from html_pipeline import run_pipeline, transform
+
+MANIFEST = "lqip-manifest.json"
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_QUALITY = 30
+# Carruseles (carousel.js y main.js) y galerías de fondos de las páginas de obra
+IMG_SELECTORS = [".my-carousel-slide img", ".carousel img"]
+BG_SELECTORS = [".imagenes [style]", ".my-carousel-slide [style]"]
+BG_URL_RE = re.compile(r"background(?:-image)?\s*:[^;]*?url\(\s*['\"]?([^'\")]+)['\"]?\s*\)", re.IGNORECASE)
+# Declaraciones de un style; los url(...) pueden tener ";" (data:image/webp;base64)
+DECL_RE = re.compile(r"(?:[^;(]|\([^)]*\))+")
+# Las que agrega este script (sin espacios, a diferencia de las escritas a mano)
+OWN_DECL_RE = re.compile(
+    r"--lqip:|background-image:url\(data:|background-image:url\([^)]*\),var\(--lqip\)$|"
+    r"background-size:cover$|background-repeat:no-repeat$"
+)
+
+_cache = None
+
+
+def make_placeholder(src: Path) -> str:
+    """Data URI WebP de PLACEHOLDER_WIDTH px (se ejecuta en un proceso del pool)."""
+    from PIL import Image
+
+    with Image.open(src) as img:
+        img.draft("RGB", (PLACEHOLDER_WIDTH * 4, PLACEHOLDER_WIDTH * 4))
+        img = img.convert("RGB")
+        height = max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))
+        small = img.resize((PLACEHOLDER_WIDTH, height), Image.LANCZOS)
+    buf = io.BytesIO()
+    small.save(buf, "WEBP", quality=PLACEHOLDER_QUALITY, method=6)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def _resolve(ref: str, page: Path):
+    from inject_head_partial import resolve_partial
+
+    if not ref or ref.startswith(("data:", "http:", "https:", "//")):
+        return None
+    path = resolve_partial(ref, page)
+    return path if path.is_file() else None
+
+
+def targets(soup, page: Path):
+    """[(tag, tipo, ruta de la imagen)] de las imágenes que llevan placeholder."""
+    found = []
+    for img in (t for sel in IMG_SELECTORS for t in soup.select(sel)):
+        path = _resolve(img.get("src", ""), page)
+        if path:
+            found.append((img, "img", path))
+    for tag in (t for sel in BG_SELECTORS for t in soup.select(sel)):
+        m = BG_URL_RE.search(tag["style"])
+        path = _resolve(m.group(1), page) if m else None
+        if path:
+            found.append((tag, "bg", path))
+    return found
+
+
+def referenced_images() -> set[Path]:
+    from bs4 import BeautifulSoup
+
+    images = set()
+    for page in iter_html_files(include_partials=False):
+        soup = BeautifulSoup(page.read_text(encoding="utf-8"), "html.parser")
+        images.update(path for _, _, path in targets(soup, page))
+    return images
+
+
+def generate(paths=None, workers: int = None, force: bool = False) -> int:
+    """Genera los placeholders que faltan o cambiaron; devuelve cuántos se generaron."""
+    global _cache
+    paths = sorted(referenced_images() if paths is None else paths)
+    manifest = load_manifest(MANIFEST)
+    pending = []
+    for path in paths:
+        key = path.relative_to(ROOT).as_posix()
+        entry = manifest.get(key, {})
+        digest = entry.get("sha256") if entry.get("stat") == stat_key(path) else file_digest(path)
+        if force or entry.get("sha256") != digest:
+            pending.append((path, key, digest))
+        elif entry.get("stat") != stat_key(path):
+            entry["stat"] = stat_key(path)
+
+    with ProcessPoolExecutor(max_workers=workers or default_workers()) as pool:
+        futures = {pool.submit(make_placeholder, path): (path, key, digest) for path, key, digest in pending}
+        for future in as_completed(futures):
+            path, key, digest = futures[future]
+            try:
+                uri = future.result()
+            except Exception as e:
+                print(f"  ✗ {key}: {e}")
+                continue
+            manifest[key] = {"sha256": digest, "stat": stat_key(path), "uri": uri}
+            print(f"  ✓ {key} ({len(uri)} bytes)")
+    save_manifest(MANIFEST, manifest)
+    _cache = manifest
+    return len(pending)
+
+
+def placeholder_for(path: Path):
+    global _cache
+    if _cache is None:
+        _cache = load_manifest(MANIFEST)
+    entry = _cache.get(path.relative_to(ROOT).as_posix())
+    return entry["uri"] if entry else None
+
+
+def strip_placeholder(style: str) -> str:
+    """El style sin las declaraciones de un placeholder anterior."""
+    decls = (d.strip() for d in DECL_RE.findall(style))
+    return "; ".join(d for d in decls if d and not OWN_DECL_RE.match(d))
+
+
+@transform("lqip_placeholders", scope="pages", prepare=generate)
+def lqip_placeholders(soup, ctx):
+    modified = False
+    for tag, kind, path in targets(soup, ctx.path):
+        uri = placeholder_for(path)
+        if not uri:
+            continue
+        base = strip_placeholder(tag.get("style", ""))
+        if kind == "img":
+            extra = f"background-image:url({uri});background-size:cover;background-repeat:no-repeat"
+        else:
+            photo = BG_URL_RE.search(base).group(1)
+            extra = f"--lqip:url({uri});background-image:url('{photo}'),var(--lqip)"
+        style = f"{base}; {extra}" if base else extra
+        if tag.get("style") != style:
+            tag["style"] = style
+            modified = True
+    return modified
+
+
+TRANSFORMS = ["lqip_placeholders"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Placeholders LQIP para carruseles y galerías.")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--force", action="store_true", help="regenerar todos los placeholders")
+    parser.add_argument("--skip-rewrite", action="store_true", help="solo generar, sin tocar el HTML")
+    args = parser.parse_args()
+
+    print("🌫  Generando placeholders...")
+    count = generate(workers=args.workers, force=args.force)
+    print(f"   {count} generados")
+    if not args.skip_rewrite:
+        # El prepare del pipeline vuelve a llamar a generate(): con el manifest al día no hace nada
+        run_pipeline(TRANSFORMS, workers=args.workers)
+
+
+if __name__ == "__main__":
+    import placeholders
+
+    placeholders.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escribe hermanos .gz y .br de cada asset de texto del build (HTML, CSS, JS,
+SVG, partials...) con compresión máxima, para que el servidor o la CDN
+sirvan los bytes precomprimidos en lugar de comprimir en cada request.
+
+Corre en un pool de procesos y, como convert_to_webp.py, guarda el hash de
+cada archivo en .cache/precompress-manifest.json para no recomprimir lo que
+no cambió. Brotli es opcional (pip install brotli); sin él solo se genera .gz.
+"""
+import argparse
+import gzip
+import io
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from build_common import (
+    DIST_DIR,
+    ROOT,
+    atomic_write_bytes,
+    default_workers,
+    file_digest,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+
+MANIFEST = "precompress-manifest.json"
+TEXT_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".svg", ".json", ".xml", ".txt", ".map", ".webmanifest"}
+# Por debajo de esto el encabezado de la compresión no compensa
+MIN_SIZE = 256
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def brotli_available() -> bool:
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def gzip_bytes(data: bytes) -> bytes:
+    buf = io.BytesIO()
+    # mtime=0 y sin nombre: la salida depende solo del contenido
+    with gzip.GzipFile(filename="", mode="wb", fileobj=buf, compresslevel=9, mtime=0) as gz:
+        gz.write(data)
+    return buf.getvalue()
+
+
+def brotli_bytes(data: bytes) -> bytes:
+    import brotli
+
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+
+
+def compress_file(path: Path, formats: list[str]) -> dict:
+    """Escribe los hermanos comprimidos de `path` (en un proceso del pool)."""
+    data = path.read_bytes()
+    encoders = {"gzip": gzip_bytes, "br": brotli_bytes}
+    sizes = {}
+    for fmt in formats:
+        target = path.with_name(path.name + SUFFIXES[fmt])
+        packed = encoders[fmt](data)
+        if len(packed) < len(data):
+            atomic_write_bytes(target, packed)
+            sizes[fmt] = len(packed)
+        elif target.exists():
+            # No conviene: que el servidor mande el original
+            target.unlink()
+    return sizes
+
+
+def iter_text_assets(root: Path):
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() in TEXT_EXTENSIONS and path.stat().st_size >= MIN_SIZE:
+            yield path
+
+
+def remove_orphans(root: Path) -> int:
+    """Borra .gz/.br cuyo original ya no existe (por ejemplo, tras re-fingerprintear)."""
+    removed = 0
+    for suffix in SUFFIXES.values():
+        for packed in root.rglob(f"*{suffix}"):
+            original = packed.with_name(packed.name[: -len(suffix)])
+            if original.suffix.lower() in TEXT_EXTENSIONS and not original.exists():
+                packed.unlink()
+                removed += 1
+    return removed
+
+
+def plan(root: Path, manifest: dict, formats: list[str], force: bool = False):
+    pending = []
+    for path in iter_text_assets(root):
+        key = path.relative_to(ROOT).as_posix() if path.is_relative_to(ROOT) else path.as_posix()
+        entry = manifest.get(key, {})
+        digest = entry.get("sha256") if entry.get("stat") == stat_key(path) else file_digest(path)
+        siblings_ok = all(path.with_name(path.name + SUFFIXES[f]).exists() for f in entry.get("formats", {}))
+        if force or entry.get("sha256") != digest or set(entry.get("checked", [])) != set(formats) or not siblings_ok:
+            pending.append((path, key, digest))
+        else:
+            # Mismo contenido con otro mtime (dist/ se reescribe en cada build)
+            entry["stat"] = stat_key(path)
+    return pending
+
+
+def precompress(root: Path = DIST_DIR, workers: int = None, force: bool = False, use_brotli: bool = True):
+    formats = ["gzip"] + (["br"] if use_brotli and brotli_available() else [])
+    if use_brotli and "br" not in formats:
+        print("  ⚠ brotli no está instalado (pip install brotli): solo se genera .gz")
+
+    manifest = load_manifest(MANIFEST)
+    pending = plan(root, manifest, formats, force)
+    original_total = packed_total = 0
+    with ProcessPoolExecutor(max_workers=workers or default_workers()) as pool:
+        futures = {pool.submit(compress_file, path, formats): (path, key, digest) for path, key, digest in pending}
+        for future in as_completed(futures):
+            path, key, digest = futures[future]
+            try:
+                sizes = future.result()
+            except OSError as e:
+                print(f"  ✗ Error al comprimir {path}: {e}")
+                continue
+            manifest[key] = {"sha256": digest, "stat": stat_key(path), "checked": formats, "formats": sizes}
+            original_total += path.stat().st_size
+            packed_total += min(sizes.values(), default=path.stat().st_size)
+
+    removed = remove_orphans(root)
+    # dist/ se borra en cada build y los nombres con hash cambian: lo que ya no existe se olvida
+    for key in [k for k in manifest if not (ROOT / k).is_file()]:
+        del manifest[key]
+    save_manifest(MANIFEST, manifest)
+    return len(pending), original_total, packed_total, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera .gz/.br de los assets de texto del build.")
+    parser.add_argument("--root", type=Path, default=DIST_DIR, help="directorio a comprimir (por defecto dist/)")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--force", action="store_true", help="ignorar el manifiesto y recomprimir todo")
+    parser.add_argument("--no-brotli", action="store_true", help="generar solo .gz")
+    args = parser.parse_args()
+
+    root = args.root.resolve()
+    if not root.exists():
+        print(f"❌ No existe {root}. Corré antes: python scripts/inject_head_partial.py --build")
+        return
+
+    count, original, packed, removed = precompress(root, args.workers, args.force, not args.no_brotli)
+    if count:
+        print(f"🗜  {count} archivos comprimidos: {original / 1024:.0f} KB → {packed / 1024:.0f} KB")
+    else:
+        print("🗜  Todo al día.")
+    if removed:
+        print(f"  🗑 {removed} comprimidos huérfanos eliminados")
+
+
+if __name__ == "__main__":
+    main()
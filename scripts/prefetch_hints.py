@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pistas de navegación para dist/: arma el grafo de links entre páginas (con
+los partials ya inlineados, así que la navegación y el footer cuentan) y en
+cada página declara cuáles son las siguientes más probables.
+
+- <script type="speculationrules">: prefetch de las MAX_PAGES páginas más
+  probables y prerender de la primera al pasar el mouse (eagerness
+  "moderate"). Los navegadores sin soporte lo ignoran.
+- <link rel="prefetch" as="image">: la imagen principal (el preload data-lcp
+  de lcp_priority.py o, sin él, su mismo candidato a LCP) de las MAX_IMAGES
+  primeras, que es lo que más tarda en pintar la página siguiente. Solo una
+  variante responsive de HERO_MAX_WIDTH como mucho y hasta MAX_PREFETCH_KB
+  por página: un original a tamaño completo queda para el prerender, que ya
+  elige la variante del viewport.
+
+La probabilidad sale del propio grafo: los links que están en casi todas las
+páginas (navegación, footer) pesan poco frente a los del contenido, que son
+los que muestran hacia dónde sigue el recorrido (obras -> construimos ->
+sus obras), y desde una obra lo probable es volver a su listado. A igual
+peso gana la página más enlazada del sitio.
+
+Corre antes de fingerprint_assets.py, que después versiona las imágenes.
+"""
+import argparse
+import json
+import os
+import urllib.parse
+from collections import Counter
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from build_common import DIST_DIR, atomic_write_text
+from critical_css import above_the_fold
+from inject_head_partial import resolve_partial
+from lcp_priority import lcp_candidate
+from page_budget import EXTERNAL_RE, is_fetchable
+from responsive_images import VARIANT_RE, existing_variants, split_img_ref
+
+MAX_PAGES = 4
+MAX_IMAGES = 2
+# Enlazada desde al menos esta fracción de las páginas: es navegación, no contenido
+SITE_WIDE_SHARE = 0.5
+SITE_WIDE_WEIGHT = 0.25
+# Volver al listado que enlaza la página (construimos/Osde -> construimos) pesa
+# como un link del contenido
+BACK_WEIGHT = 1
+# De las variantes responsive se prefetchea la más grande hasta este ancho (la
+# de un teléfono); el original nunca
+HERO_MAX_WIDTH = 768
+# Lo que se descarga por adelantado desde una página, sumando sus imágenes
+MAX_PREFETCH_KB = 200
+MARKER = "data-prefetch"
+
+
+def page_target(href: str, page: Path, root: Path):
+    """Página de dist/ a la que lleva el link, o None (externo, asset, ancla)."""
+    if not is_fetchable(href) or EXTERNAL_RE.match(href):
+        return None
+    path = resolve_partial(href.split("#")[0].split("?")[0], page, root)
+    for candidate in (path, path.with_name(path.name + ".html"), path / "index.html"):
+        if candidate.suffix == ".html" and candidate.is_file() and candidate != page:
+            return candidate
+    return None
+
+
+def _srcset_candidates(srcset: str) -> list[tuple[int, str]]:
+    candidates = []
+    for candidate in srcset.split(","):
+        url, _, descriptor = candidate.strip().partition(" ")
+        if url and descriptor.strip().endswith("w"):
+            candidates.append((int(descriptor.strip()[:-1]), url))
+    return candidates
+
+
+def hero_candidates(soup) -> list[tuple[int, str]]:
+    """
+    [(ancho, url)] de las variantes responsive de la imagen principal: las de
+    los preload data-lcp o, si la página no los tiene (no se le aplicó
+    lcp_priority.py), las de su candidato a LCP.
+    """
+    candidates = []
+    for link in soup.find_all("link", attrs={"data-lcp": True, "rel": "preload"}):
+        # Un <img> trae imagesrcset; un fondo, un preload por variante con su media
+        candidates += _srcset_candidates(link.get("imagesrcset", ""))
+        m = VARIANT_RE.match(link.get("href", "").rsplit("/", 1)[-1])
+        if m:
+            candidates.append((int(m.group("width")), link["href"]))
+    if candidates:
+        return candidates
+    el, url = lcp_candidate(above_the_fold(soup))
+    if el is None or not url:
+        return []
+    if el.name == "img":
+        return _srcset_candidates(el.get("srcset", ""))
+    ref = split_img_ref(url)
+    if not ref:
+        return []
+    prefix, name = ref
+    stem = urllib.parse.quote(Path(name).stem)
+    return [(w, f"{prefix}responsive/{stem}-w{w}.webp") for w in existing_variants(name)]
+
+
+def hero_image(soup):
+    """
+    URL (relativa a la página) de la variante responsive de su imagen principal
+    que se prefetchea; None si no tiene variantes (el original no se prefetchea).
+    """
+    candidates = hero_candidates(soup)
+    if not candidates:
+        return None
+    fitting = [c for c in candidates if c[0] <= HERO_MAX_WIDTH]
+    return (max(fitting) if fitting else min(candidates))[1]
+
+
+def build_graph(pages: list, root: Path) -> tuple[dict, dict, dict]:
+    """(links por página, href con que se enlazó cada destino, imagen principal por página)."""
+    links, hrefs, heroes = {}, {}, {}
+    for page in pages:
+        soup = BeautifulSoup(page.read_text(encoding="utf-8"), "html.parser")
+        counts = Counter()
+        for a in soup.find_all("a", href=True):
+            target = page_target(a["href"], page, root)
+            if target is not None:
+                counts[target] += 1
+                hrefs.setdefault((page, target), a["href"])
+        links[page] = counts
+        hero = hero_image(soup)
+        if hero and is_fetchable(hero) and not EXTERNAL_RE.match(hero):
+            heroes[page] = resolve_partial(hero, page, root)
+    return links, hrefs, heroes
+
+
+def rank(links: dict) -> dict:
+    """Páginas siguientes de cada página, de más a menos probable."""
+    indegree = Counter(target for counts in links.values() for target in counts)
+    site_wide = {t for t, n in indegree.items() if n >= SITE_WIDE_SHARE * len(links)}
+    ranked = {}
+    for page, counts in links.items():
+        order = {target: i for i, target in enumerate(counts)}
+        scores = {t: n * (SITE_WIDE_WEIGHT if t in site_wide else 1) for t, n in counts.items()}
+        for parent, parent_counts in links.items():
+            if page in parent_counts and page not in site_wide and parent != page:
+                scores[parent] = scores.get(parent, 0) + BACK_WEIGHT
+                order.setdefault(parent, len(order))
+        ranked[page] = sorted(scores, key=lambda t: (-scores[t], -indegree[t], order[t]))[:MAX_PAGES]
+    return ranked
+
+
+def hints(page: Path, root: Path, targets: list, hrefs: dict, heroes: dict) -> str:
+    # Con el mismo href que usa la página, para que el prefetch coincida con la navegación
+    urls = [hrefs.get((page, t)) or "/" + t.relative_to(root).with_suffix("").as_posix() for t in targets]
+    rules = {"prefetch": [{"source": "list", "urls": urls}]}
+    if urls:
+        rules["prerender"] = [{"source": "list", "urls": urls[:1], "eagerness": "moderate"}]
+    out = [f'<script {MARKER} type="speculationrules">{json.dumps(rules, ensure_ascii=False)}</script>']
+    budget = MAX_PREFETCH_KB * 1024
+    for target in targets[:MAX_IMAGES]:
+        if target not in heroes or not heroes[target].is_file():
+            continue
+        size = heroes[target].stat().st_size
+        if size > budget:
+            continue
+        budget -= size
+        href = Path(os.path.relpath(heroes[target], page.parent)).as_posix()
+        out.append(f'<link as="image" {MARKER} href="{href}" rel="prefetch"/>')
+    return "\n".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefetch y speculation rules según el grafo de navegación.")
+    parser.add_argument("--dist", type=Path, default=DIST_DIR, help="directorio de build")
+    parser.add_argument("--dry-run", action="store_true", help="solo mostrar las páginas elegidas")
+    args = parser.parse_args()
+
+    root = args.dist.resolve()
+    if not root.exists():
+        print("❌ No existe dist/. Corré antes: python scripts/inject_head_partial.py --build")
+        return
+
+    pages = [p for p in sorted(root.rglob("*.html")) if p.relative_to(root).parts[0] != "partials"]
+    links, hrefs, heroes = build_graph(pages, root)
+    updated = 0
+    for page, targets in rank(links).items():
+        if args.dry_run:
+            print(f"  {page.relative_to(root)} → {', '.join(t.relative_to(root).as_posix() for t in targets)}")
+            continue
+        text = page.read_text(encoding="utf-8")
+        head_end = text.lower().find("</head>")
+        if not targets or MARKER in text or head_end < 0:
+            continue
+        atomic_write_text(page, text[:head_end] + hints(page, root, targets, hrefs, heroes) + "\n" + text[head_end:])
+        updated += 1
+    print(f"🔮 Pistas de navegación en {updated} páginas ({len(pages)} en el grafo).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Purga de CSS: parsea una sola vez todas las páginas y partials, arma el
+índice de tags/clases/ids/atributos usados y escribe en dist/css/ cada hoja
+de css/ sin los selectores que nada usa, minificada.
+
+Las clases que agrega el JavaScript (active, prev, next, ...) se toman de los
+literales de js/*.js, minificados incluidos, para no purgarlas por error. Las
+que arma Bootstrap en tiempo de ejecución (collapsing, carousel-item-next,
+modal-open, ...) van en SAFELIST: su JS, si se usa, llega de un CDN.
+"""
+import argparse
+import re
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from build_common import DIST_DIR, ROOT, atomic_write_text, iter_html_files
+from css_tools import UsageIndex, filter_rules, merge_usage, parse_css, serialize, usage_from_soup
+
+CSS_DIR = ROOT / "css"
+JS_DIR = ROOT / "js"
+# Clases de estado que se agregan en tiempo de ejecución y no figuran como literales
+SAFELIST = {"active", "prev", "next", "show", "hidden"}
+# Las que agrega el JS de Bootstrap (collapse, carousel, modal, dropdown, tooltip)
+BOOTSTRAP_RUNTIME = {
+    "collapse", "collapsing", "collapsed", "fade", "in",
+    "carousel-item-next", "carousel-item-prev", "carousel-item-left", "carousel-item-right",
+    "carousel-item-start", "carousel-item-end", "pointer-event",
+    "modal-open", "modal-backdrop", "modal-static",
+    "dropdown-menu-right", "dropup", "dropright", "dropleft",
+    "tooltip", "popover", "bs-tooltip-top", "bs-tooltip-bottom", "bs-tooltip-left", "bs-tooltip-right",
+    "bs-popover-top", "bs-popover-bottom", "bs-popover-left", "bs-popover-right",
+}
+JS_STRING_RE = re.compile(r"""(["'`])((?:\\.|(?!\1).)*)\1""")
+JS_TOKEN_RE = re.compile(r"-?[_a-zA-Z][\w-]*")
+LICENSE_RE = re.compile(r"/\*!.*?\*/", re.DOTALL)
+
+
+def js_usage() -> UsageIndex:
+    """Clases/ids que el JS puede agregar o consultar, a partir de sus strings."""
+    tokens = set()
+    for path in JS_DIR.glob("*.js"):
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        for m in JS_STRING_RE.finditer(text):
+            tokens.update(JS_TOKEN_RE.findall(m.group(2)))
+    return UsageIndex(set(), tokens, set(tokens), set())
+
+
+def build_usage_index(pages) -> UsageIndex:
+    """Índice de lo que usan todas las páginas y partials, parseando cada una una vez."""
+    indexes = []
+    for page in pages:
+        soup = BeautifulSoup(page.read_text(encoding="utf-8"), "html.parser")
+        indexes.append(usage_from_soup(soup.find_all(True)))
+    usage = merge_usage(*indexes, js_usage())
+    usage.classes.update(SAFELIST | BOOTSTRAP_RUNTIME)
+    return usage
+
+
+def purge_file(path: Path, usage: UsageIndex) -> str:
+    text = path.read_text(encoding="utf-8", errors="ignore")
+    licenses = "".join(LICENSE_RE.findall(text)[:1])
+    return licenses + serialize(filter_rules(parse_css(text), usage))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purga y minifica las hojas de css/.")
+    parser.add_argument("--out", type=Path, default=DIST_DIR / "css", help="directorio de salida")
+    parser.add_argument("--dry-run", action="store_true", help="solo mostrar el reporte")
+    args = parser.parse_args()
+
+    pages = list(iter_html_files())
+    print(f"🔍 Indexando selectores usados en {len(pages)} archivos HTML...")
+    usage = build_usage_index(pages)
+    print(f"   {len(usage.tags)} tags, {len(usage.classes)} clases, {len(usage.ids)} ids\n")
+
+    total_before = total_after = 0
+    print(f"{'archivo':<24}{'original':>12}{'purgado':>12}{'ahorro':>10}")
+    for css in sorted(CSS_DIR.glob("*.css")):
+        before = css.stat().st_size
+        purged = purge_file(css, usage)
+        after = len(purged.encode("utf-8"))
+        total_before += before
+        total_after += after
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"{css.name:<24}{before:>12,}{after:>12,}{saved:>9.1f}%")
+        if not args.dry_run:
+            atomic_write_text(args.out / css.name, purged)
+
+    saved = (1 - total_after / total_before) * 100 if total_before else 0
+    print(f"{'TOTAL':<24}{total_before:>12,}{total_after:>12,}{saved:>9.1f}%")
+    if not args.dry_run:
+        print(f"\n✨ Hojas purgadas escritas en {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de referencias a img/ compartido por los scripts de imágenes sin uso.
+
+Recorre HTML/CSS/JS/PHP una sola vez con un único regex combinado y arma el
+mapa imagen -> archivos que la referencian. El resultado por archivo se
+guarda en .cache/ref-index.json con su tamaño y mtime, así que en corridas
+siguientes solo se vuelven a leer los archivos modificados.
+"""
+import os
+import re
+import urllib.parse
+from collections import defaultdict
+from pathlib import Path
+
+from build_common import EXCLUDED_DIRS, IMG_DIR, ROOT, TILES_DIR, load_manifest, save_manifest, stat_key
+
+SEARCH_EXTENSIONS = {".html", ".css", ".js", ".php"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".mp4", ".webm", ".avif"}
+CACHE_NAME = "ref-index.json"
+CACHE_VERSION = 1
+
+_PREFIX = r"(?:\.\.?/|/)?(?:\.\./)*img/"
+# Un solo escáner: entre comillas (admite espacios en el nombre), url() sin
+# comillas, y como último recurso cualquier "img/..." suelto (JS, URLs absolutas).
+REF_RE = re.compile(
+    rf'"{_PREFIX}(?P<dq>[^"?#]+)'
+    rf"|'{_PREFIX}(?P<sq>[^'?#]+)"
+    rf"|url\(\s*{_PREFIX}(?P<url>[^)'\"?#\s]+)"
+    rf"|img/(?P<bare>(?:[^\s<>\"'()\[\]{{}},;?#`$]|\([^\s()\"']*\))+)",
+    re.IGNORECASE,
+)
+# Separa los candidatos de un srcset: "a.webp 360w, ./img/b.webp 768w"
+SRCSET_SPLIT_RE = re.compile(r"\s+\d+(?:\.\d+)?[wx]\s*(?:,\s*|$)")
+
+
+def normalize_filename(filename: str) -> str:
+    """Normaliza el nombre del archivo para comparación."""
+    # Decodifica URLs (%20 -> espacio, etc.)
+    filename = urllib.parse.unquote(filename)
+    # Convierte a minúsculas y normaliza espacios
+    filename = filename.lower().strip()
+    return re.sub(r"\s+", " ", filename)
+
+
+def _expand(value: str):
+    """Una captura puede ser un srcset completo: devuelve cada ruta relativa a img/."""
+    parts = SRCSET_SPLIT_RE.split(value) if SRCSET_SPLIT_RE.search(value) else [value]
+    for i, part in enumerate(parts):
+        part = part.strip()
+        if i > 0:
+            part = re.sub(rf"^{_PREFIX}", "", part)
+        if part:
+            yield part
+
+
+def scan_text(text: str) -> set[str]:
+    """Referencias a img/ (normalizadas) encontradas en un texto."""
+    refs = set()
+    for m in REF_RE.finditer(text):
+        value = m.group("dq") or m.group("sq") or m.group("url") or m.group("bare")
+        for part in _expand(value):
+            normalized = normalize_filename(part)
+            if normalized:
+                refs.add(normalized)
+    return refs
+
+
+def iter_source_files():
+    for dirpath, dirs, files in os.walk(ROOT):
+        if Path(dirpath) == ROOT:
+            # img/ solo tiene binarios; el resto son directorios fuera del sitio
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS and d != "img"]
+        for fn in files:
+            if Path(fn).suffix.lower() in SEARCH_EXTENSIONS:
+                yield Path(dirpath) / fn
+
+
+def collect_references(use_cache: bool = True) -> dict[str, list[str]]:
+    """
+    Devuelve {imagen_normalizada: [archivos que la referencian]}, con las
+    rutas de las imágenes relativas a img/ y las de los archivos a ROOT.
+    """
+    cache = load_manifest(CACHE_NAME) if use_cache else {}
+    if cache.get("version") != CACHE_VERSION:
+        cache = {}
+    cached_files = cache.get("files", {})
+    files = {}
+
+    for path in iter_source_files():
+        rel = path.relative_to(ROOT).as_posix()
+        key = stat_key(path)
+        entry = cached_files.get(rel)
+        if entry is None or entry["stat"] != key:
+            try:
+                text = path.read_text(encoding="utf-8", errors="ignore")
+            except OSError as e:
+                print(f"⚠️  Error leyendo {path}: {e}")
+                continue
+            entry = {"stat": key, "refs": sorted(scan_text(text))}
+        files[rel] = entry
+
+    if use_cache:
+        save_manifest(CACHE_NAME, {"version": CACHE_VERSION, "files": files})
+
+    references = defaultdict(list)
+    for rel, entry in sorted(files.items()):
+        for ref in entry["refs"]:
+            references[ref].append(rel)
+    return dict(references)
+
+
+def get_all_images(extensions=IMAGE_EXTENSIONS) -> dict[str, str]:
+    """{nombre_normalizado: ruta original relativa a img/}"""
+    images = {}
+    if not IMG_DIR.exists():
+        return images
+    for img_path in IMG_DIR.rglob("*"):
+        # Los tiles no se referencian desde ningún archivo pero se usan (deepzoom.py)
+        if img_path.is_relative_to(TILES_DIR):
+            continue
+        if img_path.is_file() and img_path.suffix.lower() in extensions:
+            rel_path = img_path.relative_to(IMG_DIR).as_posix()
+            images[normalize_filename(rel_path)] = rel_path
+    return images
+
+
+def referrers(references: dict, image_rel: str) -> list[str]:
+    """Archivos que referencian una imagen (ruta relativa a img/)."""
+    return references.get(normalize_filename(image_rel), [])
+
+
+def find_unused(references: dict = None, images: dict = None) -> list[Path]:
+    """Imágenes de img/ que ningún archivo referencia."""
+    references = collect_references() if references is None else references
+    images = get_all_images() if images is None else images
+    return sorted(IMG_DIR / rel for norm, rel in images.items() if norm not in references)
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 """Rename HTML files and update all references across the codebase."""
 import os
-import re
-from pathlib import Path
+
+from rewrite_refs import Rewriter, rewrite_files
 
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -15,45 +15,24 @@ RENAMES = {
     'casas': 'proyectamos-dirigimos'
 }
 
-def update_references_in_file(filepath):
-    """Update all href and src references in a file."""
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-    
-    original = content
-    for old_name, new_name in RENAMES.items():
-        # Update hrefs: href="nosotros" → href="proposito"
-        content = re.sub(
-            rf'href=["\']({old_name})["\']',
-            rf'href="{new_name}"',
-            content
-        )
-        # Update paths in src attributes: ./casas/ → ./proyectamos-dirigimos/
-        content = re.sub(
-            rf'(["\'])\./{old_name}/',
-            rf'\1./{new_name}/',
-            content
-        )
-        content = re.sub(
-            rf'(["\']){old_name}/',
-            rf'\1{new_name}/',
-            content
-        )
-    
-    if content != original:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
+# One pass per file for every rename: href="old" exactly, or "./old/",
+# "old/" and "old.html" inside any quoted attribute
+REWRITER = Rewriter(
+    RENAMES,
+    lead=r"(?P<href>href=)?[\"'](?:\./)?",
+    tail=r"(?=/|\.html\b|(?(href)[\"']|(?!)))",
+)
 
 def main():
-    # Step 1: Update all HTML files with new references
-    for dirpath, dirs, files in os.walk(root):
-        for fn in files:
-            if fn.lower().endswith('.html'):
-                filepath = os.path.join(dirpath, fn)
-                if update_references_in_file(filepath):
-                    print(f"Updated references in: {filepath}")
+    # Step 1: Update all HTML files with new references (all or nothing)
+    html_files = [
+        os.path.join(dirpath, fn)
+        for dirpath, dirs, files in os.walk(root)
+        for fn in files
+        if fn.lower().endswith('.html')
+    ]
+    for filepath in rewrite_files(REWRITER, html_files):
+        print(f"Updated references in: {filepath}")
     
     # Step 2: Rename files using os.rename
     for old_name, new_name in RENAMES.items():
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Genera variantes por ancho de las fotos referenciadas en las páginas
+(img/responsive/<nombre>-w<ancho>.webp, y .avif si Pillow lo soporta) y
+reescribe el HTML para usarlas:
+- <img> recibe srcset/sizes, solo si se sabe a qué ancho se muestra (ver
+  layout_sizes) y no es un ícono.
+- Los fondos inline (style="background: url(...)") reciben una clase y un
+  <style data-responsive-bg> con media queries que eligen la variante.
+"""
+import argparse
+import re
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from build_common import (
+    IMG_DIR,
+    ROOT,
+    atomic_output,
+    default_workers,
+    file_digest,
+    iter_html_files,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+from convert_to_webp import AVIF_QUALITY, avif_supported
+
+RESPONSIVE_DIR = IMG_DIR / "responsive"
+WIDTHS = (360, 768, 1024, 1366, 1920)
+PHOTO_EXTENSIONS = {".webp", ".jpg", ".jpeg", ".png"}
+# sizes por clase, con los anchos de css/main.css (un % es del contenedor: a lo
+# sumo esa fracción del viewport)
+CLASS_SIZES = {
+    "logo-ie": "(max-width: 575px) 70vw, (max-width: 849px) 50vw, (max-width: 1170px) 40vw, 30vw",
+    "photin": "(max-width: 350px) 70vw, (max-width: 900px) 40vw, 15vw",
+    "imgfoot": "60vw",
+}
+# Una imagen que se muestra a menos que esto (íconos) ya la cubre la variante
+# más chica en una pantalla 3x: no lleva srcset
+SMALL_IMAGE_PX = WIDTHS[0] // 3
+# Lo que escribían versiones anteriores a todas las imágenes: se recalcula
+LEGACY_SIZES = "100vw"
+# Los fondos se eligen asumiendo pantallas 2x, que es lo habitual en celulares
+BG_DENSITY = 2
+MANIFEST = "responsive-manifest.json"
+
+IMG_REF_RE = re.compile(r"^(?P<prefix>(?:\.\.?/|/)?(?:\.\./)*img/)(?P<name>[^/?#]+)$")
+URL_RE = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+VARIANT_RE = re.compile(r"^(?P<stem>.+)-w(?P<width>\d+)\.webp$")
+STYLE_WIDTH_RE = re.compile(r"(?:^|;)\s*(?:max-)?width\s*:\s*(?P<n>\d+(?:\.\d+)?)(?P<unit>px|r?em|vw|%)", re.IGNORECASE)
+
+
+def split_img_ref(src: str):
+    """'./img/LM-7.webp' -> ('./img/', 'LM-7.webp'); None si no es una foto de img/."""
+    m = IMG_REF_RE.match(src.strip())
+    if not m:
+        return None
+    name = urllib.parse.unquote(m.group("name"))
+    if Path(name).suffix.lower() not in PHOTO_EXTENSIONS:
+        return None
+    return m.group("prefix"), name
+
+
+def variant_widths(width: int) -> list[int]:
+    """Anchos a generar: los estándar menores al original, más el original si no supera 1920."""
+    if width <= WIDTHS[0]:
+        return []
+    widths = [w for w in WIDTHS if w < width]
+    if width <= WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def variant_path(name: str, width: int, ext: str = ".webp") -> Path:
+    return RESPONSIVE_DIR / f"{Path(name).stem}-w{width}{ext}"
+
+
+def existing_variants(name: str) -> list[int]:
+    """Anchos disponibles en img/responsive para una imagen (incluye los hechos a mano)."""
+    stem = Path(name).stem
+    widths = []
+    for path in RESPONSIVE_DIR.glob(f"{glob_escape(stem)}-w*.webp"):
+        m = VARIANT_RE.match(path.name)
+        if m and m.group("stem") == stem:
+            widths.append(int(m.group("width")))
+    return sorted(widths)
+
+
+def glob_escape(text: str) -> str:
+    return re.sub(r"([\[\]*?])", r"[\1]", text)
+
+
+def make_variants(src: Path, avif: bool = False) -> list[int]:
+    """Genera las variantes de `src` (se ejecuta en un proceso del pool)."""
+    from PIL import Image
+
+    with Image.open(src) as img:
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        width, height = img.size
+        widths = variant_widths(width)
+        for w in widths:
+            resized = img if w == width else img.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+            with atomic_output(variant_path(src.name, w)) as tmp:
+                resized.save(tmp, "WEBP", quality=80, method=6)
+            if avif:
+                with atomic_output(variant_path(src.name, w, ".avif")) as tmp:
+                    resized.save(tmp, "AVIF", quality=AVIF_QUALITY)
+    return widths
+
+
+def referenced_photos(pages) -> set[str]:
+    """Nombres de las fotos de img/ usadas en <img> o en fondos inline."""
+    names = set()
+    for page in pages:
+        text = page.read_text(encoding="utf-8")
+        soup = BeautifulSoup(text, "html.parser")
+        for img in soup.find_all("img", src=True):
+            ref = split_img_ref(img["src"])
+            if ref:
+                names.add(ref[1])
+        for tag in soup.find_all(style=URL_RE):
+            for _, url in URL_RE.findall(tag["style"]):
+                ref = split_img_ref(url)
+                if ref:
+                    names.add(ref[1])
+    return {n for n in names if (IMG_DIR / n).is_file()}
+
+
+def generate(names, workers: int, force: bool = False):
+    avif = avif_supported()
+    exts = (".webp", ".avif") if avif else (".webp",)
+    manifest = load_manifest(MANIFEST)
+    pending = []
+    for name in sorted(names):
+        src = IMG_DIR / name
+        entry = manifest.get(name, {})
+        digest = entry.get("sha256") if entry.get("stat") == stat_key(src) else file_digest(src)
+        up_to_date = entry.get("sha256") == digest and all(
+            variant_path(name, w, ext).exists() for w in entry.get("widths", []) for ext in exts
+        )
+        if force or not up_to_date:
+            pending.append((src, digest))
+
+    generated = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(make_variants, src, avif): (src, digest) for src, digest in pending}
+        for future in as_completed(futures):
+            src, digest = futures[future]
+            try:
+                widths = future.result()
+            except Exception as e:
+                print(f"  ✗ Error generando variantes de {src.name}: {e}")
+                continue
+            manifest[src.name] = {"sha256": digest, "stat": stat_key(src), "widths": widths}
+            generated += 1
+            if widths:
+                print(f"  ✓ {src.name} → {', '.join(f'w{w}' for w in widths)}")
+    save_manifest(MANIFEST, manifest)
+    return generated, len(names) - len(pending)
+
+
+def build_srcset(prefix: str, name: str, widths) -> str:
+    stem = urllib.parse.quote(Path(name).stem)
+    return ", ".join(f"{prefix}responsive/{stem}-w{w}.webp {w}w" for w in widths)
+
+
+def bg_class(name: str) -> str:
+    return "rbg-" + re.sub(r"[^A-Za-z0-9_-]", "_", Path(name).stem)
+
+
+def bg_rules(prefix: str, name: str, widths) -> list[str]:
+    """Media queries que eligen la variante más chica que cubre el viewport."""
+    stem = urllib.parse.quote(Path(name).stem)
+    cls = bg_class(name)
+    rules = []
+    # De mayor a menor: la última regla que aplica gana. var(--lqip) mantiene
+    # debajo el placeholder de placeholders.py, si la página lo definió
+    for w in sorted(widths, reverse=True):
+        url = f"{prefix}responsive/{stem}-w{w}.webp"
+        rules.append(
+            f"@media (max-width: {w // BG_DENSITY}px) {{ .{cls} {{ background-image: url('{url}'), var(--lqip, none) !important; }} }}"
+        )
+    return rules
+
+
+def bg_media(widths) -> list[tuple]:
+    """
+    [(ancho o None, media query)] con el rango de viewport en que bg_rules
+    elige cada variante; None es el original, por encima de la más grande.
+    """
+    ranges, low = [], 0
+    for w in sorted(widths):
+        high = w // BG_DENSITY
+        query = f"(max-width: {high}px)"
+        ranges.append((w, f"(min-width: {low + 1}px) and {query}" if low else query))
+        low = high
+    ranges.append((None, f"(min-width: {low + 1}px)"))
+    return ranges
+
+
+def layout_sizes(img):
+    """
+    (sizes, ancho en px o None) del <img> según cómo se muestra: su sizes, el
+    width de su style inline, su clase (CLASS_SIZES) o, como techo, su
+    atributo width (el ancho natural, que update_html_for_cls_and_links.py
+    completa). (None, None) si no hay de dónde sacarlo.
+    """
+    if img.get("sizes") and img["sizes"] != LEGACY_SIZES:
+        return img["sizes"], None
+    m = STYLE_WIDTH_RE.search(img.get("style", ""))
+    if m:
+        n, unit = float(m.group("n")), m.group("unit").lower()
+        if unit in ("vw", "%"):
+            return f"{n:g}vw", None
+        px = round(n * 16) if unit.endswith("em") else round(n)
+        return f"{px}px", px
+    for cls in img.get("class", []):
+        if cls in CLASS_SIZES:
+            return CLASS_SIZES[cls], None
+    width = img.get("width", "")
+    if width.isdigit():
+        return f"(max-width: {width}px) 100vw, {width}px", int(width)
+    return None, None
+
+
+def rewrite_page(path: Path) -> bool:
+    text = path.read_text(encoding="utf-8")
+    soup = BeautifulSoup(text, "html.parser")
+    modified = False
+
+    for img in soup.find_all("img", src=True):
+        ref = split_img_ref(img["src"])
+        if not ref:
+            continue
+        widths = existing_variants(ref[1])
+        if not widths:
+            continue
+        srcset = build_srcset(*ref, widths)
+        sizes, px = layout_sizes(img)
+        if sizes is None or (px is not None and px < SMALL_IMAGE_PX):
+            # Sin srcset, y sin el que haya dejado una corrida anterior
+            if img.get("srcset") == srcset:
+                del img["srcset"]
+                if img.get("sizes") == LEGACY_SIZES:
+                    del img["sizes"]
+                modified = True
+            continue
+        if img.get("srcset") != srcset or img.get("sizes") != sizes:
+            img["srcset"] = srcset
+            img["sizes"] = sizes
+            modified = True
+
+    rules = []
+    for tag in soup.find_all(style=URL_RE):
+        for _, url in URL_RE.findall(tag["style"]):
+            ref = split_img_ref(url)
+            widths = existing_variants(ref[1]) if ref else []
+            if not widths:
+                continue
+            cls = bg_class(ref[1])
+            if cls not in tag.get("class", []):
+                tag["class"] = tag.get("class", []) + [cls]
+                modified = True
+            rules.extend(r for r in bg_rules(*ref, widths) if r not in rules)
+
+    old_style = soup.find("style", attrs={"data-responsive-bg": True})
+    new_css = "\n".join(rules)
+    if old_style is not None and old_style.string != new_css:
+        old_style.decompose()
+        old_style = None
+        modified = True
+    if rules and old_style is None and soup.head:
+        style = soup.new_tag("style")
+        style["data-responsive-bg"] = ""
+        style.string = new_css
+        soup.head.append(style)
+        modified = True
+
+    if modified:
+        with atomic_output(path) as tmp:
+            tmp.write_text(str(soup), encoding="utf-8")
+    return modified
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Variantes responsive y srcset para las fotos del sitio.")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="procesos en paralelo")
+    parser.add_argument("--force", action="store_true", help="regenerar todas las variantes")
+    parser.add_argument("--skip-generate", action="store_true", help="solo reescribir el HTML")
+    parser.add_argument("--skip-rewrite", action="store_true", help="solo generar variantes")
+    args = parser.parse_args()
+
+    pages = list(iter_html_files())
+    if not args.skip_generate:
+        print("🖼️  Generando variantes responsive...")
+        names = referenced_photos(pages)
+        generated, fresh = generate(names, args.workers, force=args.force)
+        print(f"\n✨ {generated} imágenes procesadas, {fresh} sin cambios.")
+
+    if not args.skip_rewrite:
+        updated = 0
+        for page in pages:
+            if rewrite_page(page):
+                print(f"✅ srcset actualizado: {page.relative_to(ROOT)}")
+                updated += 1
+        print(f"\n✨ {updated} páginas actualizadas.")
+
+
+if __name__ == "__main__":
+    main()
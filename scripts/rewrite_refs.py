@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor compartido para reescribir referencias en bloque (conversiones de
+formato, renombres, fingerprinting).
+
+Todos los pares viejo -> nuevo se compilan en un único regex: los nombres
+viejos forman un trie (un prefijo común se compara una sola vez) detrás del
+prefijo que los ancla, por ejemplo "img/". Cada archivo se recorre una sola
+vez sin importar cuántos nombres haya en el mapa, y un nombre nuevo nunca se
+vuelve a reescribir en la misma pasada (a.jpg -> a.webp no encadena con
+a.webp -> otro).
+
+rewrite_files() es transaccional: primero calcula y deja escritos en
+temporales todos los archivos modificados, y recién si no hubo errores los
+renombra sobre los originales. Si algo falla no se toca ningún archivo.
+"""
+import re
+from contextlib import ExitStack
+from pathlib import Path
+
+from build_common import atomic_output
+
+# Lo que puede seguir a un nombre sin que sea parte de otro más largo
+NAME_END = r"(?![\w.%-])"
+
+
+def trie_pattern(words) -> str:
+    """Regex que reconoce exactamente `words`, factorizando los prefijos comunes."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        if "" in node:
+            # También termina una palabra acá; el opcional greedy prueba primero la más larga
+            body = f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class Rewriter:
+    """
+    Reemplaza {viejo: nuevo} en una sola pasada. `lead` es el regex que tiene
+    que preceder al nombre (se conserva tal cual) y `tail` el lookahead que
+    tiene que seguirlo.
+    """
+
+    def __init__(self, mapping: dict, lead: str = "", tail: str = NAME_END):
+        self.mapping = dict(mapping)
+        self.pattern = None
+        if self.mapping:
+            self.pattern = re.compile(f"(?P<lead>{lead})(?P<name>{trie_pattern(self.mapping)}){tail}")
+
+    @classmethod
+    def for_dir(cls, mapping: dict, asset_dir: str = "img"):
+        """
+        Nombres relativos a `asset_dir`: reescribe "img/viejo" en cualquier
+        contexto (./img/, ../img/, /img/, url(...), URLs absolutas, JS).
+        """
+        return cls(mapping, lead=rf"(?<![\w-]){re.escape(asset_dir)}/")
+
+    def sub(self, text: str) -> tuple[str, int]:
+        if self.pattern is None:
+            return text, 0
+        return self.pattern.subn(lambda m: m.group("lead") + self.mapping[m.group("name")], text)
+
+
+def commit(changes: dict):
+    """Escribe {ruta: texto} todo o nada: si falla algún temporal no se reemplaza ninguno."""
+    # Cada atomic_output renombra al salir del ExitStack; con una excepción
+    # adentro, todos descartan su temporal
+    with ExitStack() as stack:
+        for path, text in changes.items():
+            tmp = stack.enter_context(atomic_output(path))
+            tmp.write_bytes(text.encode("utf-8"))
+
+
+def rewrite_files(rewriter: Rewriter, paths) -> list[Path]:
+    """Aplica `rewriter` a todos los archivos de forma transaccional; devuelve los modificados."""
+    changes = {}
+    for path in paths:
+        path = Path(path)
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        new_text, count = rewriter.sub(text)
+        if count and new_text != text:
+            changes[path] = new_text
+    commit(changes)
+    return list(changes)
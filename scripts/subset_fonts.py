@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fuentes propias y recortadas para dist/.
+
+1. Averigua qué familias usan realmente las hojas de css/ y los estilos
+   inline, y qué caracteres aparecen en el texto de páginas y partials.
+2. Para cada familia usada con archivos en font/ (las declaradas en
+   font/stylesheet.css o cualquier .ttf/.otf/.woff/.woff2 suelto), genera un
+   WOFF2 con solo esos caracteres en dist/font/subset/.
+3. Escribe dist/css/fonts.css con los @font-face (font-display: swap), la
+   enlaza en las páginas con <link rel=preload> para las fuentes del texto
+   principal, y quita el @import de font/stylesheet.css de las hojas.
+4. Saca de las páginas los <link> a fonts.googleapis.com de familias que se
+   sirven localmente o que nadie usa, y el <link rel=stylesheet> al .woff de
+   Auro en github.io. Las familias de Google que no tienen archivos locales se
+   conservan, con display=swap y preconnect a fonts.gstatic.com.
+
+El recorte usa fontTools (pip install fonttools brotli). Sin fontTools se
+copian los WOFF2 originales: igual se evita la conexión a terceros.
+Los recortes se guardan en .cache/fonts/ indexados por hash de la fuente y
+del conjunto de caracteres.
+"""
+import argparse
+import hashlib
+import html
+import re
+import shutil
+import urllib.parse
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from build_common import CACHE_DIR, DIST_DIR, ROOT, atomic_output, atomic_write_text, file_digest, iter_html_files
+from critical_css import LINK_RE, link_attrs
+from css_tools import AtRule, StyleRule, parse_css, split_top_level
+
+FONT_DIR = ROOT / "font"
+CSS_DIR = ROOT / "css"
+SUBSET_DIR = "font/subset"
+FONTS_CSS = "css/fonts.css"
+FONT_CACHE = CACHE_DIR / "fonts"
+FONT_SUFFIXES = (".woff2", ".woff", ".ttf", ".otf")
+# Siempre disponibles: ASCII imprimible y lo propio del castellano (texto que agrega el JS, formularios)
+BASE_CHARS = "".join(chr(c) for c in range(0x20, 0x7F)) + "áéíóúÁÉÍÓÚñÑüÜ¿¡«»ºª°–—‘’“”…€·"
+GENERIC_FAMILIES = {
+    "serif", "sans-serif", "monospace", "cursive", "fantasy", "system-ui", "inherit", "initial",
+    "unset", "-apple-system", "blinkmacsystemfont", "emoji", "math", "ui-sans-serif", "ui-serif",
+}
+# Familias cuyo primer archivo se precarga: las del texto principal (body)
+PRELOAD_LIMIT = 2
+PRIMARY_SELECTOR_RE = re.compile(r"\s*(?:html|body|h[1-6]|p)\s*", re.IGNORECASE)
+# Hasta el fin de la declaración: las familias con comillas ("Foo Bar") van adentro
+FONT_FAMILY_RE = re.compile(r"font-family\s*:\s*([^;}]+)", re.IGNORECASE)
+DECL_RE = re.compile(r"([\w-]+)\s*:\s*([^;]+)")
+SRC_URL_RE = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)(?:\s*format\(\s*['\"]?([\w-]+)['\"]?\s*\))?")
+FONT_IMPORT_RE = re.compile(r"@import\s+(?:url\()?\s*['\"]?[^'\")]*font/stylesheet\.css['\"]?\s*\)?\s*;?")
+GOOGLE_FONTS = "fonts.googleapis.com"
+# El <link> con su salto de línea, para no dejar líneas vacías al quitarlo
+FONT_LINK_RE = re.compile(LINK_RE.pattern + r"\n?", re.IGNORECASE)
+THIRD_PARTY_FONT_RE = re.compile(r"\.(?:woff2?|ttf|otf)(?:[?#].*)?$", re.IGNORECASE)
+
+
+def family_key(name: str) -> str:
+    return name.strip().strip("'\"").strip().lower()
+
+
+def families_in(value: str) -> list[str]:
+    """'Inter, Lato, sans-serif !important' -> ['inter', 'lato']"""
+    value = value.replace("!important", "")
+    return [f for f in (family_key(p) for p in split_top_level(value)) if f and f not in GENERIC_FAMILIES]
+
+
+def used_families() -> dict[str, bool]:
+    """
+    {familia: es_principal}. Principal = es la primera de la pila en un
+    selector de body o de títulos/párrafos: el texto que se ve primero, y lo
+    que conviene precargar. Las de respaldo solo se descargan si hacen falta.
+    """
+    used = {}
+    for css in sorted(CSS_DIR.glob("*.css")):
+        if css.name == "fonts.css":
+            continue
+        for rule in _flatten(parse_css(css.read_text(encoding="utf-8", errors="ignore"))):
+            for m in FONT_FAMILY_RE.finditer(rule.body):
+                primary = any(PRIMARY_SELECTOR_RE.fullmatch(s) for s in rule.selectors)
+                for i, name in enumerate(families_in(m.group(1))):
+                    used[name] = used.get(name, False) or (primary and i == 0)
+    for page in iter_html_files():
+        # Los style="" y <style> por separado: en el HTML crudo una comilla cierra el atributo
+        soup = BeautifulSoup(page.read_text(encoding="utf-8"), "html.parser")
+        styles = [tag["style"] for tag in soup.find_all(style=True)]
+        styles += [style.get_text() for style in soup.find_all("style")]
+        for m in (m for text in styles for m in FONT_FAMILY_RE.finditer(text)):
+            for name in families_in(m.group(1)):
+                used.setdefault(name, False)
+    return used
+
+
+def _flatten(rules):
+    for rule in rules:
+        if isinstance(rule, StyleRule):
+            yield rule
+        elif rule.children:
+            yield from _flatten(rule.children)
+
+
+def used_text() -> str:
+    chars = set(BASE_CHARS)
+    for page in iter_html_files():
+        soup = BeautifulSoup(page.read_text(encoding="utf-8"), "html.parser")
+        for tag in soup(["script", "style"]):
+            tag.decompose()
+        chars.update(soup.get_text())
+        for tag in soup.find_all(True):
+            for attr in ("alt", "title", "placeholder", "value", "aria-label"):
+                if tag.get(attr):
+                    chars.update(tag[attr])
+    for css in CSS_DIR.glob("*.css"):
+        for m in re.finditer(r"content\s*:\s*(['\"])(.*?)\1", css.read_text(encoding="utf-8", errors="ignore")):
+            chars.update(m.group(2))
+    return "".join(sorted(c for c in chars if c.isprintable() or c == " "))
+
+
+def local_faces() -> dict[str, list[dict]]:
+    """{familia: [{'file', 'weight', 'style'}]} con los archivos de font/."""
+    faces = {}
+    declared = set()
+    sheet = FONT_DIR / "stylesheet.css"
+    if sheet.exists():
+        for rule in parse_css(sheet.read_text(encoding="utf-8", errors="ignore")):
+            if not (isinstance(rule, AtRule) and rule.prelude.lower() == "@font-face" and rule.body):
+                continue
+            decls = {k.lower(): v.strip() for k, v in DECL_RE.findall(rule.body)}
+            files = [FONT_DIR / url for url, _ in SRC_URL_RE.findall(decls.get("src", ""))]
+            files = [f for f in files if f.is_file()]
+            declared.update(files)
+            if not files or "font-family" not in decls:
+                continue
+            best = min(files, key=lambda f: FONT_SUFFIXES.index(f.suffix.lower()))
+            faces.setdefault(family_key(decls["font-family"]), []).append({
+                "file": best,
+                "weight": decls.get("font-weight", "normal"),
+                "style": decls.get("font-style", "normal"),
+            })
+    # Archivos sueltos (por ejemplo Inter-Regular.ttf): nombre de familia desde la tabla 'name'
+    for path in sorted(FONT_DIR.iterdir()):
+        if path.suffix.lower() not in FONT_SUFFIXES or path in declared:
+            continue
+        info = font_name_info(path)
+        if info:
+            family, weight, style = info
+            faces.setdefault(family_key(family), []).append({"file": path, "weight": weight, "style": style})
+    return faces
+
+
+def fonttools_available() -> bool:
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def font_name_info(path: Path):
+    """(familia, peso, estilo) leídos con fontTools, o None si no está instalado."""
+    try:
+        from fontTools.ttLib import TTFont
+    except ImportError:
+        return None
+    try:
+        font = TTFont(path, lazy=True)
+        family = font["name"].getBestFamilyName()
+        weight = str(font["OS/2"].usWeightClass) if "OS/2" in font else "normal"
+        style = "italic" if "OS/2" in font and font["OS/2"].fsSelection & 1 else "normal"
+        return family, weight, style
+    except Exception:
+        return None
+
+
+def subset_font(src: Path, text: str) -> Path:
+    """WOFF2 de `src` recortado a `text`, desde .cache/fonts/ si ya se generó."""
+    key = hashlib.sha256((file_digest(src) + text).encode("utf-8")).hexdigest()[:12]
+    cached = FONT_CACHE / f"{src.stem}.{key}.woff2"
+    if cached.exists():
+        return cached
+    try:
+        from fontTools import subset
+    except ImportError:
+        # Sin fontTools: el WOFF2 original, si existe
+        original = src.with_suffix(".woff2")
+        return original if original.exists() else src
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = subset.load_font(str(src), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    with atomic_output(cached) as tmp:
+        subset.save_font(font, str(tmp), options)
+    return cached
+
+
+def google_families(href: str) -> list[str]:
+    """Familias que pide una URL de Google Fonts (css y css2)."""
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(html.unescape(href)).query)
+    names = []
+    for value in query.get("family", []):
+        for part in value.split("|"):
+            names.append(family_key(part.split(":")[0].replace("+", " ")))
+    return names
+
+
+def with_display_swap(href: str) -> str:
+    parts = urllib.parse.urlsplit(html.unescape(href))
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    if any(k == "display" for k, _ in query):
+        return href
+    sep = "&amp;" if "&amp;" in href else "&"
+    return href + (sep if parts.query else "?") + "display=swap"
+
+
+def font_face_css(family: str, face: dict, url: str) -> str:
+    return (
+        f"@font-face{{font-family:'{family}';src:url('{url}') format('woff2');"
+        f"font-weight:{face['weight']};font-style:{face['style']};font-display:swap}}"
+    )
+
+
+def build_fonts(dist: Path):
+    used = used_families()
+    faces = local_faces()
+    text = used_text()
+    css, preload = [], []
+    for family in sorted(used):
+        for face in faces.get(family, []):
+            subset_path = subset_font(face["file"], text)
+            name = f"{face['file'].stem}-subset.woff2" if subset_path.parent == FONT_CACHE else subset_path.name
+            target = dist / SUBSET_DIR / name
+            if subset_path.suffix != ".woff2":
+                # Solo hay .woff/.ttf y no hay fontTools para convertir: se sirve tal cual
+                target = target.with_suffix(subset_path.suffix)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(subset_path, target)
+            url = f"../{SUBSET_DIR}/{target.name}"
+            face_css = font_face_css(family, face, url)
+            if target.suffix != ".woff2":
+                face_css = face_css.replace("format('woff2')", f"format('{target.suffix[1:]}')")
+            css.append(face_css)
+            if used[family] and len(preload) < PRELOAD_LIMIT and target.suffix == ".woff2":
+                preload.append(f"/{SUBSET_DIR}/{target.name}")
+            print(f"  ✓ {family}: {face['file'].name} ({face['file'].stat().st_size // 1024} KB) → "
+                  f"{target.name} ({target.stat().st_size // 1024} KB)")
+    atomic_write_text(dist / FONTS_CSS, "\n".join(css) + "\n")
+    local = {f for f in used if faces.get(f)}
+    return used, local, preload
+
+
+def rewrite_stylesheets(dist: Path) -> int:
+    """Quita el @import de font/stylesheet.css: los @font-face ahora están en fonts.css."""
+    changed = 0
+    for css in (dist / "css").glob("*.css"):
+        text = css.read_text(encoding="utf-8", errors="ignore")
+        new = FONT_IMPORT_RE.sub("", text)
+        if new != text:
+            atomic_write_text(css, new)
+            changed += 1
+    return changed
+
+
+def rewrite_page(page: Path, used: dict, local: set, preload: list):
+    """Reemplaza los <link> de fuentes; devuelve las familias que quedan en Google, o None si no cambió."""
+    text = page.read_text(encoding="utf-8")
+    if FONTS_CSS in text:
+        return None
+    marker = "\0fonts\0"
+    state = {"marked": False, "google": set()}
+
+    def replace(m):
+        attrs = link_attrs(m.group(0))
+        href = attrs.get("href", "")
+        rel = attrs.get("rel", "").lower()
+        if rel != "stylesheet" or not (GOOGLE_FONTS in href or THIRD_PARTY_FONT_RE.search(href)):
+            return m.group(0)
+        # Los links nuevos van donde estaba el primer <link> de fuentes
+        prefix = "" if state["marked"] else marker
+        state["marked"] = True
+        remote = [f for f in google_families(href) if f in used and f not in local] if GOOGLE_FONTS in href else []
+        if remote:
+            state["google"].update(remote)
+            return prefix + m.group(0).replace(href, with_display_swap(href))
+        # Familia local o sin uso, o un .woff enlazado como hoja de estilos
+        return prefix
+
+    new = FONT_LINK_RE.sub(replace, text)
+    head = []
+    if state["google"]:
+        head.append('<link crossorigin="" href="https://fonts.gstatic.com" rel="preconnect"/>')
+    head += [f'<link as="font" crossorigin="" href="{href}" rel="preload" type="font/woff2"/>' for href in preload]
+    head.append(f'<link href="/{FONTS_CSS}" rel="stylesheet"/>')
+    block = "\n".join(head) + "\n"
+    if marker in new:
+        new = new.replace(marker, block, 1)
+    else:
+        close = re.search(r"</head>", new, re.IGNORECASE)
+        if not close:
+            return None
+        new = new[:close.start()] + block + new[close.start():]
+    atomic_write_text(page, new)
+    return state["google"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuentes locales recortadas y @font-face con swap en dist/.")
+    parser.add_argument("--dist", type=Path, default=DIST_DIR, help="directorio de build")
+    args = parser.parse_args()
+
+    dist = args.dist.resolve()
+    if not dist.exists():
+        print("❌ No existe dist/. Corré antes: python scripts/inject_head_partial.py --build")
+        return
+
+    subsetting = fonttools_available()
+    if subsetting:
+        print("🔤 Recortando fuentes...")
+    else:
+        print("🔤 Copiando fuentes sin recortar...")
+        print("  ⚠ fontTools no está instalado (pip install fonttools brotli): se sirven las fuentes completas")
+    used, local, preload = build_fonts(dist)
+    sheets = rewrite_stylesheets(dist)
+    pages, remote = 0, set()
+    for page in sorted(dist.rglob("*.html")):
+        if page.relative_to(dist).parts[0] == "partials":
+            continue
+        kept = rewrite_page(page, used, local, preload)
+        if kept is not None:
+            pages += 1
+            remote |= kept
+    if remote:
+        print(f"   ⚠ Sin archivos en font/, siguen en Google Fonts: {', '.join(sorted(remote))}")
+    state = "recortadas" if subsetting else "sin recortar"
+    print(f"\n✨ fonts.css con {len(local)} familias locales ({state}); {pages} páginas y {sheets} hojas actualizadas.")
+
+
+if __name__ == "__main__":
+    main()
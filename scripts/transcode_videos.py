@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Etapa de medios para los videos de img/:
+- Genera variantes de menor bitrate (MP4/H.264 y WebM/VP9) en img/video/
+- Extrae un póster liviano en WebP
+- Reescribe los <video> con una lista de <source>, preload="none" y poster
+
+Usa el ffmpeg disponible en el PATH. Si no hay ffmpeg la generación se
+saltea con un aviso y la reescritura solo usa las variantes que ya existan.
+Como en convert_to_webp.py, .cache/video-manifest.json guarda el hash de cada
+original para recodificar únicamente los que cambiaron.
+"""
+import argparse
+import mimetypes
+import posixpath
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from build_common import (
+    IMG_DIR,
+    atomic_output,
+    file_digest,
+    load_manifest,
+    save_manifest,
+    stat_key,
+)
+from html_pipeline import run_pipeline, transform
+
+VIDEO_DIR = IMG_DIR / "video"
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v"}
+MANIFEST = "video-manifest.json"
+POSTER_WIDTH = 1280
+POSTER_QUALITY = 70
+# (etiqueta, ancho máximo, bitrate máximo, media query de la <source>)
+LADDER = [
+    ("480p", 854, "700k", "(max-width: 767px)"),
+    ("720p", 1280, "1800k", None),
+]
+# (extensión, tipo MIME, argumentos del encoder de video y de audio)
+FORMATS = [
+    ("webm", "video/webm", ["-c:v", "libvpx-vp9", "-crf", "36", "-row-mt", "1", "-deadline", "good", "-cpu-used", "2"],
+     ["-c:a", "libopus", "-b:a", "64k"]),
+    ("mp4", "video/mp4", ["-c:v", "libx264", "-preset", "slow", "-crf", "26", "-pix_fmt", "yuv420p",
+                          "-movflags", "+faststart"],
+     ["-c:a", "aac", "-b:a", "96k"]),
+]
+
+
+def find_ffmpeg():
+    return shutil.which("ffmpeg")
+
+
+def variant_path(name: str, label: str, ext: str) -> Path:
+    return VIDEO_DIR / f"{Path(name).stem}-{label}.{ext}"
+
+
+def poster_path(name: str) -> Path:
+    return VIDEO_DIR / f"{Path(name).stem}-poster.webp"
+
+
+def expected_outputs(name: str) -> list[Path]:
+    return [variant_path(name, label, ext) for label, *_ in LADDER for ext, *_ in FORMATS] + [poster_path(name)]
+
+
+def _ffmpeg(ffmpeg: str, *args):
+    subprocess.run([ffmpeg, "-y", "-hide_banner", "-loglevel", "error", *args], check=True)
+
+
+def encode_variant(ffmpeg: str, src: Path, dest: Path, width: int, maxrate: str, video_args, audio_args):
+    scale = f"scale=w='min({width},iw)':h=-2"
+    rate = ["-maxrate", maxrate, "-bufsize", maxrate]
+    if "libvpx-vp9" in video_args:
+        # VP9 en modo calidad constante necesita -b:v 0 además del tope
+        rate = ["-b:v", "0"] + rate
+    with atomic_output(dest) as tmp:
+        _ffmpeg(ffmpeg, "-i", str(src), "-vf", scale, *video_args, *rate, *audio_args, str(tmp))
+
+
+def extract_poster(ffmpeg: str, src: Path, dest: Path):
+    """Toma un cuadro representativo (filtro thumbnail) y lo guarda como WebP con PIL."""
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        frame = Path(tmpdir) / "frame.png"
+        _ffmpeg(ffmpeg, "-i", str(src), "-vf", f"thumbnail,scale=w='min({POSTER_WIDTH},iw)':h=-2",
+                "-frames:v", "1", str(frame))
+        with Image.open(frame) as img, atomic_output(dest) as tmp:
+            img.convert("RGB").save(tmp, "WEBP", quality=POSTER_QUALITY, method=6)
+
+
+def transcode(ffmpeg: str, src: Path) -> list[str]:
+    """Genera todas las salidas de un video y devuelve sus nombres."""
+    for label, width, maxrate, _ in LADDER:
+        for ext, _, video_args, audio_args in FORMATS:
+            encode_variant(ffmpeg, src, variant_path(src.name, label, ext), width, maxrate, video_args, audio_args)
+    extract_poster(ffmpeg, src, poster_path(src.name))
+    return [p.name for p in expected_outputs(src.name)]
+
+
+def plan_transcodes(manifest: dict, force: bool = False):
+    pending = []
+    for src in sorted(IMG_DIR.iterdir()):
+        if not src.is_file() or src.suffix.lower() not in VIDEO_EXTENSIONS:
+            continue
+        entry = manifest.get(src.name, {})
+        digest = entry.get("sha256") if entry.get("stat") == stat_key(src) else file_digest(src)
+        up_to_date = entry.get("sha256") == digest and all(p.exists() for p in expected_outputs(src.name))
+        if force or not up_to_date:
+            pending.append((src, digest))
+    return pending
+
+
+def transcode_all(pending, manifest: dict, workers: int):
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        print("  ⚠ ffmpeg no está instalado: se omite la generación de variantes")
+        return []
+    done = []
+    # ffmpeg ya usa varios hilos por video; alcanza con pocos en paralelo
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(transcode, ffmpeg, src): (src, digest) for src, digest in pending}
+        for future in as_completed(futures):
+            src, digest = futures[future]
+            try:
+                outputs = future.result()
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"  ✗ Error al transcodificar {src.name}: {e}")
+                continue
+            manifest[src.name] = {"sha256": digest, "stat": stat_key(src), "outputs": outputs}
+            original = src.stat().st_size
+            smallest = min((VIDEO_DIR / o).stat().st_size for o in outputs if not o.endswith(".webp"))
+            print(f"  ✓ {src.name} → {len(outputs)} archivos (la variante más chica pesa "
+                  f"{smallest / original:.0%} del original)")
+            done.append(src.name)
+    return done
+
+
+def _original_src(video):
+    """src del video original, aunque ya se haya reescrito con <source>."""
+    if video.get("src"):
+        return video["src"]
+    sources = video.find_all("source", recursive=False)
+    return sources[-1].get("src") if sources else None
+
+
+@transform("video_sources", scope="pages")
+def video_sources(soup, ctx):
+    modified = False
+    for video in soup.find_all("video"):
+        src = _original_src(video)
+        if not src or src.startswith(("http:", "https:", "//")):
+            continue
+        name = posixpath.basename(src)
+        base = posixpath.join(posixpath.dirname(src), "video")
+        before = str(video)
+
+        sources = []
+        for label, _, _, media in LADDER:
+            for ext, mime, *_ in FORMATS:
+                if variant_path(name, label, ext).exists():
+                    attrs = {"src": f"{base}/{variant_path(name, label, ext).name}", "type": mime}
+                    if media:
+                        attrs["media"] = media
+                    sources.append(attrs)
+        if sources:
+            # Con src en el <video> el navegador ignora las <source>
+            if video.has_attr("src"):
+                del video["src"]
+            for old in video.find_all("source", recursive=False):
+                old.decompose()
+            # El original puede ser .mov o .m4v: sin un type conocido el navegador lo prueba
+            fallback = {"src": src}
+            mime = mimetypes.guess_type(name)[0]
+            if mime:
+                fallback["type"] = mime
+            for attrs in sources + [fallback]:
+                video.append(soup.new_tag("source", attrs=attrs))
+        if poster_path(name).exists():
+            video["poster"] = f"{base}/{poster_path(name).name}"
+        # Los que tienen autoplay igual arrancan; el resto no descarga nada hasta reproducir
+        video["preload"] = "none"
+        modified = modified or str(video) != before
+    return modified
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Variantes livianas y pósters para los videos de img/.")
+    parser.add_argument("--workers", type=int, default=2, help="videos en paralelo")
+    parser.add_argument("--force", action="store_true", help="ignorar el manifiesto y recodificar todo")
+    parser.add_argument("--skip-rewrite", action="store_true", help="no reescribir los <video> de las páginas")
+    args = parser.parse_args()
+
+    manifest = load_manifest(MANIFEST)
+    pending = plan_transcodes(manifest, args.force)
+    print(f"🎬 {len(pending)} videos para transcodificar")
+    if pending and transcode_all(pending, manifest, args.workers):
+        save_manifest(MANIFEST, manifest)
+
+    if not args.skip_rewrite:
+        updated = run_pipeline(["video_sources"])
+        print(f"✨ {len(updated)} páginas actualizadas")
+
+
+if __name__ == "__main__":
+    # Se delega en el módulo importado para que el pipeline encuentre la transformación
+    import transcode_videos
+
+    transcode_videos.main()
@@ -4,22 +4,20 @@
 2. Add width/height attributes to <img> tags based on actual image dimensions
 3. Prettify output via BeautifulSoup to clean up code
 
-Runs in-place on all .html files under workspace.
+Runs in-place on all .html files under workspace. Steps 1 and 2 are
+html_pipeline.py transforms; step 3 is the pipeline's prettify option.
 """
 import os
-import sys
-from bs4 import BeautifulSoup
-from PIL import Image
+
+from html_pipeline import run_pipeline, transform
+from image_dims import image_size, warm_cache
 
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-def process_file(path):
-    changed = False
-    with open(path, 'r', encoding='utf-8') as f:
-        data = f.read()
-    soup = BeautifulSoup(data, 'html.parser')
 
-    # 1. update hrefs
+@transform("strip_html_ext")
+def strip_html_ext(soup, ctx):
+    changed = False
     for a in soup.find_all('a', href=True):
         href = a['href']
         # ignore anchors and external links
@@ -29,7 +27,12 @@ def process_file(path):
             new = href[:-5]
             a['href'] = new
             changed = True
-    # 2. add width/height to images
+    return changed
+
+
+@transform("img_dimensions", prepare=warm_cache)
+def img_dimensions(soup, ctx):
+    changed = False
     for img in soup.find_all('img', src=True):
         src = img['src']
         if src.startswith('http') or src.startswith('data:'):
@@ -37,33 +40,20 @@ def process_file(path):
         # strip leading slash
         relpath = src.lstrip('/\\')
         full = os.path.join(root, relpath)
-        if os.path.isfile(full):
-            try:
-                w,h = Image.open(full).size
-                if not img.has_attr('width') or img['width'] != str(w):
-                    img['width'] = str(w)
-                    changed = True
-                if not img.has_attr('height') or img['height'] != str(h):
-                    img['height'] = str(h)
-                    changed = True
-            except Exception:
-                pass
+        size = image_size(full) if os.path.isfile(full) else None
+        if size:
+            w,h = size
+            if not img.has_attr('width') or img['width'] != str(w):
+                img['width'] = str(w)
+                changed = True
+            if not img.has_attr('height') or img['height'] != str(h):
+                img['height'] = str(h)
+                changed = True
+    return changed
 
-    # 3. prettify to clean
-    newhtml = soup.prettify()
-    if newhtml != data:
-        changed = True
-    if changed:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(newhtml)
-        print("Modified", path)
 
+TRANSFORMS = ["strip_html_ext", "img_dimensions"]
 
-def walk():
-    for dirpath, dirs, files in os.walk(root):
-        for fn in files:
-            if fn.lower().endswith('.html'):
-                process_file(os.path.join(dirpath, fn))
 
 if __name__ == '__main__':
-    walk()
+    run_pipeline(TRANSFORMS, prettify=True)